@@ -0,0 +1,283 @@
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import hashlib
+import argparse
+import tempfile
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from ui_action_automator import UIActionAutomator, explore_app
+from utils.cassette import CassetteMismatch, ReplayDriver
+from utils.clock import SimulatedTime
+from utils.fake_driver import FakeDriver
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE = os.path.join(HERE, "benchmarks", "fixtures", "demo")
+DEFAULT_RESULTS_DIR = os.path.join(HERE, "benchmarks", "results")
+
+class PhaseProfiler:
+    """Exclusive CPU, wall and (simulated) device time per phase of the automator.
+
+    Methods are wrapped on the instances under test. Nested phases are charged
+    to the innermost one. CPU is process time, so artifact writer threads count
+    toward whichever phase runs while they work.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.stack = []
+        self.mark = None
+
+    def now(self) -> tuple[float, float, float]:
+        return time.process_time(), time.perf_counter(), time.monotonic()
+
+    def charge(self) -> None:
+        now = self.now()
+        if self.stack and self.mark:
+            totals = self.phases[self.stack[-1]]
+            totals["cpu_seconds"] += now[0] - self.mark[0]
+            totals["wall_seconds"] += now[1] - self.mark[1]
+            totals["simulated_seconds"] += now[2] - self.mark[2]
+        self.mark = now
+
+    def enter(self, phase) -> None:
+        self.charge()
+        totals = self.phases.setdefault(phase, {"calls": 0, "cpu_seconds": 0.0, "wall_seconds": 0.0, "simulated_seconds": 0.0})
+        totals["calls"] += 1
+        self.stack.append(phase)
+
+    def exit(self) -> None:
+        self.charge()
+        self.stack.pop()
+
+    def wrap(self, obj, method_name, phase) -> None:
+        method = getattr(obj, method_name)
+
+        def wrapped(*args, **kwargs):
+            self.enter(phase)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.exit()
+
+        setattr(obj, method_name, wrapped)
+
+def instrument(automator, profiler) -> None:
+    gesture_handler = automator.gesture_handler
+    for name in ("perform_tap", "perform_double_tap", "perform_long_press_with_screenshot", "perform_swipe_or_scroll", "perform_pinch_zoom"):
+        profiler.wrap(gesture_handler, name, "gesture")
+    profiler.wrap(automator, "get_next_unvisited_element", "candidates")
+    profiler.wrap(automator.element_finder, "refresh", "hierarchy")
+    profiler.wrap(automator.settle_detector, "wait", "settle")
+    profiler.wrap(automator, "take_screenshot", "capture")
+    profiler.wrap(automator.data_saver, "capture_stage", "capture")
+    profiler.wrap(automator, "compare_hierarchies", "diff")
+    profiler.wrap(automator.image_change_detector, "compare_stages", "diff")
+    profiler.wrap(automator.data_saver, "commit_sample", "commit")
+    profiler.wrap(automator.data_saver, "delete_data", "commit")
+    profiler.wrap(automator, "go_back_to_initial_screen", "restore")
+    profiler.wrap(automator, "close", "artifacts")
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def dataset_digest(dataset_dir) -> str:
+    """Hash of the sample files (paths and contents) to compare the output of two runs"""
+    hasher = hashlib.sha256()
+    for root, dirs, files in os.walk(dataset_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            hasher.update(os.path.relpath(path, dataset_dir).encode("utf-8"))
+            with open(path, "rb") as f:
+                hasher.update(hashlib.sha256(f.read()).digest())
+    return hasher.hexdigest()
+
+def run_benchmark(fixture_dir, screen=None, latencies=None, automator_options=None, simulate_time=True,
+                  trace_memory=False, quiet=True, cassette_dir=None, strict=False) -> dict:
+    """Run the automator against a FakeDriver fixture, or a recorded cassette, in a scratch directory and return the measurements"""
+    fixture_dir = os.path.abspath(cassette_dir or fixture_dir)
+    workdir = tempfile.mkdtemp(prefix="ui-probing-benchmark-")
+    previous_dir = os.getcwd()
+    previous_stdout = sys.stdout
+    profiler = PhaseProfiler()
+
+    try:
+        os.chdir(workdir)
+        if cassette_dir:
+            driver = ReplayDriver(fixture_dir, strict=strict)
+            app = driver.metadata["app"]
+            screens = app["screens"]
+        else:
+            driver = FakeDriver(fixture_dir, latencies)
+            screen = screen or driver.start_screen
+            screens = {name: {"navigate": actions} for name, actions in driver.navigation.items()}
+        options = {"artifact_workers": 2}
+        options.update(automator_options or {})
+
+        if quiet:
+            sys.stdout = open(os.devnull, "w", encoding="utf-8")
+        if trace_memory:
+            tracemalloc.start()
+
+        # Replays use a frozen clock so settle polls and timeouts come out the same on every run
+        clock = SimulatedTime(frozen=bool(cassette_dir)) if simulate_time else None
+        if clock:
+            clock.__enter__()
+        try:
+            automator = UIActionAutomator(driver, screens=screens, persist_progress=False, **options)
+            instrument(automator, profiler)
+
+            # Same tap points on every run: the recorded run's seed, or the fixture's
+            random.seed(driver.random_seed)
+            started = profiler.now()
+            if cassette_dir:
+                try:
+                    explore_app(automator, driver, app, play_store=False)
+                except CassetteMismatch:
+                    # Kept in driver.stats() and reported with the result
+                    pass
+            else:
+                automator.run_test_on_screen(screen)
+            automator.close()
+            finished = profiler.now()
+        finally:
+            if clock:
+                clock.__exit__(None, None, None)
+
+        python_peak_mb = None
+        if trace_memory:
+            python_peak_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+    finally:
+        if sys.stdout is not previous_stdout:
+            sys.stdout.close()
+            sys.stdout = previous_stdout
+        os.chdir(previous_dir)
+
+    actions = sum(len(paths) for paths in automator.visited_paths_by_screen.values())
+    kept = sum(1 for _, _, files in os.walk(os.path.join(workdir, "dataset")) if "action.json" in files)
+    digest = dataset_digest(os.path.join(workdir, "dataset"))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    cpu_seconds = finished[0] - started[0]
+    wall_seconds = finished[1] - started[1]
+    simulated_seconds = finished[2] - started[2]
+    phases = dict(sorted(profiler.phases.items()))
+    other = {
+        "calls": 1,
+        "cpu_seconds": cpu_seconds - sum(phase["cpu_seconds"] for phase in phases.values()),
+        "wall_seconds": wall_seconds - sum(phase["wall_seconds"] for phase in phases.values()),
+        "simulated_seconds": simulated_seconds - sum(phase["simulated_seconds"] for phase in phases.values()),
+    }
+    phases["other"] = other
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "fixture": os.path.relpath(fixture_dir, HERE),
+        "screen": screen or ", ".join(screens),
+        "latencies": getattr(driver, "latencies", None),
+        "simulated_time": simulate_time,
+        "random_seed": driver.random_seed,
+        "actions": actions,
+        "kept_samples": kept,
+        "dataset_digest": digest,
+        "device_commands": driver.stats() if cassette_dir else driver.command_counts,
+        "simulated_seconds": simulated_seconds,
+        "wall_seconds": wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        # Throughput on a device with the fixture's latencies, and on the host alone
+        "actions_per_minute": 60 * actions / simulated_seconds if simulated_seconds > 0 else None,
+        "host_actions_per_minute": 60 * actions / wall_seconds if wall_seconds > 0 else None,
+        "cpu_ms_per_action": 1000 * cpu_seconds / actions if actions else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "python_peak_mb": python_peak_mb,
+        "phases": phases,
+        "screen_graph": automator.screen_graph.summary() if automator.screen_graph else None,
+        "replay_error": driver.stats()["first_mismatch"] if cassette_dir else None,
+    }
+
+def number(value, spec=".1f") -> str:
+    return "n/a" if value is None else format(value, spec)
+
+def print_summary(result, baseline=None) -> None:
+    def delta(key):
+        if not baseline or not baseline.get(key) or result.get(key) is None:
+            return ""
+        return f" ({100 * (result[key] - baseline[key]) / baseline[key]:+.1f}% vs {baseline['commit']})"
+
+    print(f"📊 {result['actions']} actions, {result['kept_samples']} kept samples on '{result['screen']}' ({result['commit']})")
+    if baseline and baseline.get("dataset_digest") and baseline.get("fixture") == result["fixture"]:
+        same = baseline["dataset_digest"] == result["dataset_digest"]
+        print(f"{'✅' if same else '⚠️'} Dataset {'identical to' if same else 'differs from'} {baseline['commit']}")
+    if result.get("replay_error"):
+        print(f"❌ Replay diverged from the recording: {result['replay_error']}")
+    print(f"⏱️ {number(result['actions_per_minute'])} actions/min at fixture latencies{delta('actions_per_minute')}")
+    print(f"⏱️ {number(result['host_actions_per_minute'])} actions/min host-only, "
+          f"{number(result['cpu_ms_per_action'])} ms CPU per action{delta('cpu_ms_per_action')}")
+    if result.get("screen_graph"):
+        graph = result["screen_graph"]
+        print(f"🧭 {graph['transitions']} transitions, {graph['state_changes']} to {graph['reached_states']} other states")
+    print(f"💾 Peak RSS {result['peak_rss_mb']:.1f} MB" +
+          (f", Python peak {result['python_peak_mb']:.1f} MB" if result.get("python_peak_mb") is not None else ""))
+    for name, phase in sorted(result["phases"].items(), key=lambda item: -item[1]["cpu_seconds"]):
+        print(f"   {name:<11} {phase['calls']:>5} calls  cpu {phase['cpu_seconds']:7.3f}s  "
+              f"wall {phase['wall_seconds']:7.3f}s  device {phase['simulated_seconds']:8.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure UIActionAutomator throughput offline against recorded screens")
+    parser.add_argument("--fixture", default=DEFAULT_FIXTURE, help="Fixture directory with fixture.json and screen XML/PNG files")
+    parser.add_argument("--screen", help="Screen to test (default: the fixture's start screen)")
+    parser.add_argument("--cassette", help="Replay a recorded session (cassettes/<package>) instead of a fixture")
+    parser.add_argument("--strict", action="store_true", help="Fail a replay on any call that differs from the recording")
+    parser.add_argument("--latency", nargs=2, action="append", metavar=("KIND", "SECONDS"), default=[],
+                        help="Override a latency: gesture, settle, page_source or screenshot")
+    parser.add_argument("--artifact-workers", type=int, default=2)
+    parser.add_argument("--screen-graph", action="store_true", help="Pick targets with the screen graph")
+    parser.add_argument("--real-time", action="store_true", help="Actually sleep instead of simulating device time")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the Python heap peak (slower)")
+    parser.add_argument("--out", help="Result JSON path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    latencies = {kind: float(seconds) for kind, seconds in args.latency}
+    result = run_benchmark(args.fixture, args.screen, latencies, {"artifact_workers": args.artifact_workers, "screen_graph": args.screen_graph},
+                           simulate_time=not args.real_time, trace_memory=args.tracemalloc,
+                           cassette_dir=args.cassette, strict=args.strict)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_summary(result, baseline)
+
+    out_path = args.out or os.path.join(DEFAULT_RESULTS_DIR, f"{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Benchmark result saved: {out_path}")
+
+    if result.get("replay_error"):
+        sys.exit(1)
@@ -0,0 +1,63 @@
+import os
+import json
+import argparse
+from utils.vh_format import VhColumns, CompactHierarchy, encode_compact, is_compact
+
+def vh_files(paths, extension):
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(extension):
+                    yield os.path.join(root, name)
+
+def convert_file(path, to_format, keep=False) -> str:
+    """Write path in the other .vh format next to it and return the new path"""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    base = os.path.splitext(path)[0]
+    if to_format == "compact":
+        if is_compact(data):
+            return path
+        output_path = base + ".vhc"
+        output = encode_compact(VhColumns.from_elements(json.loads(data)))
+    else:
+        if not is_compact(data):
+            return path
+        output_path = base + ".vh"
+        elements = CompactHierarchy(data).elements()
+        output = json.dumps(elements, indent=2, ensure_ascii=False).encode("utf-8")
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(output)
+    os.replace(tmp_path, output_path)
+    if not keep:
+        os.remove(path)
+    return output_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert simplified view hierarchies between JSON (.vh) and compact (.vhc) form")
+    parser.add_argument("paths", nargs="+", help="Files or directories (e.g. dataset) to convert")
+    parser.add_argument("--to", choices=["compact", "json"], default="compact")
+    parser.add_argument("--keep", action="store_true", help="Keep the original files")
+    args = parser.parse_args()
+
+    source_extension = ".vh" if args.to == "compact" else ".vhc"
+    converted = before_bytes = after_bytes = 0
+    for path in vh_files(args.paths, source_extension):
+        try:
+            size = os.path.getsize(path)
+            output_path = convert_file(path, args.to, keep=args.keep)
+        except Exception as e:
+            print(f"❌ Failed to convert {path}: {e}")
+            continue
+        if output_path != path:
+            converted += 1
+            before_bytes += size
+            after_bytes += os.path.getsize(output_path)
+
+    print(f"✅ Converted {converted} files to {args.to}: {before_bytes} → {after_bytes} bytes")
@@ -0,0 +1,46 @@
+import os
+import argparse
+from utils.blob_store import BlobStore, DEFAULT_BLOB_DIR
+
+def dedupe_dataset(store, dataset_dir) -> tuple[int, int]:
+    """Move every sample file of an existing dataset into the blob store"""
+    adopted = saved = 0
+    for root, dirs, files in os.walk(dataset_dir):
+        dirs[:] = [name for name in dirs if not name.startswith(".")]
+        for name in files:
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            if store.adopt(path):
+                adopted += 1
+                if os.stat(path).st_nlink > 2:
+                    saved += size
+    return adopted, saved
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed blob store behind the dataset")
+    parser.add_argument("command", choices=["stats", "verify", "gc", "dedupe"])
+    parser.add_argument("--blobs", default=DEFAULT_BLOB_DIR, help="Blob store directory")
+    parser.add_argument("--dataset", default="dataset", help="Dataset directory (for dedupe)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what gc would delete")
+    args = parser.parse_args()
+
+    store = BlobStore(args.blobs)
+
+    if args.command == "stats":
+        stats = store.stats()
+        print(f"📦 {stats['blobs']} blobs ({stats['stored_bytes']} bytes) back {stats['links']} sample files ({stats['linked_bytes']} bytes)")
+
+    elif args.command == "verify":
+        corrupt = store.verify()
+        for path in corrupt:
+            print(f"❌ Blob content does not match its hash: {path}")
+        print(f"✅ Verified blob store: {len(corrupt)} corrupt blobs")
+
+    elif args.command == "gc":
+        count, size = store.gc(dry_run=args.dry_run)
+        verb = "Would delete" if args.dry_run else "Deleted"
+        print(f"🗑️ {verb} {count} unreferenced blobs ({size} bytes)")
+
+    elif args.command == "dedupe":
+        adopted, saved = dedupe_dataset(store, args.dataset)
+        print(f"✅ Linked {adopted} files into the blob store, {saved} bytes of duplicates freed")
@@ -0,0 +1,258 @@
+import argparse
+import json
+import os
+import threading
+import multiprocessing
+import time
+from ui_action_automator import UIActionAutomator, create_driver, load_test_progress
+from utils.progress_journal import ProgressJournal
+from utils.work_queue import WorkItem, WorkQueue, WorkQueueManager, DISCOVER, ELEMENT
+
+def normalize_devices(devices) -> list[dict]:
+    normalized = []
+    for i, device in enumerate(devices):
+        if isinstance(device, str):
+            device = {"name": device}
+        normalized.append({
+            "name": device["name"],
+            "server": device.get("server", "http://localhost:4723"),
+            "system_port": device.get("system_port", 8200 + i),
+        })
+    return normalized
+
+def appium_driver_factory(device, app):
+    return create_driver(app, device_name=device["name"], server_url=device["server"],
+                         udid=device["name"], system_port=device["system_port"])
+
+class ExplorationWorker:
+    """Drive one device: claim work items, test them and report the outcome"""
+    def __init__(self, worker_id, device, work_queue, driver_factory, apps, automator_options=None, idle_wait=1.0):
+        self.worker_id = worker_id
+        self.device = device
+        self.work_queue = work_queue
+        self.driver_factory = driver_factory
+        self.apps = apps
+        self.automator_options = automator_options or {}
+        self.idle_wait = idle_wait
+
+        self.driver = None
+        self.automator = None
+        self.current_app = None
+        self.current_screen = None
+
+    def run(self) -> None:
+        try:
+            while True:
+                item = self.work_queue.claim(self.worker_id, self.current_app)
+                if item is None:
+                    if self.work_queue.is_finished():
+                        break
+                    time.sleep(self.idle_wait)
+                    continue
+
+                try:
+                    self.process(item)
+                except Exception as e:
+                    print(f"❌ [{self.worker_id}] Error occurred while processing {item}: {e}")
+                    self.work_queue.fail(self.worker_id, item)
+                    self.current_screen = None
+        finally:
+            self.close_session()
+
+    def process(self, item) -> None:
+        automator = self.session_for(item.app)
+        self.enter_screen(automator, item.screen)
+
+        if item.kind == DISCOVER:
+            candidates = automator.list_candidates(item.screen)
+            added = self.work_queue.push([
+                WorkItem(item.app, item.screen, ELEMENT, action, path) for action, path in candidates
+            ])
+            print(f"🔍 [{self.worker_id}] Queued {added} targets for screen '{item.screen}'")
+            self.work_queue.complete(self.worker_id, item, f"queued {added}")
+            return
+
+        element = automator.find_element_by_path(item.path)
+        if element is None:
+            print(f"⚠️ [{self.worker_id}] Element not found on the current screen: {item.path}")
+            self.work_queue.fail(self.worker_id, item)
+            self.current_screen = None
+            return
+
+        automator.test_single_element(item.screen, item.action, element, item.path)
+        self.work_queue.complete(self.worker_id, item, **(automator.last_result or {"outcome": "skipped"}))
+
+        if not automator.go_back_to_initial_screen(screen_name=item.screen):
+            self.current_screen = None
+
+    def session_for(self, app_package) -> UIActionAutomator:
+        if self.current_app != app_package:
+            self.close_session()
+            app = self.apps[app_package]
+            self.driver = self.driver_factory(self.device, app)
+            automator_options = self.automator_options
+            if automator_options.get("tracing"):
+                # Workers on the same app share its progress directory, so each writes its own trace files
+                automator_options = dict(automator_options, tracing=dict(automator_options["tracing"], file_tag=self.worker_id))
+            self.automator = UIActionAutomator(self.driver, screens=app["screens"], persist_progress=False,
+                                               **automator_options)
+            self.current_app = app_package
+            self.current_screen = None
+            print(f"🚀 [{self.worker_id}] Session started on {self.device['name']} for {app_package}")
+        return self.automator
+
+    def enter_screen(self, automator, screen_name) -> None:
+        if self.current_screen == screen_name:
+            return
+        if not automator.restart_app(screen_name):
+            raise RuntimeError(f"Failed to open screen '{screen_name}'")
+        automator.record_target_screen(screen_name)
+        self.current_screen = screen_name
+
+    def close_session(self) -> None:
+        if self.automator is not None:
+            self.automator.close()
+        if self.driver is not None:
+            try:
+                self.driver.terminate_app(self.current_app)
+                self.driver.quit()
+            except Exception as e:
+                print(f"⚠️ [{self.worker_id}] Error occurred while closing session: {e}")
+        self.driver = None
+        self.automator = None
+        self.current_app = None
+        self.current_screen = None
+
+def run_worker(worker_id, device, work_queue, driver_factory, apps, automator_options=None) -> None:
+    ExplorationWorker(worker_id, device, work_queue, driver_factory, apps, automator_options).run()
+
+class ExplorationCoordinator:
+    """Spread (app, screen, action, element path) work items over several devices.
+
+    With use_processes=True every worker runs in its own process and talks to a
+    WorkQueue served by a manager process; otherwise workers are threads, which
+    lets fake in-process drivers stand in for real devices.
+    """
+    def __init__(self, apps, devices, driver_factory=appium_driver_factory, use_processes=True,
+                 automator_options=None, max_restarts=3, poll_interval=1.0, progress_interval=30.0):
+        self.apps = {app["package"]: app for app in apps}
+        self.devices = normalize_devices(devices)
+        self.driver_factory = driver_factory
+        self.use_processes = use_processes
+        self.automator_options = automator_options
+        self.max_restarts = max_restarts
+        self.poll_interval = poll_interval
+        self.progress_interval = progress_interval
+
+        self.manager = None
+        self.work_queue = None
+        self.workers = {}
+        self.restarts = {}
+        self.journals = {}
+
+    def run(self) -> dict:
+        if self.use_processes:
+            self.manager = WorkQueueManager()
+            self.manager.start()
+            self.work_queue = self.manager.WorkQueue()
+        else:
+            self.work_queue = WorkQueue()
+
+        try:
+            self.seed_queue()
+            for i, device in enumerate(self.devices):
+                worker_id = f"worker-{i}"
+                self.restarts[worker_id] = 0
+                self.start_worker(worker_id, device)
+
+            self.monitor()
+            self.save_progress()
+            return self.work_queue.counts()
+
+        finally:
+            for journal in self.journals.values():
+                journal.close()
+            if self.manager is not None:
+                self.manager.shutdown()
+
+    def seed_queue(self) -> None:
+        for app_package, app in self.apps.items():
+            progress_dir = os.path.join("test_progress", app_package)
+            os.makedirs(progress_dir, exist_ok=True)
+
+            for screen_name, visited_paths in load_test_progress(progress_dir).items():
+                self.work_queue.seed_visited(app_package, screen_name, visited_paths)
+            self.journals[app_package] = ProgressJournal(progress_dir)
+
+            self.work_queue.push([WorkItem(app_package, screen_name, DISCOVER) for screen_name in app["screens"]])
+
+    def start_worker(self, worker_id, device) -> None:
+        args = (worker_id, device, self.work_queue, self.driver_factory, self.apps, self.automator_options)
+        if self.use_processes:
+            worker = multiprocessing.Process(target=run_worker, args=args, name=worker_id)
+        else:
+            worker = threading.Thread(target=run_worker, args=args, name=worker_id)
+        worker.start()
+        self.workers[worker_id] = (worker, device)
+
+    def monitor(self) -> None:
+        last_saved = time.monotonic()
+
+        while self.workers:
+            time.sleep(self.poll_interval)
+
+            for worker_id, (worker, device) in list(self.workers.items()):
+                if worker.is_alive():
+                    continue
+
+                requeued = self.work_queue.requeue_worker(worker_id)
+                if requeued:
+                    print(f"⚠️ {worker_id} stopped with {requeued} items in flight; re-queued them")
+
+                if not self.work_queue.is_finished() and self.restarts[worker_id] < self.max_restarts:
+                    self.restarts[worker_id] += 1
+                    print(f"🔄 Restarting {worker_id} on {device['name']} (attempt {self.restarts[worker_id]})")
+                    self.start_worker(worker_id, device)
+                else:
+                    del self.workers[worker_id]
+
+            if time.monotonic() - last_saved >= self.progress_interval:
+                self.save_progress()
+                last_saved = time.monotonic()
+
+            print(f"📊 Work queue: {self.work_queue.counts()}")
+
+    def save_progress(self) -> None:
+        # The coordinator is the only writer of the progress journals, so workers never race on them
+        for record in self.work_queue.drain_completed():
+            self.journals[record["app"]].append(record["screen"], record["action_path"], record["outcome"],
+                                                record["sample_dir"], record["duration"])
+        for journal in self.journals.values():
+            journal.sync()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explore the configured apps on several devices in parallel")
+    parser.add_argument("--devices", nargs="+", help="Device serials (defaults to \"devices\" in config.json)")
+    parser.add_argument("--threads", action="store_true", help="Run workers as threads instead of processes")
+    args = parser.parse_args()
+
+    with open("./config/config.json", "r") as file:
+        config = json.load(file)
+
+    devices = args.devices or config.get("devices")
+    if not devices:
+        parser.error("No devices given; pass --devices or add a \"devices\" list to config.json")
+
+    automator_options = {
+        "settle_options": config.get("settle"),
+        "template_representatives": config.get("template_representatives", 3),
+        "min_visible_fraction": config.get("min_visible_fraction", 0.25),
+        "diff_options": config.get("diff"),
+        "image_change_options": config.get("image_change"),
+        "dedupe_artifacts": config.get("dedupe_artifacts", False),
+        "vh_format": config.get("vh_format", "json"),
+        "tracing": config.get("tracing"),
+    }
+    coordinator = ExplorationCoordinator(config["apps"], devices, use_processes=not args.threads,
+                                         automator_options=automator_options)
+    print(f"✅ Parallel exploration finished: {coordinator.run()}")
@@ -0,0 +1,73 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from utils.reprocessing import ARTIFACT_KINDS, SampleReprocessor, sample_dirs, load_manifest, save_manifest
+
+def process_sample(reprocessor, sample_dir, previous):
+    entries, results = reprocessor.process(sample_dir, previous)
+    return sample_dir, entries, results
+
+def reprocess(dataset_dir, manifest_path, reprocessor, workers, chunk_size=16, save_every=500) -> dict:
+    manifest = load_manifest(manifest_path)
+    samples = list(sample_dirs(dataset_dir))
+    print(f"🔍 {len(samples)} samples in {dataset_dir}, rebuilding {', '.join(reprocessor.kinds)} with {workers} workers")
+
+    counts = {"built": 0, "skipped": 0, "failed": 0}
+    started = time.monotonic()
+
+    def record(sample_dir, entries, results):
+        key = os.path.relpath(sample_dir, dataset_dir)
+        manifest.setdefault(key, {}).update(entries)
+        for kind, result in results.items():
+            if result in ("built", "skipped"):
+                counts[result] += 1
+            else:
+                counts["failed"] += 1
+                print(f"❌ {key} {kind}: {result}")
+
+    def previous(sample_dir):
+        return manifest.get(os.path.relpath(sample_dir, dataset_dir))
+
+    if workers <= 1:
+        outcomes = (process_sample(reprocessor, sample_dir, previous(sample_dir)) for sample_dir in samples)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        outcomes = pool.map(process_sample, [reprocessor] * len(samples), samples,
+                            [previous(sample_dir) for sample_dir in samples], chunksize=chunk_size)
+
+    try:
+        for done, (sample_dir, entries, results) in enumerate(outcomes, 1):
+            record(sample_dir, entries, results)
+            if done % save_every == 0:
+                save_manifest(manifest_path, manifest)
+                elapsed = time.monotonic() - started
+                print(f"⏱️ {done}/{len(samples)} samples, {done / elapsed:.1f} samples/s")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        save_manifest(manifest_path, manifest)
+
+    elapsed = time.monotonic() - started
+    rate = len(samples) / elapsed if elapsed > 0 else 0.0
+    print(f"✅ {len(samples)} samples in {elapsed:.1f}s ({rate:.1f} samples/s): "
+          f"{counts['built']} rebuilt, {counts['skipped']} up to date, {counts['failed']} failed")
+    return counts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild derived sample artifacts from the stored XML, screenshots and action.json")
+    parser.add_argument("--dataset", default="dataset", help="Dataset directory")
+    parser.add_argument("--artifacts", nargs="+", choices=ARTIFACT_KINDS, default=list(ARTIFACT_KINDS),
+                        help="Artifact kinds to rebuild")
+    parser.add_argument("--vh-format", choices=["json", "compact"], default="json", help="Format of rebuilt view hierarchies")
+    parser.add_argument("--blobs", help="Blob store to write through (see manage_blobs.py)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--manifest", help="Manifest file (default: <dataset>_reprocess_manifest.json)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if inputs and generator versions are unchanged")
+    args = parser.parse_args()
+
+    manifest_path = args.manifest or f"{os.path.normpath(args.dataset)}_reprocess_manifest.json"
+    reprocessor = SampleReprocessor(args.dataset, kinds=args.artifacts, vh_format=args.vh_format,
+                                    blob_dir=args.blobs, force=args.force)
+    reprocess(args.dataset, manifest_path, reprocessor, args.workers)
@@ -0,0 +1,218 @@
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import gc
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+from xml.etree import ElementTree
+
+from benchmark import DEFAULT_RESULTS_DIR, git_commit
+from utils.bounding_box import collect_child_bounds
+from utils.data_saver import DataSaver
+from utils.element_finder import ElementFinder
+from utils.stage_capture import StageCapture
+from utils.synthetic_hierarchy import generate_hierarchy
+from utils.view_comparator import is_same_screen
+from utils.xml_to_html import HtmlRenderer
+
+DEFAULT_NODE_COUNTS = (1000, 3000, 10000, 30000, 100000)
+# Fitted exponent of time over node count above which a workload counts as super-linear. Linear workloads
+# fit between n^0.8 and n^1.25 on a busy machine, while a quadratic one comes out close to n^2.
+DEFAULT_MAX_EXPONENT = 1.4
+# The exponent is fitted over the largest sizes only; small pages are dominated by fixed costs and cold caches
+DEFAULT_FIT_SIZES = 3
+
+class SourceDriver:
+    """Just enough of a driver for ElementFinder: a fixed page source"""
+    def __init__(self, xml_source):
+        self.page_source = xml_source
+
+def changed_source(xml_source) -> str:
+    """The same page with the last text changed, so comparisons have to walk the whole tree"""
+    position = xml_source.rfind('text="')
+    return xml_source[:position] + 'text="changed ' + xml_source[position + len('text="'):]
+
+def find_elements(xml_source) -> dict:
+    element_finder = ElementFinder(SourceDriver(xml_source))
+    element_finder.refresh()
+    return {
+        "tap": element_finder.find_tappable_elements_from_leaves(),
+        "long_press": element_finder.find_long_pressable_elements_from_leaves(),
+        "swipe": element_finder.find_swipeable_elements_from_leaves(),
+        "scroll": element_finder.find_scrollable_elements_from_leaves(),
+        "zoom": element_finder.find_zoomable_elements_from_leaves(),
+    }
+
+def child_bounds(state) -> int:
+    element_finder, table = state
+    count = 0
+    for action, elements in (("tap", element_finder.find_tappable_elements_from_leaves()),
+                             ("long_press", element_finder.find_long_pressable_elements_from_leaves())):
+        for element in elements:
+            count += len(collect_child_bounds(action, element, table))
+    return count
+
+def prepare_child_bounds(xml_source):
+    element_finder = ElementFinder(SourceDriver(xml_source))
+    element_finder.refresh()
+    return element_finder, element_finder.node_table()
+
+def prepare_data_saver(xml_source, vh_format):
+    data_saver = DataSaver(base_dir=tempfile.mkdtemp(prefix="ui-probing-scaling-"), vh_format=vh_format)
+    data_saver.current_index_dir = data_saver.base_dir
+    return data_saver, xml_source
+
+def save_simplified_view_hierarchy(state) -> str:
+    data_saver, xml_source = state
+    # The capture is parsed here too, as it is for every stage of a test
+    return data_saver.save_simplified_view_hierarchy(StageCapture("before", xml_source, None))
+
+def cleanup_data_saver(state) -> None:
+    shutil.rmtree(state[0].base_dir, ignore_errors=True)
+
+# name: (prepare(xml_source) -> state, run(state), cleanup(state) or None)
+WORKLOADS = {
+    "parse": (lambda xml_source: xml_source, ElementTree.fromstring, None),
+    "element_finder": (lambda xml_source: xml_source, find_elements, None),
+    "collect_child_bounds": (prepare_child_bounds, child_bounds, None),
+    "xml_to_html": (lambda xml_source: ElementTree.fromstring(xml_source), lambda root: HtmlRenderer().render(root), None),
+    "simplified_vh": (lambda xml_source: prepare_data_saver(xml_source, "json"), save_simplified_view_hierarchy, cleanup_data_saver),
+    "simplified_vh_compact": (lambda xml_source: prepare_data_saver(xml_source, "compact"), save_simplified_view_hierarchy,
+                              cleanup_data_saver),
+    "is_same_screen": (lambda xml_source: (StageCapture("before", xml_source, None), StageCapture("after", changed_source(xml_source), None)),
+                       lambda captures: is_same_screen(*captures), None),
+}
+
+def measure(workload, xml_source, repeat) -> dict:
+    """Best time of `repeat` runs after an untimed warm-up, and the Python heap peak of one more run under tracemalloc"""
+    prepare, run, cleanup = WORKLOADS[workload]
+    timings = []
+    for attempt in range(repeat + 1):
+        state = prepare(xml_source)
+        # Start every run from a clean heap, so garbage left by earlier runs is not collected on its clock
+        gc.collect()
+        started = time.perf_counter()
+        run(state)
+        if attempt:
+            timings.append(time.perf_counter() - started)
+        if cleanup:
+            cleanup(state)
+
+    state = prepare(xml_source)
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    run(state)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    if cleanup:
+        cleanup(state)
+
+    return {"seconds": min(timings), "peak_mb": peak / (1024 * 1024)}
+
+def scaling_exponent(node_counts, seconds) -> float:
+    """Least-squares slope of log(time) over log(nodes): 1 is linear, 2 quadratic"""
+    xs = [math.log(count) for count in node_counts]
+    ys = [math.log(max(value, 1e-9)) for value in seconds]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    variance = sum((x - mean_x) ** 2 for x in xs)
+    if variance == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+
+def run_scaling_benchmark(node_counts=DEFAULT_NODE_COUNTS, workloads=None, repeat=3, max_exponent=DEFAULT_MAX_EXPONENT,
+                          dump_dir=None, fit_sizes=DEFAULT_FIT_SIZES, **hierarchy_options) -> dict:
+    workloads = list(workloads or WORKLOADS)
+    sizes = []
+    results = {workload: [] for workload in workloads}
+
+    for node_count in node_counts:
+        xml_source = generate_hierarchy(node_count, **hierarchy_options)
+        sizes.append({"nodes": node_count, "xml_bytes": len(xml_source.encode("utf-8"))})
+        if dump_dir:
+            os.makedirs(dump_dir, exist_ok=True)
+            with open(os.path.join(dump_dir, f"synthetic_{node_count}.xml"), "w", encoding="utf-8") as f:
+                f.write(xml_source)
+
+        for workload in workloads:
+            measurement = measure(workload, xml_source, repeat)
+            measurement["nodes"] = node_count
+            measurement["us_per_node"] = 1e6 * measurement["seconds"] / node_count
+            results[workload].append(measurement)
+            print(f"⏱️ {workload:<22} {node_count:>7} nodes  {1000 * measurement['seconds']:9.1f} ms  "
+                  f"{measurement['us_per_node']:6.2f} µs/node  peak {measurement['peak_mb']:7.1f} MB")
+
+    scaling = {}
+    for workload, measurements in results.items():
+        fitted = measurements[-max(2, fit_sizes):]
+        exponent = scaling_exponent([m["nodes"] for m in fitted], [m["seconds"] for m in fitted])
+        scaling[workload] = {
+            "exponent": exponent,
+            "linear": exponent is None or exponent <= max_exponent,
+            "measurements": measurements,
+        }
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "hierarchy": hierarchy_options,
+        "repeat": repeat,
+        "max_exponent": max_exponent,
+        "fit_sizes": fit_sizes,
+        "sizes": sizes,
+        "workloads": scaling,
+    }
+
+def print_scaling(result, baseline=None) -> None:
+    for workload, scaling in result["workloads"].items():
+        exponent = scaling["exponent"]
+        largest = scaling["measurements"][-1]
+        previous = ""
+        if baseline and workload in baseline.get("workloads", {}) and baseline["workloads"][workload]["exponent"] is not None:
+            previous = f" (was {baseline['workloads'][workload]['exponent']:.2f} at {baseline['commit']})"
+        status = "✅" if scaling["linear"] else "❌"
+        exponent_text = "scaling n/a" if exponent is None else f"time ~ n^{exponent:.2f}"
+        print(f"{status} {workload:<22} {exponent_text}{previous}, "
+              f"{largest['us_per_node']:.2f} µs/node and {largest['peak_mb']:.1f} MB at {largest['nodes']} nodes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that hierarchy processing scales linearly with synthetic page sources")
+    parser.add_argument("--nodes", type=int, nargs="+", default=list(DEFAULT_NODE_COUNTS), help="Node counts to generate")
+    parser.add_argument("--workloads", nargs="+", choices=list(WORKLOADS), help="Workloads to run (default: all)")
+    parser.add_argument("--depth", type=int, default=8, help="Layouts wrapped around the content area")
+    parser.add_argument("--recycler-fanout", type=int, default=20, help="Rows per RecyclerView")
+    parser.add_argument("--webview-fraction", type=float, default=0.5, help="Share of the nodes inside a WebView")
+    parser.add_argument("--webview-depth", type=int, default=40, help="Depth of the WebView DOM")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement; the fastest counts")
+    parser.add_argument("--max-exponent", type=float, default=DEFAULT_MAX_EXPONENT,
+                        help="Fail when time grows faster than n^this")
+    parser.add_argument("--fit-sizes", type=int, default=DEFAULT_FIT_SIZES, help="Fit the exponent over this many of the largest sizes")
+    parser.add_argument("--dump", help="Also write the generated XML files to this directory")
+    parser.add_argument("--out", help="Result JSON path (default: benchmarks/results/scaling-<commit>.json)")
+    parser.add_argument("--baseline", help="Earlier scaling result JSON to compare against")
+    args = parser.parse_args()
+
+    result = run_scaling_benchmark(sorted(args.nodes), args.workloads, args.repeat, args.max_exponent, args.dump, args.fit_sizes,
+                                   depth=args.depth, recycler_fanout=args.recycler_fanout,
+                                   webview_fraction=args.webview_fraction, webview_depth=args.webview_depth, seed=args.seed)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_scaling(result, baseline)
+
+    out_path = args.out or os.path.join(DEFAULT_RESULTS_DIR, f"scaling-{result['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Scaling result saved: {out_path}")
+
+    if not all(scaling["linear"] for scaling in result["workloads"].values()):
+        sys.exit(1)
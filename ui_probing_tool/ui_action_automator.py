@@ -1,20 +1,101 @@
 import json
 import time
 import os
+import random
 from appium import webdriver
 from appium.options.android import UiAutomator2Options
 from utils.element_finder import ElementFinder
 from utils.gesture_handler import GestureHandler
 from utils.data_saver import DataSaver
-from utils.bounding_box import get_safe_random_point, get_center_point, collect_child_bounds
-from utils.view_comparator import is_same_screen, is_same_screen_img
+from utils.bounding_box import get_safe_target_point, get_center_point, parse_bounds
+from utils.view_comparator import hierarchy_changes, is_same_screen_img
+from utils.hierarchy_diff import RESTORE_MASKED_ATTRIBUTES, HierarchyDiffer
+from utils.image_change import ImageChangeDetector
+from utils.blob_store import BlobStore, DEFAULT_BLOB_DIR
+from utils.settle_detector import SettleDetector
+from utils.timing_stats import TimingStats
+from utils.tracing import Tracer
+from utils.cassette import RecordingDriver
+from utils.screen_graph import ScreenGraph
+from utils.artifact_pipeline import ArtifactPipeline
+from utils.progress_journal import ProgressJournal
+from utils.hierarchy_fingerprint import hierarchy_fingerprint
+from utils.candidate_index import CandidateIndex, CandidateIndexCache, build_element_paths, resolve_position
+
+def load_test_progress(progress_dir) -> dict:
+    visited_paths_by_screen = {}
+    progress_files = [f for f in os.listdir(progress_dir) if f.endswith("_progress.json")]
+    journal = ProgressJournal(progress_dir)
+    
+    if not progress_files and not os.path.exists(journal.path):
+        print("🔄 No previous test progress found. Starting a new test.")
+        return visited_paths_by_screen
+        
+    # Progress files written before the journal existed are still honoured
+    for file_name in progress_files:
+        file_path = os.path.join(progress_dir, file_name)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                progress_data = json.load(f)
+            
+            screen_name = progress_data.get("screen_name", "Unknown")
+            visited_paths = set(progress_data.get("visited_paths", []))
+
+            visited_paths_by_screen[screen_name] = visited_paths
+            
+            timestamp = progress_data.get("timestamp", "Unknown")
+            if isinstance(timestamp, (int, float)):
+                timestamp_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+            else:
+                timestamp_str = str(timestamp)
+            
+            print(f"✅ Successfully restored progress for screen '{screen_name}': {len(visited_paths)} paths (Saved at: {timestamp_str})")
+            
+        except Exception as e:
+            print(f"⚠️ Error occurred while restoring progress ({file_name}): {e}")
+
+    for screen_name, visited_paths in journal.replay().items():
+        visited_paths_by_screen.setdefault(screen_name, set()).update(visited_paths)
+        print(f"✅ Successfully restored progress for screen '{screen_name}' from journal: {len(visited_paths)} paths")
+
+    return visited_paths_by_screen
+
+def create_driver(app, device_name="emulator-5556", server_url="http://localhost:4723", udid=None, system_port=None):
+    desired_caps = {
+            "platformName": "Android",
+            "automationName": "UiAutomator2",
+            "deviceName": device_name,
+            # "deviceName": "RF9XC01AH0B",
+            "appPackage": app["package"],
+            "language":'en',
+            "autoGrantPermissions": True,
+            "noReset": True,
+            'uiautomator2ServerLaunchTimeout': 60000,
+            'uiautomator2ServerInstallTimeout': 60000 ,
+            "appWaitActivity": "*"
+        }
+
+    if udid is not None:
+        desired_caps["udid"] = udid
+    if system_port is not None:
+        desired_caps["systemPort"] = system_port
+
+    return webdriver.Remote(server_url, options=UiAutomator2Options().load_capabilities(desired_caps))
 
 class UIActionAutomator:
-    def __init__(self, driver):
+    def __init__(self, driver, settle_options=None, screens=None, restore_back_steps=2, persist_progress=True, artifact_workers=2,
+                 template_representatives=3, min_visible_fraction=0.25, diff_options=None,
+                 image_change_options=None, staged_samples=True, dedupe_artifacts=False, vh_format="json", tracing=None,
+                 screen_graph=False):
         self.driver = driver
         self.gesture_handler = GestureHandler(driver)
         self.element_finder = ElementFinder(driver)
-        self.data_saver = DataSaver()
+        self.data_saver = DataSaver(pipeline=ArtifactPipeline(workers=artifact_workers), staged=staged_samples,
+                                    blob_store=BlobStore(DEFAULT_BLOB_DIR) if dedupe_artifacts else None, vh_format=vh_format)
+        self.settle_detector = SettleDetector.from_config(driver, settle_options)
+        self.hierarchy_differ = HierarchyDiffer.from_config(diff_options)
+        self.restore_differ = HierarchyDiffer.from_config({**(diff_options or {}), "masked_attributes": RESTORE_MASKED_ATTRIBUTES})
+        self.image_change_detector = ImageChangeDetector.from_config(image_change_options)
         self.app_package = self.driver.capabilities.get("appPackage", "unknown_app")
         self.gesture_handler.set_data_saver(self.data_saver, self.app_package)
 
@@ -22,77 +103,76 @@ class UIActionAutomator:
 
         self.element_to_path = {}
         self.path_to_element = {}
+        self.candidate_indexes = CandidateIndexCache()
+        self.hierarchy_is_fresh = False
+        self.template_representatives = template_representatives
+        self.template_skips = {}
+        self.min_visible_fraction = min_visible_fraction
+        self.visibility_pruned = {}
+
+        self.screens = screens
+        self.restore_back_steps = restore_back_steps
+        self.target_fingerprints = {}
+        self.restore_stats = TimingStats()
 
         self.visited_paths_by_screen = {}
 
+        self.persist_progress = persist_progress
         self.progress_dir = os.path.join("test_progress", self.app_package)
         os.makedirs(self.progress_dir, exist_ok=True)
-        self.restore_test_progress()
+        self.journal = ProgressJournal(self.progress_dir)
+        self.tracer = Tracer.from_config(tracing, output_dir=self.progress_dir)
+        self.tracer.label(app=self.app_package)
+        self.last_result = None
+        # Screen states and transitions; kept on disk only alongside the rest of the progress
+        self.screen_graph = None
+        if screen_graph:
+            self.screen_graph = ScreenGraph(os.path.join(self.progress_dir, "screen_graph.json") if persist_progress else None)
+        self.current_transition = None
+        if self.persist_progress:
+            self.restore_test_progress()
+
+    def record_test_result(self, screen_name, action_path, outcome, sample_dir=None, duration=None) -> None:
+        if screen_name not in self.visited_paths_by_screen:
+            self.visited_paths_by_screen[screen_name] = set()
+
+        self.visited_paths_by_screen[screen_name].add(action_path)
+        self.last_result = {"outcome": outcome, "sample_dir": sample_dir, "duration": duration}
+
+        if self.persist_progress:
+            self.journal.append(screen_name, action_path, outcome, sample_dir, duration)
 
     def save_test_progress(self, screen_name):
-        progress_file = os.path.join(self.progress_dir, f"{screen_name}_progress.json")
-        
         if screen_name not in self.visited_paths_by_screen:
             self.visited_paths_by_screen[screen_name] = set()
-        
-        progress_data = {
-            "visited_paths": list(self.visited_paths_by_screen[screen_name]),
-            "screen_name": screen_name,
-            "timestamp": time.time()
-        }
-        
-        with open(progress_file, 'w', encoding='utf-8') as f:
-            json.dump(progress_data, f, ensure_ascii=False, indent=2)
 
+        if not self.persist_progress:
+            return
+        
+        self.journal.sync()
         print(f"✅ Test progress successfully saved: {len(self.visited_paths_by_screen[screen_name])} paths")
 
     def restore_test_progress(self):
-        progress_files = [f for f in os.listdir(self.progress_dir) if f.endswith("_progress.json")]
-        
-        if not progress_files:
-            print("🔄 No previous test progress found. Starting a new test.")
-            return
-            
-        for file_name in progress_files:
-            file_path = os.path.join(self.progress_dir, file_name)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    progress_data = json.load(f)
-                
-                screen_name = progress_data.get("screen_name", "Unknown")
-                visited_paths = set(progress_data.get("visited_paths", []))
-
-                self.visited_paths_by_screen[screen_name] = visited_paths
-                
-                timestamp = progress_data.get("timestamp", "Unknown")
-                if isinstance(timestamp, (int, float)):
-                    timestamp_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
-                else:
-                    timestamp_str = str(timestamp)
-                
-                screen_name = progress_data.get("screen_name", "Unknown")
-                print(f"✅ Successfully restored progress for screen '{screen_name}': {len(visited_paths)} paths (Saved at: {timestamp_str})")
-                
-            except Exception as e:
-                print(f"⚠️ Error occurred while restoring progress ({file_name}): {e}")
+        self.visited_paths_by_screen.update(load_test_progress(self.progress_dir))
     
     def take_screenshot(self, current_screen, action_name, stage="before", path=None, start_point=None, bounds=None, end_point=None) -> str:
-        screenshot_path = self.data_saver.save_screenshot(self.driver, self.app_package, current_screen, action_name, stage)
-        self.data_saver.save_view_hierarchy(self.driver, stage)
-        self.data_saver.save_html_hierarchy(stage)
-        self.data_saver.save_simplified_view_hierarchy(self.driver, stage)
+        capture = self.data_saver.capture_stage(self.driver, self.app_package, current_screen, action_name, stage)
         
         if stage == "before":
             self.data_saver.save_action_data(self.driver, action_name, start_point, bounds, end_point)
             self.data_saver.save_element_path(path)
-            self.data_saver.save_annotated_screenshot(self.driver, action_name, screenshot_path, start_point, bounds, end_point)
-            self.data_saver.save_annotated_with_children_screenshot(self.driver, action_name, screenshot_path, path)
+            self.data_saver.save_annotated_screenshots(action_name, capture, start_point, bounds, end_point, path)
 
-        return screenshot_path
+        return self.data_saver.get_save_path(stage, "png")
 
     def clear_data(self) -> None:
         self.data_saver.delete_data()
 
+    def close(self) -> None:
+        self.data_saver.close()
+        self.journal.close()
+        self.tracer.close()
+
     def ensure_app_running(self) -> bool:
         try:
             current_package = self.driver.current_package
@@ -108,36 +188,102 @@ class UIActionAutomator:
                 else:
                     self.driver.activate_app(self.app_package)
             
-            self.wait_for_page_to_load()
+            self.wait_for_page_to_load(gesture="launch")
             return True
         
         except Exception as e:
             print(f"❌ Error occurred while launching the app: {e}")
             return False
     
-    def wait_for_page_to_load(self, timeout=20) -> bool:
-        start_time = time.time()
-        previous_page_source = ""
-        stability_counter = 0
-        
-        while time.time() - start_time < timeout:
-            current_page_source = self.driver.page_source
-            
-            if current_page_source == previous_page_source:
-                stability_counter += 1
-                if stability_counter >= 5:
-                    print(f"✅ Screen loaded successfully (Time taken: {time.time() - start_time:.2f} seconds)")
-                    return True
-            else:
-                stability_counter = 0
-                
-            previous_page_source = current_page_source
-            time.sleep(0.5)
-        
-        print(f"❌ Screen loading timeout ({timeout} seconds)")
-        return False
+    def wait_for_page_to_load(self, timeout=None, gesture=None) -> bool:
+        with self.tracer.span("settle"):
+            return self.settle_detector.wait(timeout, key=(self.app_package, gesture or "navigation"))
+
+    def save_settle_stats(self) -> None:
+        stats_path = self.settle_detector.stats.save(os.path.join(self.progress_dir, "settle_stats.json"))
+        for key, stats in self.settle_detector.stats.summary().items():
+            print(f"⏱️ Settle time for {key}: p50 {stats['p50']:.2f}s, p95 {stats['p95']:.2f}s ({stats['count']} waits)")
+        print(f"✅ Settle statistics saved: {stats_path}")
     
+    def refresh_hierarchy_fingerprint(self) -> str:
+        self.element_finder.refresh()
+        self.hierarchy_is_fresh = True
+        return self.restore_differ.fingerprint(self.element_finder.root)
+
+    def record_target_screen(self, screen_name) -> None:
+        self.target_fingerprints[screen_name] = self.refresh_hierarchy_fingerprint()
+
+    def get_screen_navigation(self, screen_name):
+        if self.screens is None:
+            with open("./config/config.json", "r") as file:
+                config = json.load(file)
+
+            self.screens = {}
+            for app in config["apps"]:
+                if app["package"] == self.app_package:
+                    self.screens = app["screens"]
+                    break
+
+        if screen_name in self.screens:
+            return self.screens[screen_name]["navigate"]
+        return None
+
     def go_back_to_initial_screen(self, screen_name=None) -> bool:
+        with self.tracer.span("restore"):
+            start_time = time.monotonic()
+            target_fingerprint = self.target_fingerprints.get(screen_name) if screen_name else None
+
+            if target_fingerprint:
+                try:
+                    with self.tracer.span("restore_check"):
+                        in_place = self.refresh_hierarchy_fingerprint() == target_fingerprint
+                    if in_place:
+                        self.record_restore("in_place", start_time)
+                        return True
+
+                    for _ in range(self.restore_back_steps):
+                        with self.tracer.span("restore_back"):
+                            self.driver.execute_script(
+                                'mobile: shell', {
+                                    'command': 'input keyevent KEYCODE_BACK'
+                                }
+                            )
+                        self.wait_for_page_to_load(gesture="restore_back")
+
+                        if self.driver.current_package != self.app_package:
+                            break
+
+                        with self.tracer.span("restore_check"):
+                            restored_back = self.refresh_hierarchy_fingerprint() == target_fingerprint
+                        if restored_back:
+                            self.record_restore("back", start_time)
+                            return True
+
+                except Exception as e:
+                    print(f"⚠️ Error occurred while verifying screen state: {e}")
+
+            with self.tracer.span("restart"):
+                restored = self.restart_app(screen_name)
+                if restored and screen_name:
+                    self.record_target_screen(screen_name)
+            self.record_restore("restart", start_time)
+            return restored
+
+    def record_restore(self, tier, start_time) -> None:
+        elapsed = time.monotonic() - start_time
+        self.restore_stats.record((self.app_package, tier), elapsed)
+        print(f"↩️ Restored initial screen via {tier} ({elapsed:.2f} seconds)")
+
+    def save_restore_stats(self) -> None:
+        summary = self.restore_stats.summary()
+        total = sum(stats["count"] for stats in summary.values())
+        for key, stats in summary.items():
+            print(f"↩️ Restore tier {key}: {stats['count']}/{total} hits, mean {stats['mean']:.2f}s")
+        stats_path = self.restore_stats.save(os.path.join(self.progress_dir, "restore_stats.json"))
+        print(f"✅ Restore statistics saved: {stats_path}")
+
+    def restart_app(self, screen_name=None) -> bool:
+        self.hierarchy_is_fresh = False
         try:
             for _ in range(2):
                 try:
@@ -218,17 +364,8 @@ class UIActionAutomator:
                 return False
             
             if screen_name:
-                with open("./config/config.json", "r") as file:
-                    config = json.load(file)
-                
-                current_app = None
-                for app in config["apps"]:
-                    if app["package"] == self.app_package:
-                        current_app = app
-                        break
-                
-                if current_app and screen_name in current_app["screens"]:
-                    navigate_actions = current_app["screens"][screen_name]["navigate"]
+                navigate_actions = self.get_screen_navigation(screen_name)
+                if navigate_actions is not None:
                     self.navigate_to_screen(navigate_actions)
             
             return True
@@ -244,24 +381,9 @@ class UIActionAutomator:
         self.element_to_path = {}
         self.path_to_element = {}
         
-        def traverse(element, path_parts=None):
-            if path_parts is None:
-                path_parts = [""]
-            
-            class_name = element.attrib.get("class", element.tag)
-            index = element.attrib.get("index", "0")
-            
-            element_with_index = f"{class_name}[{index}]"
-            current_path_parts = path_parts + [element_with_index]
-            full_path = "/".join(current_path_parts)
-            
+        for element, (full_path, _) in build_element_paths(root).items():
             self.element_to_path[element] = full_path
             self.path_to_element[full_path] = element
-            
-            for child in element:
-                traverse(child, current_path_parts)
-        
-        traverse(root)
 
     def get_element_path(self, element):
         if not self.element_to_path:
@@ -282,57 +404,155 @@ class UIActionAutomator:
             return f"element/{element.tag}[{index}]"
     
     def get_next_unvisited_element(self, current_screen):
-        self.build_path_mapping()
+        if not self.hierarchy_is_fresh:
+            self.element_finder.refresh()
+        self.hierarchy_is_fresh = False
+        root = self.element_finder.root
         
         if current_screen not in self.visited_paths_by_screen:
             self.visited_paths_by_screen[current_screen] = set()
         
         visited_paths = self.visited_paths_by_screen[current_screen]
 
-        for action in self.action_list:
-            if action in ["tap", "double_tap"]:
-                elements = self.element_finder.find_tappable_elements_from_leaves()
-            elif action == "long_press":
-                elements = self.element_finder.find_long_pressable_elements_from_leaves()
-            elif action in ["swipe_left", "swipe_right"]:
-                elements = self.element_finder.find_swipeable_elements_from_leaves()
-            elif action in ["scroll_up", "scroll_down"]:
-                elements = self.element_finder.find_scrollable_elements_from_leaves()
-            elif action in ["pinch_zoom_in", "pinch_zoom_out"]:
-                elements = self.element_finder.find_zoomable_elements_from_leaves()
-            else:
-                elements = []
-            
-            print(f"🔍 Elements targeted by {action} action: {len(elements)}")
-
-            unvisited_elements = []
-            for element in elements:
-                path = self.get_element_path(element)
-                action_path = f"{action}/{path}"
-                if action_path not in visited_paths:
-                    unvisited_elements.append((element, path))
-            
-            print(f"🔍 Unvisited elements: {len(unvisited_elements)}")
+        fingerprint = hierarchy_fingerprint(root)
+        candidate_index = self.candidate_indexes.get((current_screen, fingerprint))
+        if candidate_index is None:
+            candidate_index = CandidateIndex.build(self.element_finder, self.action_list, fingerprint, self.template_representatives,
+                                                   self.min_visible_fraction)
+            self.candidate_indexes.put((current_screen, fingerprint), candidate_index)
+            self.record_template_skips(current_screen, candidate_index.skipped)
+            self.record_visibility_pruning(current_screen, candidate_index.pruned)
+            print(f"🔍 Built candidate index for '{current_screen}' ({fingerprint[:8]}): {len(candidate_index)} targets")
+
+        if self.screen_graph is not None:
+            next_candidate = self.next_candidate_from_graph(current_screen, root, candidate_index, visited_paths)
+        else:
+            next_candidate = candidate_index.pop_next_unvisited(visited_paths)
+        if next_candidate is None:
+            return None, None, None
+
+        action, path, position = next_candidate
+        print(f"🔍 Unvisited targets remaining on this hierarchy: {len(candidate_index)}")
+        return action, resolve_position(root, position), path
+
+    def next_candidate_from_graph(self, current_screen, root, candidate_index, visited_paths):
+        """Pick targets by what the screen graph predicts: gestures never tried first, then ones
+        that led to states still unexplored. Only gestures already tested on an identical element
+        of the same state are skipped, never a whole screen"""
+        graph = self.screen_graph
+        state = graph.state_of(root)
+        graph.observe(state, current_screen)
+
+        keys = graph.element_keys(root)
+        priority = lambda entry: graph.priority(entry[0], keys[resolve_position(root, entry[3])])
+        while True:
+            next_candidate = candidate_index.pop_best(visited_paths, priority)
+            if next_candidate is None:
+                graph.mark_explored(state)
+                graph.save()
+                return None
+
+            action, path, position = next_candidate
+            key = keys[resolve_position(root, position)]
+            if graph.known(state, action, key):
+                # The same gesture on an identical element of this state has been tested already
+                self.record_test_result(current_screen, f"{action}/{path}", "known_transition")
+                continue
+
+            self.current_transition = (state, action, key)
+            return next_candidate
+
+    def record_transition(self, action, captures, outcome) -> None:
+        transition, self.current_transition = self.current_transition, None
+        if self.screen_graph is None or transition is None or transition[1] != action:
+            return
 
-            if unvisited_elements:
-                selected_element, selected_path = unvisited_elements[0]
-                return action, selected_element, selected_path
-            
-        return None, None, None
+        state, _, key = transition
+        to_state = self.screen_graph.state_of(captures["after"].root) if outcome == "changed" else state
+        self.screen_graph.record(state, action, key, to_state, outcome)
+        self.screen_graph.save()
+
+    def save_screen_graph(self) -> None:
+        if self.screen_graph is None:
+            return
+        self.screen_graph.save()
+        summary = self.screen_graph.summary()
+        print(f"🧭 Screen graph: {summary['states']} states ({summary['explored_states']} explored), "
+              f"{summary['transitions']} transitions ({summary['new_transitions']} new, "
+              f"{summary['state_changes']} leading to {summary['reached_states']} other states)")
+
+    def record_template_skips(self, current_screen, skipped) -> None:
+        screen_skips = self.template_skips.setdefault(current_screen, {})
+        for action, paths in skipped.items():
+            screen_skips.setdefault(action, set()).update(paths)
+
+    def save_template_skips(self) -> None:
+        report = {
+            screen_name: {action: sorted(paths) for action, paths in skips.items()}
+            for screen_name, skips in self.template_skips.items()
+        }
+        report_path = os.path.join(self.progress_dir, "template_skips.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        total = sum(len(paths) for skips in self.template_skips.values() for paths in skips.values())
+        print(f"🧬 {total} repeated list-item targets skipped so far (report: {report_path})")
+
+    def record_visibility_pruning(self, current_screen, pruned) -> None:
+        screen_pruned = self.visibility_pruned.setdefault(current_screen, {})
+        for reason, paths in pruned.items():
+            screen_pruned.setdefault(reason, set()).update(paths)
+
+    def save_visibility_stats(self) -> None:
+        report = {
+            screen_name: {
+                "counts": {reason: len(paths) for reason, paths in pruned.items()},
+                "paths": {reason: sorted(paths) for reason, paths in pruned.items()},
+            }
+            for screen_name, pruned in self.visibility_pruned.items()
+        }
+        report_path = os.path.join(self.progress_dir, "visibility_stats.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        for screen_name, pruned in self.visibility_pruned.items():
+            counts = ", ".join(f"{len(paths)} {reason}" for reason, paths in sorted(pruned.items()))
+            print(f"🙈 '{screen_name}': dropped invisible candidate elements ({counts})")
+
+    def list_candidates(self, current_screen) -> list[tuple[str, str]]:
+        self.element_finder.refresh()
+        self.hierarchy_is_fresh = False
+        fingerprint = hierarchy_fingerprint(self.element_finder.root)
+        candidate_index = CandidateIndex.build(self.element_finder, self.action_list, fingerprint, self.template_representatives,
+                                               self.min_visible_fraction)
+        self.record_template_skips(current_screen, candidate_index.skipped)
+        self.record_visibility_pruning(current_screen, candidate_index.pruned)
+        visited_paths = self.visited_paths_by_screen.get(current_screen, set())
+        return [(action, path) for action, path, action_path, _ in candidate_index.queue if action_path not in visited_paths]
+
+    def find_element_by_path(self, path):
+        self.build_path_mapping()
+        self.hierarchy_is_fresh = False
+        return self.path_to_element.get(path)
 
     def test_single_element(self, current_screen, action, element, path) -> bool:
+        start_time = time.monotonic()
+        self.last_result = None
         bounds = element.attrib.get("bounds")
 
         if action.startswith("swipe_") or action.startswith("scroll_") or action.startswith("pinch_"):
             start_point = get_center_point(bounds)
         else:
-            if child_bounds_list := collect_child_bounds(action, element):
-                start_point = get_safe_random_point(element, child_bounds_list=child_bounds_list)
-            else:
-                start_point = get_safe_random_point(element)
+            start_point = get_safe_target_point(action, element, self.element_finder.node_table(),
+                                                self.element_finder.spatial_index())
         
         if not start_point:
-            print("⚠️ Unable to find coordinates to tap.")
+            if get_center_point(bounds):
+                # Fully covered by interactive children or overlays; retrying would pick nothing either
+                print("⚠️ No uncovered point on the target, marking it as tested.")
+                self.record_test_result(current_screen, f"{action}/{path}", "no_target_point", None, time.monotonic() - start_time)
+            else:
+                print("⚠️ Unable to find coordinates to tap.")
             return False
         
         x, y = start_point
@@ -348,54 +568,63 @@ class UIActionAutomator:
             elif action == "scroll_down":
                 end_point = (x, y + 1000)
 
-        before_screenshot_path = self.take_screenshot(current_screen, action, "before", path=path, start_point=start_point, bounds=bounds, end_point=end_point)
-        before_view_hierarchy_path = self.data_saver.get_save_path("before", "xml")
-
-        if action == "tap":
-            self.gesture_handler.perform_tap(x, y)
-        elif action == "double_tap":
-            self.gesture_handler.perform_double_tap(x, y)
-        elif action == "long_press":
-            self.gesture_handler.perform_long_press_with_screenshot(current_screen, x, y)
-        elif action == "pinch_zoom_in":
-            self.gesture_handler.perform_pinch_zoom(current_screen, x, y, zoom_in=True)
-        elif action == "pinch_zoom_out":
-            self.gesture_handler.perform_pinch_zoom(current_screen, x, y, zoom_in=False)
-        elif action.startswith("swipe_") or action.startswith("scroll_"):
-            if end_point:
-                self.gesture_handler.perform_swipe_or_scroll(x, y, end_point[0], end_point[1])            
-        
-        self.wait_for_page_to_load()
+        with self.tracer.span("before_capture"):
+            self.take_screenshot(current_screen, action, "before", path=path, start_point=start_point, bounds=bounds, end_point=end_point)
 
-        after_screenshot_path = self.take_screenshot(current_screen, action, "after", bounds=bounds)
-        after_view_hierarchy_path = self.data_saver.get_save_path("after", "xml")
+        with self.tracer.span("gesture"):
+            if action == "tap":
+                self.gesture_handler.perform_tap(x, y)
+            elif action == "double_tap":
+                self.gesture_handler.perform_double_tap(x, y)
+            elif action == "long_press":
+                self.gesture_handler.perform_long_press_with_screenshot(current_screen, x, y)
+            elif action == "pinch_zoom_in":
+                self.gesture_handler.perform_pinch_zoom(current_screen, x, y, zoom_in=True)
+            elif action == "pinch_zoom_out":
+                self.gesture_handler.perform_pinch_zoom(current_screen, x, y, zoom_in=False)
+            elif action.startswith("swipe_") or action.startswith("scroll_"):
+                if end_point:
+                    self.gesture_handler.perform_swipe_or_scroll(x, y, end_point[0], end_point[1])
+        
+        self.wait_for_page_to_load(gesture=action)
 
-        if action.startswith("pinch_"):
-            during_screenshot_path = self.data_saver.get_save_path("during", "png")
-            view_changed = not is_same_screen_img(before_screenshot_path, after_screenshot_path, during_screenshot_path)
-        elif action == "long_press":
-            during_view_hierarchy_path = self.data_saver.get_save_path("during", "xml")
-            view_changed = not is_same_screen(before_view_hierarchy_path, after_view_hierarchy_path, during_view_hierarchy_path)
-        else:
-            view_changed = not is_same_screen(before_view_hierarchy_path, after_view_hierarchy_path)
+        with self.tracer.span("after_capture"):
+            self.take_screenshot(current_screen, action, "after", bounds=bounds)
 
+        captures = self.data_saver.captures
+        changes = None
+        with self.tracer.span("compare"):
+            if action.startswith("pinch_"):
+                view_changed = not is_same_screen_img(captures["before"], captures["after"], captures.get("during"),
+                                                      bounds=parse_bounds(bounds), detector=self.image_change_detector)
+            else:
+                changes = self.compare_hierarchies(captures["before"], captures["after"], captures.get("during") if action == "long_press" else None)
+                view_changed = changes is not None and not changes.is_empty
 
         action_path = f"{action}/{path}"
-        if current_screen not in self.visited_paths_by_screen:
-            self.visited_paths_by_screen[current_screen] = set()
-
-        self.visited_paths_by_screen[current_screen].add(action_path)
-
-        self.save_test_progress(current_screen)
 
         if view_changed:
-            print(f"✅ Change detected after performing {action}!")
+            print(f"✅ Change detected after performing {action}!" + (f" ({changes.summary()})" if changes else ""))
+            self.record_transition(action, captures, "changed")
+            with self.tracer.span("persist"):
+                sample_dir = self.data_saver.commit_sample()
+                self.record_test_result(current_screen, action_path, "changed", sample_dir, time.monotonic() - start_time)
             return True
         else:
-            print(f"🗑️ No change detected after performing {action} -> Deleting folder")
-            self.clear_data()
+            print(f"🗑️ No change detected after performing {action} -> Discarding sample")
+            self.record_transition(action, captures, "unchanged")
+            with self.tracer.span("persist"):
+                self.clear_data()
+                self.record_test_result(current_screen, action_path, "unchanged", None, time.monotonic() - start_time)
             return False
         
+    def compare_hierarchies(self, before, after, during=None):
+        try:
+            return hierarchy_changes(before, after, during, self.hierarchy_differ)
+        except Exception as e:
+            print(f"⚠️ Error occurred while comparing view hierarchies: {e}")
+            return None
+
     def run_test_on_screen(self, current_screen) -> None:
         test_count = 0
         
@@ -403,14 +632,20 @@ class UIActionAutomator:
             print(f"🔍 There are already {len(self.visited_paths_by_screen[current_screen])} tested paths on this screen.")
         else:
             print("🔍 No previous test records for this screen.")
+
+        self.record_target_screen(current_screen)
         while True:
             try:
-                next_action, element, path = self.get_next_unvisited_element(current_screen)
+                self.tracer.label(screen=current_screen, gesture=None)
+                with self.tracer.span("candidates"):
+                    next_action, element, path = self.get_next_unvisited_element(current_screen)
                 if element is None:
                     break
-                self.test_single_element(current_screen, next_action, element, path)
-                test_count += 1
-                self.go_back_to_initial_screen(screen_name=current_screen)
+                self.tracer.label(gesture=next_action)
+                with self.tracer.span("element", path=path):
+                    self.test_single_element(current_screen, next_action, element, path)
+                    test_count += 1
+                    self.go_back_to_initial_screen(screen_name=current_screen)
                 
             except Exception as e:
                 print(f"❌ Error occurred during test execution: {e}")
@@ -418,76 +653,96 @@ class UIActionAutomator:
                 self.go_back_to_initial_screen(screen_name=current_screen)
                 
         self.save_test_progress(current_screen)
+        self.save_settle_stats()
+        self.save_restore_stats()
+        self.save_template_skips()
+        self.save_visibility_stats()
+        self.save_trace()
+        self.save_screen_graph()
+
+    def save_trace(self) -> None:
+        if not self.tracer.enabled:
+            return
+        summary_path = self.tracer.save_summary()
+        trace_path = self.tracer.export_chrome_trace()
+        if summary_path and trace_path:
+            print(f"✅ Timing summary saved: {summary_path} (trace: {trace_path})")
 
     def navigate_to_screen(self, actions) -> bool:
         print(f"Navigating to test screen...")
 
         if actions:
-            for action in actions:
-                bounds = action.get('bounds')
-                start_point = get_center_point(bounds)
-                x, y = start_point
-                self.gesture_handler.perform_tap(x, y)
-                self.wait_for_page_to_load()
+            with self.tracer.span("navigate", steps=len(actions)):
+                for action in actions:
+                    bounds = action.get('bounds')
+                    start_point = get_center_point(bounds)
+                    x, y = start_point
+                    with self.tracer.span("gesture"):
+                        self.gesture_handler.perform_tap(x, y)
+                    self.wait_for_page_to_load()
 
         print("Successfully navigated to test screen")
         return True
 
-def test_app_screens(app) -> None:
-    desired_caps = {
-            "platformName": "Android",
-            "automationName": "UiAutomator2",
-            "deviceName": "emulator-5556",
-            # "deviceName": "RF9XC01AH0B",
-            "appPackage": app["package"],
-            "language":'en',
-            "autoGrantPermissions": True,
-            "noReset": True,
-            'uiautomator2ServerLaunchTimeout': 60000,
-            'uiautomator2ServerInstallTimeout': 60000 ,
-            "appWaitActivity": "*"
-        }
-    
-    driver = None
-    try:
-        driver = webdriver.Remote("http://localhost:4723", options=UiAutomator2Options().load_capabilities(desired_caps))
-        tester = UIActionAutomator(driver)
-        
-        print(f"🚀 Start Testing for app: {app['package']}")
+def explore_app(tester, driver, app, play_store=True) -> None:
+    """Test every configured screen of an app in order"""
+    print(f"🚀 Start Testing for app: {app['package']}")
 
-        if not tester.ensure_app_running():
-            return
+    if not tester.ensure_app_running():
+        return
 
-        app_info = tester.data_saver.get_app_info(driver)
+    app_info = tester.data_saver.get_app_info(driver)
 
+    if play_store:
         try:
             play_store_info = tester.data_saver.get_app_description_from_play_store(app["package"])
             app_info.update(play_store_info)
         except:
             pass
 
-        tester.data_saver.save_app_metadata(app['package'], app_info)
+    tester.data_saver.save_app_metadata(app['package'], app_info)
 
-        screen_items = list(app["screens"].items())
-        for i, (screen_name, screen_data) in enumerate(screen_items):
-            print(f"\n===== Starting test for screen: {screen_name} =====")
+    screen_items = list(app["screens"].items())
+    for i, (screen_name, screen_data) in enumerate(screen_items):
+        print(f"\n===== Starting test for screen: {screen_name} =====")
 
-            tester.navigate_to_screen(screen_data["navigate"])
-            tester.run_test_on_screen(current_screen=screen_name)
-            
-            print(f"===== Test complete for screen: {screen_name} =====\n")
-            
-            if i < len(screen_items) - 1:
-                tester.go_back_to_initial_screen()
+        tester.navigate_to_screen(screen_data["navigate"])
+        tester.run_test_on_screen(current_screen=screen_name)
+        
+        print(f"===== Test complete for screen: {screen_name} =====\n")
+        
+        if i < len(screen_items) - 1:
+            tester.go_back_to_initial_screen()
 
-        driver.terminate_app(app["package"])
-        time.sleep(2)        
+    driver.terminate_app(app["package"])
+    time.sleep(2)        
+
+def test_app_screens(app, settle_options=None, device_name="emulator-5556", template_representatives=3,
+                     min_visible_fraction=0.25, diff_options=None, image_change_options=None, dedupe_artifacts=False,
+                     vh_format="json", tracing=None, cassette_dir=None, screen_graph=False) -> None:
+    driver = None
+    tester = None
+    try:
+        driver = create_driver(app, device_name)
+        if cassette_dir:
+            driver = RecordingDriver(driver, os.path.join(cassette_dir, app["package"]), metadata={"app": app})
+        tester = UIActionAutomator(driver, settle_options=settle_options, screens=app["screens"],
+                                   template_representatives=template_representatives,
+                                   min_visible_fraction=min_visible_fraction, diff_options=diff_options,
+                                   image_change_options=image_change_options, dedupe_artifacts=dedupe_artifacts,
+                                   vh_format=vh_format, tracing=tracing, screen_graph=screen_graph)
+        if cassette_dir:
+            random.seed(driver.random_seed)
+        
+        explore_app(tester, driver, app)
 
     except Exception as e:
         print(f"❌ Error occurred during test execution: {e}")
 
 
     finally:
+        if tester:
+            tester.close()
         if driver:
             driver.quit()
 
@@ -497,4 +752,13 @@ if __name__ == "__main__":
         config = json.load(file)
     
     for app in config["apps"]:
-        test_app_screens(app)
\ No newline at end of file
+        test_app_screens(app, settle_options=config.get("settle"),
+                         template_representatives=config.get("template_representatives", 3),
+                         min_visible_fraction=config.get("min_visible_fraction", 0.25),
+                         diff_options=config.get("diff"),
+                         image_change_options=config.get("image_change"),
+                         dedupe_artifacts=config.get("dedupe_artifacts", False),
+                         vh_format=config.get("vh_format", "json"),
+                         tracing=config.get("tracing"),
+                         cassette_dir=config.get("record_cassettes"),
+                         screen_graph=config.get("screen_graph", False))
\ No newline at end of file
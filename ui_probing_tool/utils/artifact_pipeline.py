@@ -0,0 +1,76 @@
+import queue
+import threading
+
+class ArtifactPipeline:
+    """Run artifact writers on background threads behind a bounded queue.
+
+    Tasks are submitted under a group (the sample directory they write to) so that
+    callers can wait for one sample with flush(group) before deciding to keep or
+    delete it. With workers=0 every task runs inline, matching the old behaviour.
+    """
+    def __init__(self, workers=2, max_pending=32):
+        self.workers = workers
+        self.tasks = queue.Queue(maxsize=max_pending)
+        self.pending = {}
+        self.condition = threading.Condition()
+        self.threads = []
+        self.closed = False
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._work, name=f"artifact-writer-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, group, func, *args, **kwargs) -> None:
+        if self.closed:
+            raise RuntimeError("❌ Artifact pipeline is already closed.")
+
+        if not self.threads:
+            self._run(func, args, kwargs)
+            return
+
+        with self.condition:
+            self.pending[group] = self.pending.get(group, 0) + 1
+
+        # Blocks when the queue is full so the device loop cannot outrun the writers
+        self.tasks.put((group, func, args, kwargs))
+
+    def flush(self, group=None) -> None:
+        with self.condition:
+            if group is None:
+                self.condition.wait_for(lambda: not self.pending)
+            else:
+                self.condition.wait_for(lambda: group not in self.pending)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+
+        self.flush()
+        self.closed = True
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _work(self) -> None:
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+
+            group, func, args, kwargs = task
+            try:
+                self._run(func, args, kwargs)
+            finally:
+                with self.condition:
+                    self.pending[group] -= 1
+                    if self.pending[group] == 0:
+                        del self.pending[group]
+                    self.condition.notify_all()
+
+    def _run(self, func, args, kwargs) -> None:
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            print(f"❌ Failed to write artifact ({getattr(func, '__name__', func)}): {e}")
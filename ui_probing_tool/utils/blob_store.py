@@ -0,0 +1,105 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Next to the dataset (same filesystem for hardlinks) but outside the app folders the validation tool lists
+DEFAULT_BLOB_DIR = "dataset_blobs"
+
+class BlobStore:
+    """Content-addressed store of artifact bytes, shared by sample directories through hardlinks.
+
+    Each distinct content is kept once as <root>/<aa>/<sha256>. Sample files are
+    hardlinks to the blob, so the dataset layout stays plain files for readers, and
+    a blob whose link count has dropped to one is no longer used by any sample.
+    Where hardlinks are not possible the bytes are copied instead.
+    """
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def blob_path(self, digest) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def link(self, digest, dest_path) -> None:
+        try:
+            os.link(self.blob_path(digest), dest_path)
+        except FileExistsError:
+            os.remove(dest_path)
+            self.link(digest, dest_path)
+        except OSError:
+            shutil.copyfile(self.blob_path(digest), dest_path)
+
+    def store(self, dest_path, data) -> str:
+        digest = self.put(data)
+        self.link(digest, dest_path)
+        return digest
+
+    def adopt(self, path) -> bool:
+        """Replace an existing file with a link to its blob; False if it already was one"""
+        with open(path, "rb") as f:
+            digest = self.put(f.read())
+        if os.path.samefile(path, self.blob_path(digest)):
+            return False
+
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.blob")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        self.link(digest, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+
+    def blobs(self):
+        for prefix in sorted(os.listdir(self.root)):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in sorted(os.listdir(prefix_dir)):
+                if not name.startswith("."):
+                    yield name, os.path.join(prefix_dir, name)
+
+    def verify(self) -> list[str]:
+        """Paths of blobs whose content no longer matches their name"""
+        corrupt = []
+        for digest, path in self.blobs():
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    hasher.update(chunk)
+            if hasher.hexdigest() != digest:
+                corrupt.append(path)
+        return corrupt
+
+    def unreferenced(self) -> list[str]:
+        return [path for _, path in self.blobs() if os.stat(path).st_nlink <= 1]
+
+    def gc(self, dry_run=False) -> tuple[int, int]:
+        """Delete blobs no sample links to any more; returns (count, bytes)"""
+        count = size = 0
+        for path in self.unreferenced():
+            count += 1
+            size += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        return count, size
+
+    def stats(self) -> dict:
+        blobs = links = stored_bytes = linked_bytes = 0
+        for _, path in self.blobs():
+            info = os.stat(path)
+            blobs += 1
+            links += info.st_nlink - 1
+            stored_bytes += info.st_size
+            linked_bytes += info.st_size * (info.st_nlink - 1)
+        return {"blobs": blobs, "links": links, "stored_bytes": stored_bytes, "linked_bytes": linked_bytes}
@@ -1,5 +1,8 @@
 import re
 import random
+import numpy as np
+from utils.node_table import CLICKABLE, LONG_CLICKABLE, VALID_BOUNDS
+from utils.hit_testing import ExclusiveRegion
 
 def parse_bounds(bounds_str: str) -> tuple[int, int, int, int]:
     match = re.findall(r"\d+", bounds_str)
@@ -8,32 +11,31 @@ def parse_bounds(bounds_str: str) -> tuple[int, int, int, int]:
     return tuple(map(int, match))
 
 def get_safe_random_point(node, child_bounds_list=None) -> tuple[int, int]:
+    """Uniform point of the node that no child rectangle covers, or None if the children cover it all"""
     bounds_str = node.attrib.get("bounds")
     parent_bounds = parse_bounds(bounds_str)
-    x1_p, y1_p, x2_p, y2_p = parent_bounds
+    if not parent_bounds:
+        return None
+    return ExclusiveRegion(parent_bounds, child_bounds_list or ()).sample_point()
 
-    if child_bounds_list is None:
-        child_bounds_list = []
+def get_safe_target_point(action, node, table, spatial_index=None) -> tuple[int, int]:
+    """Point on node that hits neither its interactive descendants nor interactive elements drawn over it"""
+    if node not in table.node_ids:
+        return get_safe_random_point(node, collect_child_bounds(action, node))
 
-    for _ in range(10):
-        random_x = random.randint(x1_p, x2_p)
-        random_y = random.randint(y1_p, y2_p)
-        
-        point_is_safe = True
-        for child_bounds in child_bounds_list:
-            x1_c, y1_c, x2_c, y2_c = child_bounds
-            
-            if x1_c <= random_x <= x2_c and y1_c <= random_y <= y2_c:
-                point_is_safe = False
-                break
-        
-        if point_is_safe:
-            return random_x, random_y
-    
-    center_x = (x1_p + x2_p) // 2
-    center_y = (y1_p + y2_p) // 2
-    
-    return center_x, center_y
+    node_id = table.node_id(node)
+    bounds = table.bounds_of(node_id)
+    if bounds is None:
+        return None
+
+    blockers = collect_child_bounds(action, node, table)
+    flags = interactive_flags(action)
+    if spatial_index is not None and flags:
+        overlapping = spatial_index.overlapping(bounds, mask=(table.flags & flags) != 0)
+        drawn_above = overlapping[overlapping >= table.subtree_end[node_id]]
+        blockers.extend(tuple(rect) for rect in table.bounds[drawn_above].tolist())
+
+    return ExclusiveRegion(bounds, blockers).sample_point()
 
 def get_random_point(bounds_str) -> tuple[int, int]:
     bounds = parse_bounds(bounds_str)
@@ -59,7 +61,18 @@ def get_center_point(bounds_str) -> tuple[int, int]:
     
     return center_x, center_y
 
-def collect_child_bounds(action, node) -> list[tuple[int, int, int, int]]:
+def interactive_flags(action) -> int:
+    """Flags of the elements that would take a touch meant for the action's target"""
+    if action in ["tap", "double_tap"]:
+        return CLICKABLE
+    elif action == "long_press":
+        return CLICKABLE | LONG_CLICKABLE
+    return 0
+
+def collect_child_bounds(action, node, table=None) -> list[tuple[int, int, int, int]]:
+    if table is not None and node in table.node_ids:
+        return collect_child_bounds_from_table(action, node, table)
+
     child_bounds_list = []
     
     for child in node:
@@ -79,3 +92,15 @@ def collect_child_bounds(action, node) -> list[tuple[int, int, int, int]]:
         child_bounds_list.extend(collect_child_bounds(action, child))
     
     return child_bounds_list
+
+def collect_child_bounds_from_table(action, node, table) -> list[tuple[int, int, int, int]]:
+    """Same result as collect_child_bounds, read from the node's descendant range"""
+    flags_of_interest = interactive_flags(action)
+    if not flags_of_interest:
+        return []
+
+    node_id = table.node_id(node)
+    start, end = node_id + 1, int(table.subtree_end[node_id])
+    flags = table.flags[start:end]
+    selected = np.flatnonzero(((flags & flags_of_interest) != 0) & ((flags & VALID_BOUNDS) != 0))
+    return [tuple(bounds) for bounds in table.bounds[start:end][selected].tolist()]
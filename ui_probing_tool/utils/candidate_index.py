@@ -0,0 +1,156 @@
+from collections import OrderedDict, deque
+from utils.element_template import element_templates
+from utils.visibility import VisibilityFilter
+
+# Actions that target the same set of elements share a single finder walk
+ACTION_FINDERS = {
+    "tap": "find_tappable_elements_from_leaves",
+    "double_tap": "find_tappable_elements_from_leaves",
+    "long_press": "find_long_pressable_elements_from_leaves",
+    "swipe_left": "find_swipeable_elements_from_leaves",
+    "swipe_right": "find_swipeable_elements_from_leaves",
+    "scroll_up": "find_scrollable_elements_from_leaves",
+    "scroll_down": "find_scrollable_elements_from_leaves",
+    "pinch_zoom_in": "find_zoomable_elements_from_leaves",
+    "pinch_zoom_out": "find_zoomable_elements_from_leaves",
+}
+
+def build_element_paths(root) -> dict:
+    """Map every element to its (class[index] path, child position chain)"""
+    element_paths = {}
+    stack = [(root, [""], ())]
+
+    while stack:
+        element, path_parts, position = stack.pop()
+        class_name = element.attrib.get("class", element.tag)
+        index = element.attrib.get("index", "0")
+
+        current_path_parts = path_parts + [f"{class_name}[{index}]"]
+        element_paths[element] = ("/".join(current_path_parts), position)
+
+        for child_position in range(len(element) - 1, -1, -1):
+            stack.append((element[child_position], current_path_parts, position + (child_position,)))
+
+    return element_paths
+
+def resolve_position(root, position):
+    element = root
+    for child_position in position:
+        element = element[child_position]
+    return element
+
+class CandidateIndex:
+    """Ordered (action, path) work queue for one distinct hierarchy.
+
+    Built once per hierarchy fingerprint and consumed from the front, so
+    picking the next target does not re-run the finders.
+    """
+    def __init__(self, fingerprint, entries, skipped=None, pruned=None):
+        self.fingerprint = fingerprint
+        self.queue = deque(entries)
+        self.skipped = skipped or {}
+        self.pruned = pruned or {}
+
+    @classmethod
+    def build(cls, element_finder, action_list, fingerprint, template_limit=None, min_visible_fraction=None) -> "CandidateIndex":
+        """template_limit keeps at most that many elements per structural template and action;
+        min_visible_fraction drops elements that are hidden, off-screen or occluded"""
+        element_paths = build_element_paths(element_finder.root)
+        templates = element_templates(element_finder.root) if template_limit else None
+        visibility = None
+        if min_visible_fraction:
+            table = element_finder.node_table()
+            visibility = VisibilityFilter(table, element_finder.spatial_index(), min_visible_fraction)
+        elements_by_finder = {}
+        entries = []
+        skipped = {}
+        pruned = {}
+
+        for action in action_list:
+            finder_name = ACTION_FINDERS.get(action)
+            if finder_name is None:
+                elements = []
+            else:
+                if finder_name not in elements_by_finder:
+                    elements_by_finder[finder_name] = getattr(element_finder, finder_name)()
+                elements = elements_by_finder[finder_name]
+
+            print(f"🔍 Elements targeted by {action} action: {len(elements)}")
+
+            template_counts = {}
+            for element in elements:
+                path, position = element_paths[element]
+
+                if visibility is not None:
+                    reason = visibility.rejection_reason(table.node_id(element))
+                    if reason is not None:
+                        pruned.setdefault(reason, set()).add(path)
+                        continue
+
+                if templates is not None:
+                    template = templates[element]
+                    template_counts[template] = template_counts.get(template, 0) + 1
+                    if template_counts[template] > template_limit:
+                        skipped.setdefault(action, []).append(path)
+                        continue
+
+                entries.append((action, path, f"{action}/{path}", position))
+
+            if action in skipped:
+                print(f"🧬 Skipped {len(skipped[action])} {action} targets that repeat an already queued template")
+
+        if pruned:
+            counts = ", ".join(f"{len(paths)} {reason}" for reason, paths in sorted(pruned.items()))
+            print(f"🙈 Dropped candidate elements that cannot be seen: {counts}")
+
+        return cls(fingerprint, entries, skipped, pruned)
+
+    def pop_next_unvisited(self, visited_paths):
+        while self.queue:
+            action, path, action_path, position = self.queue.popleft()
+            if action_path not in visited_paths:
+                return action, path, position
+        return None
+
+    def pop_best(self, visited_paths, priority):
+        """Like pop_next_unvisited, but the entry with the lowest priority(entry) goes first; ties keep queue order"""
+        best = None
+        for position, entry in enumerate(self.queue):
+            if entry[2] in visited_paths:
+                continue
+            value = priority(entry)
+            if best is None or value < best[0]:
+                best = (value, position)
+                if value == 0:
+                    break
+        if best is None:
+            self.queue.clear()
+            return None
+
+        action, path, _, position = self.queue[best[1]]
+        del self.queue[best[1]]
+        return action, path, position
+
+    def __len__(self):
+        return len(self.queue)
+
+class CandidateIndexCache:
+    """Keep the most recently used candidate indexes keyed by (screen, fingerprint)"""
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.indexes = OrderedDict()
+
+    def get(self, key):
+        index = self.indexes.get(key)
+        if index is not None:
+            self.indexes.move_to_end(key)
+        return index
+
+    def put(self, key, index) -> None:
+        self.indexes[key] = index
+        self.indexes.move_to_end(key)
+        while len(self.indexes) > self.max_entries:
+            self.indexes.popitem(last=False)
+
+    def clear(self) -> None:
+        self.indexes.clear()
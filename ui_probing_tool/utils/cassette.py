@@ -0,0 +1,285 @@
+import os
+import gzip
+import json
+import time
+import random
+from selenium.common import exceptions as selenium_exceptions
+from utils.blob_store import BlobStore
+
+CASSETTE_VERSION = 1
+CALLS_FILE = "calls.jsonl.gz"
+HEADER_FILE = "cassette.json"
+
+# Calls that only observe the device. Replay may serve these more or fewer times than recorded.
+READ_CALLS = {"page_source", "current_package", "get_screenshot_as_png", "get_window_size"}
+# Responses kept in the blob store instead of inline
+BLOB_CALLS = {"page_source", "get_screenshot_as_png"}
+
+class CassetteMismatch(RuntimeError):
+    pass
+
+def normalize(value):
+    """JSON-compatible copy of call arguments and responses (tuples become lists, unknown objects strings)"""
+    return json.loads(json.dumps(value, default=str))
+
+def is_read(name, args) -> bool:
+    if name == "execute_script":
+        command = args[1].get("command", "") if len(args) > 1 and isinstance(args[1], dict) else ""
+        return str(command).startswith("dumpsys")
+    return name in READ_CALLS
+
+def recorded_error(error) -> Exception:
+    """Rebuild a recorded exception, as the same Selenium/Appium type where possible"""
+    error_type = getattr(selenium_exceptions, error["type"], None)
+    message = f"{error['type']}: {error['message']}"
+    if isinstance(error_type, type) and issubclass(error_type, Exception):
+        try:
+            return error_type(error["message"])
+        except Exception:
+            pass
+    return RuntimeError(message)
+
+def read_calls(path) -> list:
+    """Recorded calls; a cassette whose recording was cut short keeps every complete line"""
+    entries = []
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip() and line.endswith("\n"):
+                    entries.append(json.loads(line))
+    except EOFError:
+        print(f"⚠️ Cassette {path} was not closed properly; replaying its first {len(entries)} calls")
+    return entries
+
+class RecordingDriver:
+    """Driver wrapper that passes every device call through and records it to a cassette.
+
+    The cassette is a directory holding cassette.json (capabilities and run metadata),
+    calls.jsonl.gz (one line per call with arguments, response or error and duration)
+    and blobs/, where page sources and screenshots are stored once by SHA-256.
+    Tap points are drawn from the random module, so the run should seed it with
+    random_seed, which is saved for the replay. The call log is flushed every
+    flush_every calls, so a recording that crashes or is killed stays replayable
+    up to its last flush.
+    """
+    def __init__(self, driver, cassette_dir, metadata=None, flush_every=1):
+        self.driver = driver
+        self.cassette_dir = cassette_dir
+        os.makedirs(cassette_dir, exist_ok=True)
+        self.blob_store = BlobStore(os.path.join(cassette_dir, "blobs"))
+        self.capabilities = dict(driver.capabilities)
+        self.calls = gzip.open(os.path.join(cassette_dir, CALLS_FILE), "wt", encoding="utf-8")
+        self.flush_every = flush_every
+        self.call_count = 0
+        self.random_seed = random.randrange(2 ** 32)
+
+        header = {"version": CASSETTE_VERSION, "capabilities": normalize(self.capabilities), "random_seed": self.random_seed,
+                  "metadata": normalize(metadata or {})}
+        with open(os.path.join(cassette_dir, HEADER_FILE), "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2, ensure_ascii=False)
+
+    def record(self, name, args, call):
+        entry = {"call": name, "args": normalize(args)}
+        start_time = time.monotonic()
+        try:
+            result = call()
+        except Exception as e:
+            entry["error"] = {"type": type(e).__name__, "message": str(e)}
+            raise
+        else:
+            if name in BLOB_CALLS:
+                data = result.encode("utf-8") if isinstance(result, str) else result
+                entry["blob"] = self.blob_store.put(data)
+            else:
+                entry["result"] = normalize(result)
+            return result
+        finally:
+            entry["seconds"] = round(time.monotonic() - start_time, 4)
+            if self.calls is not None:
+                self.calls.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                self.call_count += 1
+                if self.call_count % self.flush_every == 0:
+                    self.calls.flush()
+
+    @property
+    def page_source(self) -> str:
+        return self.record("page_source", [], lambda: self.driver.page_source)
+
+    @property
+    def current_package(self) -> str:
+        return self.record("current_package", [], lambda: self.driver.current_package)
+
+    def get_screenshot_as_png(self) -> bytes:
+        return self.record("get_screenshot_as_png", [], self.driver.get_screenshot_as_png)
+
+    def get_screenshot_as_file(self, filename) -> bool:
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    def get_window_size(self, window_handle="current") -> dict:
+        return self.record("get_window_size", [], lambda: self.driver.get_window_size(window_handle))
+
+    def execute_script(self, script, *args):
+        return self.record("execute_script", [script, *args], lambda: self.driver.execute_script(script, *args))
+
+    def execute(self, driver_command, params=None):
+        return self.record("execute", [driver_command, params], lambda: self.driver.execute(driver_command, params))
+
+    def activate_app(self, app_id):
+        return self.record("activate_app", [app_id], lambda: self.driver.activate_app(app_id))
+
+    def terminate_app(self, app_id, **options):
+        return self.record("terminate_app", [app_id, options], lambda: self.driver.terminate_app(app_id, **options))
+
+    def close(self) -> None:
+        if self.calls is not None:
+            self.calls.close()
+            self.calls = None
+            print(f"📼 Cassette saved: {self.cassette_dir} ({self.call_count} calls)")
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        finally:
+            self.close()
+
+    def __getattr__(self, name):
+        # Anything not recorded goes straight to the real driver
+        return getattr(self.driver, name)
+
+class ReplayDriver:
+    """Driver stand-in that answers from a recorded cassette, without a device.
+
+    Calls that change the device (gestures, shell commands, app start/stop) must come
+    in the recorded order with the recorded arguments. Reads such as page_source may
+    be polled more or fewer times than during recording: extra reads get the answer
+    last served since the previous change and reads the run no longer makes are skipped. With strict=True
+    every call has to match the recording exactly. Each answer waits for the recorded
+    duration of the call, which costs nothing under utils.clock.SimulatedTime.
+    """
+    def __init__(self, cassette_dir, strict=False, latency=True):
+        with open(os.path.join(cassette_dir, HEADER_FILE), "r", encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"❌ Unsupported cassette version: {header.get('version')}")
+
+        self.entries = read_calls(os.path.join(cassette_dir, CALLS_FILE))
+
+        self.cassette_dir = cassette_dir
+        self.blob_store = BlobStore(os.path.join(cassette_dir, "blobs"))
+        self.capabilities = header["capabilities"]
+        self.metadata = header.get("metadata", {})
+        self.random_seed = header.get("random_seed")
+        self.strict = strict
+        self.latency = latency
+        self.position = 0
+        self.last_reads = {}
+        self.served = 0
+        self.repeated = 0
+        self.skipped = 0
+        self.mismatches = []
+
+    def matches(self, entry, name, args) -> bool:
+        return entry["call"] == name and entry["args"] == args
+
+    def find(self, name, args) -> int:
+        """Index of the next matching entry, looking past recorded reads only; None if there is none"""
+        for index in range(self.position, len(self.entries)):
+            entry = self.entries[index]
+            if self.matches(entry, name, args):
+                return index
+            if not is_read(entry["call"], entry["args"]):
+                return None
+        return None
+
+    def replay(self, name, args):
+        args = normalize(args)
+        key = json.dumps([name, args])
+
+        if self.position < len(self.entries) and self.matches(self.entries[self.position], name, args):
+            index = self.position
+        elif self.strict:
+            expected = self.entries[self.position] if self.position < len(self.entries) else None
+            raise self.mismatch(f"call {self.position}: expected {expected and expected['call']} {expected and expected['args']}, got {name} {args}")
+        elif is_read(name, args) and key in self.last_reads:
+            # A read the recording did not make at this point: the device has not been touched since the last answer
+            self.repeated += 1
+            return self.answer(self.last_reads[key])
+        else:
+            index = self.find(name, args)
+            if index is None:
+                expected = self.entries[self.position] if self.position < len(self.entries) else None
+                raise self.mismatch(f"call {self.position}: no recorded {name} {args} before "
+                                    f"{expected and expected['call']} {expected and expected['args']}")
+            self.skipped += index - self.position
+
+        entry = self.entries[index]
+        self.position = index + 1
+        self.served += 1
+        if is_read(name, args):
+            self.last_reads[key] = entry
+        else:
+            self.last_reads = {}
+        return self.answer(entry)
+
+    def mismatch(self, message) -> CassetteMismatch:
+        # Kept, because the automator catches and logs errors of a single test and carries on
+        self.mismatches.append(message)
+        return CassetteMismatch(message)
+
+    def answer(self, entry):
+        if self.latency and entry.get("seconds"):
+            time.sleep(entry["seconds"])
+        if "error" in entry:
+            raise recorded_error(entry["error"])
+        if "blob" in entry:
+            with open(self.blob_store.blob_path(entry["blob"]), "rb") as f:
+                data = f.read()
+            return data.decode("utf-8") if entry["call"] == "page_source" else data
+        return entry.get("result")
+
+    @property
+    def page_source(self) -> str:
+        return self.replay("page_source", [])
+
+    @property
+    def current_package(self) -> str:
+        return self.replay("current_package", [])
+
+    def get_screenshot_as_png(self) -> bytes:
+        return self.replay("get_screenshot_as_png", [])
+
+    def get_screenshot_as_file(self, filename) -> bool:
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    def get_window_size(self, window_handle="current") -> dict:
+        return self.replay("get_window_size", [])
+
+    def execute_script(self, script, *args):
+        return self.replay("execute_script", [script, *args])
+
+    def execute(self, driver_command, params=None):
+        return self.replay("execute", [driver_command, params])
+
+    def activate_app(self, app_id):
+        return self.replay("activate_app", [app_id])
+
+    def terminate_app(self, app_id, **options):
+        return self.replay("terminate_app", [app_id, options])
+
+    def quit(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {
+            "recorded_calls": len(self.entries),
+            "served": self.served,
+            "repeated_reads": self.repeated,
+            "skipped_reads": self.skipped,
+            "unreplayed": len(self.entries) - self.position,
+            "mismatches": len(self.mismatches),
+            "first_mismatch": self.mismatches[0] if self.mismatches else None,
+        }
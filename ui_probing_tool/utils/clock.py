@@ -0,0 +1,34 @@
+import time
+
+class SimulatedTime:
+    """Replace time.sleep with an offset added to time.monotonic.
+
+    Device latencies and the automator's own sleeps then cost no wall time, while
+    everything measured with time.monotonic still sees them. A frozen clock ignores
+    real time altogether, so timing decisions (settle polls, timeouts) only depend
+    on the sleeps and are the same on every run.
+    """
+    def __init__(self, frozen=False):
+        self.frozen = frozen
+        self.offset = 0.0
+        self.real_sleep = time.sleep
+        self.real_monotonic = time.monotonic
+        self.origin = self.real_monotonic()
+
+    def sleep(self, seconds) -> None:
+        if seconds > 0:
+            self.offset += seconds
+
+    def monotonic(self) -> float:
+        if self.frozen:
+            return self.origin + self.offset
+        return self.real_monotonic() + self.offset
+
+    def __enter__(self) -> "SimulatedTime":
+        time.sleep = self.sleep
+        time.monotonic = self.monotonic
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        time.sleep = self.real_sleep
+        time.monotonic = self.real_monotonic
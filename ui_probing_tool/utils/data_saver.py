@@ -2,40 +2,126 @@ import os
 import json
 import re
 import shutil
-from xml.etree import ElementTree
-from PIL import Image, ImageDraw
+import uuid
+from io import BytesIO
+import numpy as np
+from PIL import ImageDraw
 from utils.bounding_box import parse_bounds
 from utils.gesture_handler import calculate_pinch_zoom_coordinates
-from utils.xml_to_html import xml_to_html
+from utils.xml_to_html import render_html
+from utils.stage_capture import StageCapture
+from utils.artifact_pipeline import ArtifactPipeline
+from utils.index_allocator import IndexAllocator
+from utils.node_table import NodeTable, HAS_BOUNDS, VALID_BOUNDS, CLICKABLE, LONG_CLICKABLE, SCROLLABLE, HORIZONTAL
+from utils.vh_format import VhColumns, simplified_elements, encode_compact
 class DataSaver:
-    def __init__(self, base_dir="dataset"):
+    # Bump when a generator's output changes so reprocess_dataset.py rebuilds that artifact
+    ARTIFACT_VERSIONS = {
+        "html": 1,
+        "vh": 1,
+        "annotated": 1,
+    }
+
+    def __init__(self, base_dir="dataset", pipeline=None, staged=False, blob_store=None, vh_format="json"):
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
         self.current_index_dir = None
+        self.captures = {}
+        self.action_data = None
+        self.pipeline = pipeline or ArtifactPipeline(workers=0)
+        self.index_allocator = IndexAllocator()
+        # With a blob store, identical artifacts across samples share one file through hardlinks
+        self.blob_store = blob_store
+        # Staged samples keep their writers in memory until commit_sample()
+        self.staged = staged
+        self.staged_action_dir = None
+        self.deferred = None
+        # "json" writes <stage>.vh, "compact" writes the columnar <stage>.vhc
+        self.vh_format = vh_format
 
     def get_action_dir(self, app_package, current_screen, action) -> str:
         return os.path.join(self.base_dir, app_package, current_screen, action)
-    
+
     def get_next_index_dir(self, app_package, current_screen, action) -> str:
         action_dir = self.get_action_dir(app_package, current_screen, action)
-        os.makedirs(action_dir, exist_ok=True)
+        _, self.current_index_dir = self.index_allocator.claim(action_dir)
 
-        existing_indices = [
-            int(folder) for folder in os.listdir(action_dir) if folder.isdigit()
-        ]
-        
-        next_index = (max(existing_indices) + 1) if existing_indices else 0
-        self.current_index_dir = os.path.join(action_dir, str(next_index))
-        os.makedirs(self.current_index_dir, exist_ok=True)
+        self.captures = {}
+        self.action_data = None
         
         return self.current_index_dir
 
+    def begin_sample(self, app_package, current_screen, action) -> str:
+        if not self.staged:
+            return self.get_next_index_dir(app_package, current_screen, action)
+
+        # Paths point into a placeholder directory that only exists once the sample is committed
+        self.staged_action_dir = self.get_action_dir(app_package, current_screen, action)
+        self.current_index_dir = os.path.join(self.staged_action_dir, f".pending-{uuid.uuid4().hex}")
+        self.deferred = []
+        self.captures = {}
+        self.action_data = None
+        return self.current_index_dir
+
+    def commit_sample(self) -> str:
+        """Write the staged sample into .N.staging and rename it to N once every artifact is written"""
+        if self.deferred is None:
+            return self.current_index_dir
+
+        placeholder_dir = self.current_index_dir
+        index, staging_dir = self.index_allocator.claim(self.staged_action_dir, staged=True)
+        final_dir = os.path.join(self.staged_action_dir, str(index))
+
+        def rebase(value):
+            if isinstance(value, str) and os.path.dirname(value) == placeholder_dir:
+                return os.path.join(staging_dir, os.path.basename(value))
+            return value
+
+        tasks = [(func, [rebase(arg) for arg in args], kwargs) for func, args, kwargs in self.deferred]
+        self.deferred = None
+        self.current_index_dir = final_dir
+        self.pipeline.submit(final_dir, self._publish_sample, staging_dir, final_dir, tasks)
+        return final_dir
+
+    def _publish_sample(self, staging_dir, final_dir, tasks) -> None:
+        for func, args, kwargs in tasks:
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"❌ Failed to write artifact ({getattr(func, '__name__', func)}): {e}")
+        try:
+            os.rename(staging_dir, final_dir)
+        except OSError as e:
+            print(f"❌ Failed to publish sample {final_dir}, kept in {staging_dir}: {e}")
+
+    def discard_sample(self) -> None:
+        """Drop a staged sample that was never committed; nothing of it is on disk"""
+        self.deferred = None
+        self.current_index_dir = None
+        self.captures = {}
+        self.action_data = None
+
     def get_save_path(self, stage, extension) -> str:
         if not self.current_index_dir:
             raise ValueError("❌ Index folder does not exist.")
 
         return os.path.join(self.current_index_dir, f"{stage}.{extension}")
 
+    def submit(self, func, *args, **kwargs) -> None:
+        """Queue a writer for the current sample on the artifact pipeline"""
+        if self.deferred is not None:
+            self.deferred.append((func, args, kwargs))
+            return
+        self.pipeline.submit(self.current_index_dir, func, *args, **kwargs)
+
+    def flush(self) -> None:
+        """Wait until every artifact of the current sample is on disk"""
+        if self.current_index_dir and self.deferred is None:
+            self.pipeline.flush(self.current_index_dir)
+
+    def close(self) -> None:
+        self.pipeline.close()
+
     def get_app_info(self, driver):
         try:
             current_package = driver.current_package
@@ -122,22 +208,68 @@ class DataSaver:
             print(f"❌ Failed to save metadata: {e}")
             return None
     
-    def save_screenshot(self, driver, app_package, current_screen, action, stage) -> str:
-        if stage == "before":
-            self.get_next_index_dir(app_package, current_screen, action)
+    def capture_stage(self, driver, app_package, current_screen, action, stage) -> StageCapture:
+        """Fetch the screenshot and hierarchy once and write every stage artifact from that snapshot"""
+        capture = StageCapture.take(driver, stage)
 
-        path = self.get_save_path(stage, "png")
-        driver.get_screenshot_as_file(path)
-        return path
+        self.save_screenshot(capture, app_package, current_screen, action)
+        self.save_view_hierarchy(capture)
+        self.save_html_hierarchy(capture)
+        self.save_simplified_view_hierarchy(capture)
 
+        return capture
 
-    def save_annotated_screenshot(self, driver, action_name, screenshot_path, start_point=None, bounds=None, end_point=None) -> str:
-        if not os.path.exists(screenshot_path):
-            print(f"❌ Screenshot file does not exist: {screenshot_path}")
-            return None
-            
+    def save_screenshot(self, capture, app_package, current_screen, action) -> str:
+        if capture.stage == "before":
+            self.begin_sample(app_package, current_screen, action)
+
+        self.captures[capture.stage] = capture
+        path = self.get_save_path(capture.stage, "png")
+        self.submit(self._write_bytes, path, capture.screenshot_png)
+        return path
+
+    def _write_bytes(self, path, data) -> None:
+        # Replace instead of writing in place: an existing file may be a blob shared with other samples
+        tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+        if self.blob_store is not None:
+            self.blob_store.store(tmp_path, data)
+        else:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_text(self, path, text) -> None:
+        self._write_bytes(path, text.encode("utf-8"))
+
+    def _write_json(self, path, data, **json_options) -> None:
+        self._write_text(path, json.dumps(data, **json_options))
+
+    def _write_image(self, path, img) -> None:
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        self._write_bytes(path, buffer.getvalue())
+
+    def save_annotated_screenshots(self, action_name, capture, start_point=None, bounds=None, end_point=None, target_element_path=None) -> str:
+        annotated_path = self.get_save_path("before_annotated", "png")
+        children_annotated_path = self.get_save_path("before_annotated_with_children", "png")
+        self.submit(self._write_annotated_screenshots, annotated_path, children_annotated_path, action_name, capture,
+                    self.action_data, start_point, bounds, end_point, target_element_path)
+        return annotated_path
+
+    def _write_annotated_screenshots(self, annotated_path, children_annotated_path, action_name, capture, action_data,
+                                     start_point, bounds, end_point, target_element_path) -> None:
+        img = self.render_annotated_screenshot(action_name, capture.open_image(), action_data, start_point, bounds, end_point)
+        if img is None:
+            return
+        self._write_image(annotated_path, img)
+
+        children_img = self.render_annotated_with_children_screenshot(action_name, img, capture.root, action_data, target_element_path,
+                                                                     table=capture.table)
+        if children_img is not None:
+            self._write_image(children_annotated_path, children_img)
+
+    def render_annotated_screenshot(self, action_name, img, action_data, start_point=None, bounds=None, end_point=None):
         try:
-            img = Image.open(screenshot_path)
             draw = ImageDraw.Draw(img)
             
             if isinstance(start_point, tuple) and len(start_point) == 2:
@@ -156,12 +288,10 @@ class DataSaver:
             line_width=10
 
             if action_name in ["pinch_zoom_in", "pinch_zoom_out"]:
-                if action_name == "pinch_zoom_in":
-                    zoom_in = True
-                else:
-                    zoom_in = False
-                
-                finger1_start_x, finger1_start_y, finger1_end_x, finger1_end_y, finger2_start_x, finger2_start_y, finger2_end_x, finger2_end_y = calculate_pinch_zoom_coordinates(driver, x, y, zoom_in)
+                finger1_start_x, finger1_start_y = action_data["finger1_start_point"]
+                finger1_end_x, finger1_end_y = action_data["finger1_end_point"]
+                finger2_start_x, finger2_start_y = action_data["finger2_start_point"]
+                finger2_end_x, finger2_end_y = action_data["finger2_end_point"]
 
                 draw.ellipse(
                     [(finger1_start_x - circle_radius, finger1_start_y - circle_radius), 
@@ -254,30 +384,15 @@ class DataSaver:
                 x1, y1, x2, y2 = bounds
                 draw.rectangle([(x1, y1), (x2, y2)], outline=box_color, width=line_width)
             
-            annotated_path = self.get_save_path("before_annotated", "png")
-            img.save(annotated_path)
-            
-            return annotated_path
+            return img
             
         except Exception as e:
             print(f"❌ Failed to add annotation: {e}")
             return None
     
-    def save_annotated_with_children_screenshot(self, driver, action_name, screenshot_path, target_element_path=None) -> str:
-        """Save annotated screenshot with interactive children highlighted"""
+    def render_annotated_with_children_screenshot(self, action_name, annotated_image, root, action_data, target_element_path=None, table=None):
+        """Render annotated screenshot with interactive children highlighted"""
         try:
-            annotated_path = self.get_save_path("before_annotated", "png")
-            if not os.path.exists(annotated_path):
-                print(f"❌ Annotated screenshot does not exist: {annotated_path}")
-                return None
-            
-            xml_path = self.get_save_path("before", "xml")
-            if not os.path.exists(xml_path):
-                print(f"❌ XML file does not exist: {xml_path}")
-                return None
-            
-            tree = ElementTree.parse(xml_path)
-            root = tree.getroot()
             
             # Find the target element using path
             target_element = None
@@ -285,24 +400,17 @@ class DataSaver:
                 target_element = self._find_element_by_path(root, target_element_path)
                 
             # If path-based search fails, try bounds-based search
-            if target_element is None:
-                action_json_path = self.get_save_path("action", "json")
-                if os.path.exists(action_json_path):
-                    with open(action_json_path, "r", encoding="utf-8") as f:
-                        action_data = json.load(f)
-                        target_bounds = action_data.get("bounds")
-                        if target_bounds:
-                            target_element = self._find_element_by_bounds(root, target_bounds)
+            if target_element is None and action_data:
+                target_bounds = action_data.get("bounds")
+                if target_bounds:
+                    target_element = self._find_element_by_bounds(root, target_bounds)
             
             if target_element is None:
-                # Create children annotation without target element (copy existing annotated image)
-                children_annotated_path = self.get_save_path("before_annotated_with_children", "png")
-                import shutil
-                shutil.copy2(annotated_path, children_annotated_path)
-                return children_annotated_path
+                # Create children annotation without target element (reuse existing annotated image)
+                return annotated_image
             
-            # Load the already annotated image as base
-            img = Image.open(annotated_path)
+            # Use the already annotated image as base
+            img = annotated_image.copy()
 
             if img.mode != 'RGBA':
                 img = img.convert('RGBA')
@@ -310,16 +418,12 @@ class DataSaver:
             draw = ImageDraw.Draw(img)
             
             # Draw interactive children on top of existing annotations
-            self._draw_interactive_children_boxes(img, target_element, action_name)
+            self._draw_interactive_children_boxes(img, target_element, action_name, table)
             
             # Redraw action annotation on top of hatching
-            self._redraw_action_annotation_on_children(img, action_name)
+            self._redraw_action_annotation_on_children(img, action_name, action_data)
             
-            # Save the annotated image with children
-            children_annotated_path = self.get_save_path("before_annotated_with_children", "png")
-            img.save(children_annotated_path)
-            
-            return children_annotated_path
+            return img
             
         except Exception as e:
             print(f"❌ Failed to add children annotation: {e}")
@@ -380,84 +484,19 @@ class DataSaver:
         
         return traverse(root)
     
-    def _draw_interactive_children_boxes(self, image, element, gesture):
+    def _draw_interactive_children_boxes(self, image, element, gesture, table=None):
 
         from PIL import ImageDraw, Image
         
         draw = ImageDraw.Draw(image)
 
         """Draw boxes around interactive children"""
-        def is_swipeable(node):
-            return (node.attrib.get("scrollable") == "true" and "bounds" in node.attrib)
-        
-        def is_vertically_scrollable(node):
-            if "bounds" not in node.attrib:
-                return False
-            is_scrollable = node.attrib.get("scrollable") == "true"
-            is_vertical = True
-            class_name = node.attrib.get("class", "").lower()
-            horizontal_classes = ["horizontalscrollview", "viewpager", "gallery", "carousel"]
-            if any(h_class in class_name for h_class in horizontal_classes):
-                is_vertical = False
-            resource_id = node.attrib.get("resource-id", "").lower()
-            if any(keyword in resource_id for keyword in ["horizontal", "gallery", "carousel", "viewpager"]):
-                is_vertical = False
-            if node.attrib.get("horizontal", "false") == "true":
-                is_vertical = False
-            return is_scrollable and is_vertical
-            
-        def is_recycler_view(node):
-            class_name = node.attrib.get("class", "").lower()
-            resource_id = node.attrib.get("resource-id", "").lower()
-            return (("recyclerview" in class_name or "recycler" in class_name or 
-                    "recyclerview" in resource_id or "recycler" in resource_id) and 
-                   "bounds" in node.attrib)
-
-        def is_zoomable(node):
-            if "bounds" not in node.attrib:
-                return False
-            class_name = node.attrib.get("class", "").lower()
-            resource_id = node.attrib.get("resource-id", "").lower()
-            content_desc = node.attrib.get("content-desc", "").lower()
-            
-            is_image_view = ("imageview" in class_name or "image" in resource_id or 
-                           "photo" in resource_id or "picture" in resource_id)
-            is_map_view = ("mapview" in class_name or "map" in class_name or
-                          "map" in resource_id or "map" in content_desc)
-            is_web_view = ("webview" in class_name or "web" in resource_id)
-            has_zoom_controls = ("zoom" in resource_id or "zoom" in content_desc)
-            
-            return (is_map_view or is_web_view or has_zoom_controls or 
-                   (is_image_view and self._is_large_element(node)))
-        
-        def is_element_interactive_for_gesture(elem, gesture_type):
-            if "bounds" not in elem.attrib:
-                return False
-            if gesture_type in ["tap", "double_tap"]:
-                return elem.attrib.get("clickable") == "true"
-            elif gesture_type == "long_press":
-                # For long press, show both clickable and long-clickable elements
-                return (elem.attrib.get("clickable") == "true" or 
-                       elem.attrib.get("long-clickable") == "true")
-            elif gesture_type in ["swipe_left", "swipe_right"]:
-                return is_swipeable(elem) or is_recycler_view(elem)
-            elif gesture_type in ["scroll_up", "scroll_down"]:
-                return is_vertically_scrollable(elem) or is_recycler_view(elem)
-            elif gesture_type in ["pinch_zoom_in", "pinch_zoom_out"]:
-                return is_zoomable(elem)
-            else:
-                return False
-        
-        def find_interactive_children(parent_elem, gesture_type):
-            interactive_children = []
-            for child in parent_elem:
-                if is_element_interactive_for_gesture(child, gesture_type):
-                    interactive_children.append(child)
-                interactive_children.extend(find_interactive_children(child, gesture_type))
-            return interactive_children
-        
-        # Find all interactive children
-        interactive_children = find_interactive_children(element, gesture)
+        if table is None or element not in table.node_ids:
+            table = NodeTable(element)
+        node_id = table.node_id(element)
+        start, end = node_id + 1, int(table.subtree_end[node_id])
+        interactive = self._interactive_mask(table, gesture)[start:end] & table.has(VALID_BOUNDS)[start:end]
+        interactive_bounds = [tuple(bounds) for bounds in table.bounds[start:end][interactive].tolist()]
         
         def fill_hatched(image, bounds, color=(0, 128, 255, 180), spacing=12, line_width=3, cross=False, bg_alpha=0, outline=None, outline_width=2):
             """Apply hatching pattern to a rectangular area"""
@@ -490,50 +529,60 @@ class DataSaver:
             image.paste(overlay, (x1, y1), overlay)
 
         # Draw boxes for interactive children
-        for child in interactive_children:
-            bounds_str = child.attrib.get("bounds")
-            if bounds_str:
-                bounds = parse_bounds(bounds_str)
-                if bounds:
-                    fill_hatched(
-                        image,
-                        bounds,
-                        color=(0, 128, 255, 180),
-                        spacing=10,
-                        line_width=4,
-                        cross=False,
-                        bg_alpha=0,
-                        outline=(0, 128, 255, 220),
-                        outline_width=2,
-                    )
+        for bounds in interactive_bounds:
+            fill_hatched(
+                image,
+                bounds,
+                color=(0, 128, 255, 180),
+                spacing=10,
+                line_width=4,
+                cross=False,
+                bg_alpha=0,
+                outline=(0, 128, 255, 220),
+                outline_width=2,
+            )
     
-    def _is_large_element(self, node):
-        """Check if element is large enough for zoom interaction"""
-        try:
-            import re
-            bounds = node.attrib.get("bounds")
-            match = re.findall(r'\[(\d+),(\d+)\]', bounds)
-            if len(match) == 2:
-                x1, y1 = map(int, match[0])
-                x2, y2 = map(int, match[1])
-                width = x2 - x1
-                height = y2 - y1
-                return width > 500 and height > 500
-        except:
-            pass
-        return False
+    def _interactive_mask(self, table, gesture):
+        """Nodes of the table that the children annotation highlights for the gesture"""
+        has_bounds = table.has(HAS_BOUNDS)
+        class_has = lambda *keywords: table.keyword_mask(table.class_ids, keywords)
+        resource_has = lambda *keywords: table.keyword_mask(table.resource_ids, keywords)
+        desc_has = lambda *keywords: table.keyword_mask(table.desc_ids, keywords)
+
+        if gesture in ["tap", "double_tap"]:
+            return has_bounds & table.has(CLICKABLE)
+        elif gesture == "long_press":
+            # For long press, show both clickable and long-clickable elements
+            return has_bounds & (table.has(CLICKABLE) | table.has(LONG_CLICKABLE))
+
+        is_recycler_view = has_bounds & (class_has("recycler") | resource_has("recycler"))
+        if gesture in ["swipe_left", "swipe_right"]:
+            return (has_bounds & table.has(SCROLLABLE)) | is_recycler_view
+        elif gesture in ["scroll_up", "scroll_down"]:
+            is_vertical = ~(class_has("horizontalscrollview", "viewpager", "gallery", "carousel") |
+                            resource_has("horizontal", "gallery", "carousel", "viewpager") |
+                            table.has(HORIZONTAL))
+            return (has_bounds & table.has(SCROLLABLE) & is_vertical) | is_recycler_view
+        elif gesture in ["pinch_zoom_in", "pinch_zoom_out"]:
+            is_image_view = class_has("imageview") | resource_has("image", "photo", "picture")
+            is_map_view = class_has("map") | resource_has("map") | desc_has("map")
+            is_web_view = class_has("webview") | resource_has("web")
+            has_zoom_controls = resource_has("zoom") | desc_has("zoom")
+            return has_bounds & (is_map_view | is_web_view | has_zoom_controls |
+                                 (is_image_view & self._large_element_mask(table)))
+        return np.zeros(len(table), dtype=bool)
+
+    def _large_element_mask(self, table):
+        """Elements large enough for zoom interaction"""
+        width, height = table.sizes()
+        return table.has(VALID_BOUNDS) & (width > 500) & (height > 500)
     
-    def _redraw_action_annotation_on_children(self, img, action_name):
+    def _redraw_action_annotation_on_children(self, img, action_name, action_data):
         """Redraw action annotation on top of hatching for children annotation"""
         try:
-            # Load action data from saved action.json
-            action_json_path = self.get_save_path("action", "json")
-            if not os.path.exists(action_json_path):
+            if not action_data:
                 return
             
-            with open(action_json_path, "r", encoding="utf-8") as f:
-                action_data = json.load(f)
-            
             draw = ImageDraw.Draw(img)
             
             circle_color = (239, 128, 34, 254)
@@ -602,107 +651,34 @@ class DataSaver:
         except Exception as e:
             print(f"❌ Failed to redraw action annotation: {e}")
         
-    def save_view_hierarchy(self, driver, stage) -> str:
-        path = self.get_save_path(stage, "xml")
-        xml_data = driver.page_source
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(xml_data)
-
+    def save_view_hierarchy(self, capture) -> str:
+        path = self.get_save_path(capture.stage, "xml")
+        self.submit(self._write_text, path, capture.xml_source)
         return path
     
-    def save_html_hierarchy(self, stage) -> str:
-        xml_path = self.get_save_path(stage, "xml")
-        html_path = self.get_save_path(stage, "html")
-        
-        if os.path.exists(xml_path):
-            try:
-                xml_to_html(xml_path, html_path)
-                return html_path
-            except Exception as e:
-                print(f"❌ Failed to convert XML to HTML for {stage}: {e}")
-                return None
-        else:
-            print(f"⚠️ XML file not found for HTML conversion: {xml_path}")
-            return None
+    def save_html_hierarchy(self, capture) -> str:
+        html_path = self.get_save_path(capture.stage, "html")
+        self.submit(self._write_html_hierarchy, capture, html_path)
+        return html_path
 
-    def save_simplified_view_hierarchy(self, driver, stage) -> str:
-        path = self.get_save_path(stage, "vh")
-        xml_data = driver.page_source
-        root = ElementTree.fromstring(xml_data)
-        
-        elements_dict = {}
-        
-        temp_id = 0
-        
-        def process_node(node, parent_id=-1):
-            nonlocal temp_id
-            current_id = temp_id
-            temp_id += 1
-            
-            bounds_str = node.attrib.get("bounds", "")
-            bounds = parse_bounds(bounds_str) if bounds_str else (0, 0, 0, 0)
-            
-            if bounds is None:
-                bounds = (0, 0, 0, 0)
-            
-            width = bounds[2] - bounds[0]
-            height = bounds[3] - bounds[1]
-            size = f"{width}*{height}"
-                        
-            formatted_bounds = f"[{bounds[0]},{bounds[1]}][{bounds[2]},{bounds[3]}]"
-
-            element_info = {
-                "id": current_id,
-                "parent": parent_id,
-                "children": [],
-                "child_count": 0,
-                "class": node.attrib.get("class", ""),
-                "resource_id": node.attrib.get("resource-id", "").strip() or None,
-                "text": node.attrib.get("text", "").strip() or None,
-                "content_description": node.attrib.get("content-desc", "").strip() or None,
-                "package": node.attrib.get("package", "").strip() or None,
-                "bounds": formatted_bounds,
-                "size": size,
-                
-                "clickable": node.attrib.get("clickable") == "true",
-                "long_clickable": node.attrib.get("long-clickable") == "true",
-                "scrollable": node.attrib.get("scrollable") == "true",
-                "checkable": node.attrib.get("checkable") == "true",
-                "checked": node.attrib.get("checked") == "true",
-                "focusable": node.attrib.get("focusable") == "true",
-                "focused": node.attrib.get("focused") == "true",
-                "selected": node.attrib.get("selected") == "true",
-                "enabled": node.attrib.get("enabled") != "false", 
-                "editable": node.attrib.get("editable") == "true",
-                "is_password": node.attrib.get("password") == "true",
-                "displayed": node.attrib.get("displayed") != "false" 
-            }
-            
-            children_ids = []
-            for child in list(node):
-                child_id = process_node(child, current_id)
-                children_ids.append(child_id)
-            
-            element_info["children"] = children_ids
-            element_info["child_count"] = len(children_ids)
-            elements_dict[current_id] = element_info
-            
-            return current_id
-        
-        root_children = list(root)
-        root_elements_ids = []
-        
-        for i, child in enumerate(root_children):
-            child_id = process_node(child, -1)
-            root_elements_ids.append(child_id)
-        
-        elements_list = [elements_dict[i] for i in range(len(elements_dict))]
-        
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(elements_list, f, indent=2, ensure_ascii=False)
-        
+    def _write_html_hierarchy(self, capture, html_path) -> None:
+        try:
+            self._write_text(html_path, render_html(capture.root))
+        except Exception as e:
+            print(f"❌ Failed to convert XML to HTML for {capture.stage}: {e}")
+
+    def save_simplified_view_hierarchy(self, capture) -> str:
+        path = self.get_save_path(capture.stage, "vhc" if self.vh_format == "compact" else "vh")
+        self.submit(self._write_simplified_view_hierarchy, capture, path)
         return path
+
+    def _write_simplified_view_hierarchy(self, capture, path) -> None:
+        # The node table is built here, on the pipeline, and only for samples that are written
+        columns = VhColumns.from_table(capture.table)
+        if self.vh_format == "compact":
+            self._write_bytes(path, encode_compact(columns))
+        else:
+            self._write_json(path, simplified_elements(columns), indent=2, ensure_ascii=False)
     
     def save_action_data(self, driver, action, start_point, bounds, end_point=None) -> str:
         path = self.get_save_path("action", "json")
@@ -733,22 +709,31 @@ class DataSaver:
         else:
             metadata["tap_point"] = start_point
         
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=4)
+        self.submit(self._write_json, path, metadata, indent=4)
+        self.action_data = metadata
 
         return path
 
     def save_element_path(self, element_path) -> str:
         path = self.get_save_path("path", "txt")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(element_path)
-
+        self.submit(self._write_text, path, element_path)
         return path
     
     def delete_data(self) -> None:
+        if self.deferred is not None:
+            self.discard_sample()
+            return
+
+        # Writers still queued for this sample would recreate files after the rmtree
+        self.flush()
         if self.current_index_dir and os.path.exists(self.current_index_dir):
             shutil.rmtree(self.current_index_dir)
+            action_dir, index = os.path.split(self.current_index_dir)
+            if index.isdigit():
+                self.index_allocator.release(action_dir, int(index))
             self.current_index_dir = None
+            self.captures = {}
+            self.action_data = None
         else:
             print("❌ No folder to delete.")
         
\ No newline at end of file
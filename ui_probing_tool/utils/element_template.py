@@ -0,0 +1,47 @@
+import hashlib
+
+# Flags that change how an element reacts to gestures; text, index and bounds are ignored
+TEMPLATE_FLAGS = ("clickable", "long-clickable", "scrollable", "checkable", "focusable", "enabled", "password")
+
+def _node_signature(element) -> str:
+    attrib = element.attrib
+    flags = "".join("1" if attrib.get(flag) == "true" else "0" for flag in TEMPLATE_FLAGS)
+    return f"{attrib.get('class', element.tag)}|{attrib.get('resource-id', '')}|{flags}"
+
+def element_templates(root) -> dict:
+    """Map every element to a structural template fingerprint.
+
+    The fingerprint combines the element's own class, resource-id and flags, the
+    shape of its subtree and the (class, resource-id) chain of its ancestors. It
+    ignores text, index and bounds, so the rows of a RecyclerView built from the
+    same layout share one template.
+    """
+    signatures = {}
+    shapes = {}
+
+    # Post-order pass: the subtree shape hash of every element
+    stack = [(root, False)]
+    while stack:
+        element, children_done = stack.pop()
+        if not children_done:
+            signatures[element] = _node_signature(element)
+            stack.append((element, True))
+            stack.extend((child, False) for child in element)
+            continue
+
+        hasher = hashlib.blake2b(signatures[element].encode("utf-8"), digest_size=12)
+        for child in element:
+            hasher.update(shapes[child])
+        shapes[element] = hasher.digest()
+
+    # Pre-order pass: fold in the ancestor chain
+    templates = {}
+    stack = [(root, b"")]
+    while stack:
+        element, ancestry = stack.pop()
+        templates[element] = hashlib.blake2b(ancestry + shapes[element], digest_size=12).hexdigest()
+
+        child_ancestry = hashlib.blake2b(ancestry + signatures[element].encode("utf-8"), digest_size=12).digest()
+        stack.extend((child, child_ancestry) for child in element)
+
+    return templates
@@ -0,0 +1,290 @@
+import os
+import json
+import math
+import time
+import hashlib
+from io import BytesIO
+from PIL import Image
+from utils.bounding_box import parse_bounds
+
+LAUNCHER_PACKAGE = "com.android.launcher3"
+LAUNCHER_SOURCE = ('<?xml version="1.0" encoding="UTF-8"?><hierarchy index="0" class="hierarchy" rotation="0" width="{width}" height="{height}">'
+                   '<android.widget.FrameLayout index="0" package="' + LAUNCHER_PACKAGE + '" class="android.widget.FrameLayout" '
+                   'text="" displayed="true" bounds="[0,0][{width},{height}]" /></hierarchy>')
+
+# Pointer travel (px) above which a touch is a swipe, and hold time (s) above which it is a long press
+SWIPE_DISTANCE = 50
+LONG_PRESS_SECONDS = 0.5
+DOUBLE_TAP_SECONDS = 0.3
+
+DEFAULT_LATENCIES = {"gesture": 0.0, "settle": 0.0, "page_source": 0.0, "screenshot": 0.0}
+
+def solid_png(size, name) -> bytes:
+    """Stand-in screenshot for fixtures without a PNG: one colour per screen name"""
+    color = tuple(hashlib.md5(name.encode("utf-8")).digest()[:3]) + (255,)
+    buffer = BytesIO()
+    Image.new("RGBA", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+class Touch:
+    """One pointer from down to up, tracked across W3C action calls"""
+    def __init__(self, x, y, started):
+        self.start = (x, y)
+        self.end = (x, y)
+        self.started = started
+        self.held = 0.0
+
+    def distance(self) -> float:
+        return math.hypot(self.end[0] - self.start[0], self.end[1] - self.start[1])
+
+class FakeDriver:
+    """Appium driver stand-in that serves recorded screens from a fixture directory.
+
+    fixture.json lists the screens (<name>.xml, optionally <name>.png), the start
+    screen and the transitions gestures trigger. Each command sleeps for its
+    configured latency, and a transition only becomes visible once the settle
+    latency has passed, so SettleDetector sees the screen change as on a device.
+    Tap points are drawn from the random module; seed it with random_seed (the
+    fixture's "seed", 0 by default) so every run tests the same points.
+    """
+    def __init__(self, fixture_dir, latencies=None):
+        with open(os.path.join(fixture_dir, "fixture.json"), "r", encoding="utf-8") as f:
+            fixture = json.load(f)
+
+        self.fixture_dir = fixture_dir
+        self.package = fixture["package"]
+        self.width, self.height = fixture.get("window", [1080, 2400])
+        self.start_screen = fixture["start"]
+        self.transitions = fixture.get("transitions", [])
+        self.navigation = fixture.get("navigation", {self.start_screen: []})
+        self.random_seed = fixture.get("seed", 0)
+        self.latencies = dict(DEFAULT_LATENCIES)
+        self.latencies.update(fixture.get("latencies", {}))
+        self.latencies.update(latencies or {})
+
+        self.sources = {}
+        self.screenshots = {}
+        for name, screen in fixture["screens"].items():
+            with open(os.path.join(fixture_dir, screen.get("xml", f"{name}.xml")), "r", encoding="utf-8") as f:
+                self.sources[name] = f.read()
+            png_path = os.path.join(fixture_dir, screen.get("png", f"{name}.png"))
+            if os.path.exists(png_path):
+                with open(png_path, "rb") as f:
+                    self.screenshots[name] = f.read()
+            else:
+                self.screenshots[name] = solid_png((self.width, self.height), screen.get("color", name))
+        self.launcher_source = LAUNCHER_SOURCE.format(width=self.width, height=self.height)
+        self.launcher_screenshot = solid_png((self.width, self.height), LAUNCHER_PACKAGE)
+
+        self.capabilities = {"appPackage": self.package, "platformName": "Android", "automationName": "UiAutomator2"}
+        self.current_package = self.package
+        self.screen = self.start_screen
+        self.back_stack = []
+        self.pending = None
+        self.touches = {}
+        self.released = []
+        self.last_tap = None
+        self.gestures = []
+        self.command_counts = {}
+
+    @property
+    def screen_names(self) -> list[str]:
+        return list(self.sources)
+
+    def count(self, command) -> None:
+        self.command_counts[command] = self.command_counts.get(command, 0) + 1
+
+    def wait(self, kind) -> None:
+        latency = self.latencies.get(kind, 0.0)
+        if latency > 0:
+            time.sleep(latency)
+
+    def settle(self) -> None:
+        """Apply a scheduled transition once its settle latency has passed"""
+        if self.pending and time.monotonic() >= self.pending[1]:
+            screen = self.pending[0]
+            self.pending = None
+            self.show(screen)
+
+    def show(self, screen) -> None:
+        if screen == "back":
+            self.back()
+            return
+        if screen != self.screen:
+            self.back_stack.append(self.screen)
+        self.screen = screen
+
+    def back(self) -> None:
+        self.pending = None
+        if self.current_package != self.package:
+            return
+        if self.back_stack:
+            self.screen = self.back_stack.pop()
+        else:
+            self.current_package = LAUNCHER_PACKAGE
+
+    @property
+    def page_source(self) -> str:
+        self.count("page_source")
+        self.wait("page_source")
+        self.settle()
+        if self.current_package != self.package:
+            return self.launcher_source
+        return self.sources[self.screen]
+
+    def get_screenshot_as_png(self) -> bytes:
+        self.count("screenshot")
+        self.wait("screenshot")
+        self.settle()
+        if self.current_package != self.package:
+            return self.launcher_screenshot
+        return self.screenshots[self.screen]
+
+    def get_screenshot_as_file(self, filename) -> bool:
+        with open(filename, "wb") as f:
+            f.write(self.get_screenshot_as_png())
+        return True
+
+    def get_window_size(self, window_handle="current") -> dict:
+        return {"width": self.width, "height": self.height}
+
+    def execute_script(self, script, *args):
+        self.count(script)
+        self.wait("gesture")
+        command = str(args[0].get("command", "")) if args and isinstance(args[0], dict) else ""
+        if "KEYCODE_BACK" in command:
+            self.back()
+        elif "KEYCODE_HOME" in command or ("force-stop" in command and self.package in command):
+            self.pending = None
+            self.current_package = LAUNCHER_PACKAGE
+        elif "dumpsys window" in command:
+            return f"mCurrentFocus=Window{{0 u0 {self.current_package}/{self.screen}}}"
+        return ""
+
+    def activate_app(self, app_id) -> None:
+        self.count("activate_app")
+        self.wait("gesture")
+        if app_id == self.package and self.current_package != self.package:
+            self.current_package = self.package
+            self.screen = self.start_screen
+            self.back_stack = []
+
+    def terminate_app(self, app_id, **options) -> bool:
+        self.count("terminate_app")
+        if app_id != self.package:
+            return False
+        self.pending = None
+        self.current_package = LAUNCHER_PACKAGE
+        return True
+
+    def quit(self) -> None:
+        pass
+
+    def execute(self, driver_command, params=None) -> dict:
+        """W3C actions: pointer sequences are replayed into touches and classified into gestures"""
+        self.count(driver_command)
+        self.wait("gesture")
+        for source in (params or {}).get("actions", []):
+            if source.get("type") != "pointer":
+                continue
+            touch_id = source.get("id")
+            position = None
+            for action in source.get("actions", []):
+                kind = action.get("type")
+                if kind == "pointerMove":
+                    position = (action.get("x", 0), action.get("y", 0))
+                    if touch_id in self.touches:
+                        self.touches[touch_id].end = position
+                    self.sleep_ms(action.get("duration", 0))
+                elif kind == "pointerDown":
+                    self.press(touch_id, position or (0, 0))
+                elif kind == "pause":
+                    self.sleep_ms(action.get("duration", 0))
+                elif kind == "pointerUp":
+                    self.release(self.held_touch(touch_id, position))
+
+        return {"value": None}
+
+    def sleep_ms(self, duration) -> None:
+        if duration:
+            time.sleep(duration / 1000)
+
+    def held_touch(self, touch_id, position):
+        """Id of the held pointer an action refers to.
+
+        Multi-call gestures such as the pinch continue a finger under a new pointer id,
+        so an unknown id is matched to the held pointer closest to its position.
+        """
+        if touch_id in self.touches or not self.touches or position is None:
+            return touch_id
+        return min(self.touches, key=lambda held_id: math.dist(self.touches[held_id].end, position))
+
+    def press(self, touch_id, position) -> None:
+        touch = Touch(*position, time.monotonic())
+        continued = self.held_touch(touch_id, position)
+        if continued in self.touches and math.dist(self.touches[continued].end, position) < 1:
+            touch.started = self.touches.pop(continued).started
+        self.touches[touch_id] = touch
+
+    def release(self, touch_id) -> None:
+        if touch_id not in self.touches:
+            return
+        touch = self.touches.pop(touch_id)
+        touch.held = time.monotonic() - touch.started
+        self.released.append(touch)
+
+        # Fingers of a multi-touch gesture are classified together when the last one lifts
+        if not self.touches:
+            fingers = self.released
+            self.released = []
+            self.gesture(fingers)
+
+    def gesture(self, fingers) -> None:
+        touch = fingers[-1]
+        if len(fingers) >= 2:
+            start = math.dist(fingers[0].start, fingers[1].start)
+            end = math.dist(fingers[0].end, fingers[1].end)
+            name = "pinch_zoom_in" if end > start else "pinch_zoom_out"
+            x = (fingers[0].start[0] + fingers[1].start[0]) / 2
+            y = (fingers[0].start[1] + fingers[1].start[1]) / 2
+        elif touch.distance() > SWIPE_DISTANCE:
+            dx = touch.end[0] - touch.start[0]
+            dy = touch.end[1] - touch.start[1]
+            if abs(dx) >= abs(dy):
+                name = "swipe_left" if dx < 0 else "swipe_right"
+            else:
+                name = "scroll_up" if dy < 0 else "scroll_down"
+            x, y = touch.start
+        elif touch.held >= LONG_PRESS_SECONDS:
+            name = "long_press"
+            x, y = touch.start
+        else:
+            name = "tap"
+            x, y = touch.start
+            now = time.monotonic()
+            if self.last_tap and now - self.last_tap[0] <= DOUBLE_TAP_SECONDS and math.dist(self.last_tap[1], touch.start) < SWIPE_DISTANCE:
+                name = "double_tap"
+            self.last_tap = (now, touch.start)
+
+        self.gestures.append((self.screen, name, (x, y)))
+        self.trigger(name, x, y)
+
+    def trigger(self, gesture, x, y) -> None:
+        self.settle()
+        if self.current_package != self.package:
+            return
+        for transition in self.transitions:
+            if transition["from"] != self.screen:
+                continue
+            expected = transition.get("gesture", "*")
+            if expected != "*" and not gesture.startswith(expected):
+                continue
+            bounds = transition.get("bounds")
+            if bounds:
+                if isinstance(bounds, str):
+                    bounds = parse_bounds(bounds)
+                x1, y1, x2, y2 = bounds
+                if not (x1 <= x < x2 and y1 <= y < y2):
+                    continue
+            self.pending = (transition["to"], time.monotonic() + self.latencies.get("settle", 0.0))
+            return
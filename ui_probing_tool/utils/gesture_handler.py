@@ -34,10 +34,7 @@ class GestureHandler:
             wait_time = 1
             time.sleep(wait_time)
             
-            self.data_saver.save_screenshot(self.driver, self.app_package, current_screen, "long_press", "during")
-            self.data_saver.save_view_hierarchy(self.driver, "during")
-            self.data_saver.save_html_hierarchy("during")
-            self.data_saver.save_simplified_view_hierarchy(self.driver, "during")
+            self.data_saver.capture_stage(self.driver, self.app_package, current_screen, "long_press", "during")
             
             remaining_time = duration - wait_time
             if remaining_time > 0:
@@ -104,11 +101,8 @@ class GestureHandler:
         
         time.sleep(0.5)
         
-        self.data_saver.save_screenshot(self.driver, self.app_package, current_screen, 
-                                       "pinch_zoom_in" if zoom_in else "pinch_zoom_out", "during")
-        self.data_saver.save_view_hierarchy(self.driver, "during")
-        self.data_saver.save_html_hierarchy("during")
-        self.data_saver.save_simplified_view_hierarchy(self.driver, "during")
+        self.data_saver.capture_stage(self.driver, self.app_package, current_screen, 
+                                      "pinch_zoom_in" if zoom_in else "pinch_zoom_out", "during")
         
         actions3 = ActionChains(self.driver)
         finger1_release = actions3.w3c_actions.add_pointer_input('touch', 'finger1_release')
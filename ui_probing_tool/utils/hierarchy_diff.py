@@ -0,0 +1,238 @@
+import re
+import hashlib
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from utils.node_table import BOUNDS_PATTERN
+
+# Clock readings and relative timestamps that tick on their own
+DEFAULT_VOLATILE_TEXT_PATTERNS = (
+    r"\b\d{1,2}:\d{2}(:\d{2})?(\s?[AaPp]\.?[Mm]\.?)?\b",
+    r"\b\d+\s?(sec|secs|second|seconds|min|mins|minute|minutes|h|hr|hrs|hour|hours)\s+ago\b",
+)
+DEFAULT_MASKED_ATTRIBUTES = ("focused", "selected")
+# Restores must notice a toggled switch, a selected tab or typed text, so only focus is masked there
+RESTORE_MASKED_ATTRIBUTES = ("focused",)
+# Animated widgets whose text, description and bounds change without user input
+DEFAULT_VOLATILE_CLASSES = ("progressbar", "lottieanimationview", "shimmer")
+VOLATILE_CLASS_ATTRIBUTES = ("text", "content-desc", "bounds")
+
+@dataclass
+class HierarchyDiff:
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    moved: list = field(default_factory=list)
+    changed: list = field(default_factory=list)
+    bbox: tuple = None
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.moved or self.changed)
+
+    def summary(self) -> str:
+        return (f"{len(self.added)} added, {len(self.removed)} removed, {len(self.moved)} moved, "
+                f"{len(self.changed)} changed, region {self.bbox}")
+
+    def to_dict(self) -> dict:
+        return {
+            "added": self.added,
+            "removed": self.removed,
+            "moved": [list(paths) for paths in self.moved],
+            "changed": self.changed,
+            "bbox": list(self.bbox) if self.bbox else None,
+        }
+
+class HashedTree:
+    """Per-node masked attributes and subtree hashes of one hierarchy"""
+    def __init__(self, root, differ):
+        self.root = root
+        self.attributes = {}
+        self.subtree_hashes = {}
+
+        stack = [(root, False)]
+        while stack:
+            element, children_done = stack.pop()
+            if not children_done:
+                self.attributes[element] = differ.masked_attributes(element)
+                stack.append((element, True))
+                stack.extend((child, False) for child in element)
+                continue
+
+            hasher = hashlib.blake2b(repr(self.attributes[element]).encode("utf-8"), digest_size=16)
+            for child in element:
+                hasher.update(self.subtree_hashes[child])
+            self.subtree_hashes[element] = hasher.digest()
+
+def identity_key(element) -> tuple:
+    return element.tag, element.attrib.get("class"), element.attrib.get("resource-id")
+
+def child_path(parent_path, element) -> str:
+    return f"{parent_path}/{element.attrib.get('class', element.tag)}[{element.attrib.get('index', '0')}]"
+
+def out_of_order(sequence) -> set:
+    """Positions not on a longest increasing subsequence, i.e. the elements that moved"""
+    tails, tail_positions, previous = [], [], [-1] * len(sequence)
+    for position, value in enumerate(sequence):
+        slot = bisect_left(tails, value)
+        if slot == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[slot] = value
+            tail_positions[slot] = position
+        previous[position] = tail_positions[slot - 1] if slot else -1
+
+    keep = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        keep.add(position)
+        position = previous[position]
+    return set(range(len(sequence))) - keep
+
+class HierarchyDiffer:
+    """Structural diff of two parsed hierarchies with volatile attributes masked out.
+
+    Identical subtrees are matched by hash and skipped, and the rest are paired
+    by (class, resource-id) in document order. Each node is visited once.
+    """
+    def __init__(self, masked_attributes=DEFAULT_MASKED_ATTRIBUTES, volatile_text_patterns=DEFAULT_VOLATILE_TEXT_PATTERNS,
+                 volatile_classes=DEFAULT_VOLATILE_CLASSES):
+        self.masked_attributes_set = frozenset(masked_attributes)
+        self.volatile_text_patterns = [re.compile(pattern) for pattern in volatile_text_patterns]
+        self.volatile_classes = tuple(volatile_class.lower() for volatile_class in volatile_classes)
+
+    @classmethod
+    def from_config(cls, options=None) -> "HierarchyDiffer":
+        options = dict(options or {})
+        for key in ("masked_attributes", "volatile_text_patterns", "volatile_classes"):
+            if key in options:
+                options[key] = tuple(options[key])
+        return cls(**options)
+
+    def masked_attributes(self, element) -> tuple:
+        attrib = element.attrib
+        class_name = attrib.get("class", "").lower()
+        volatile_class = any(volatile in class_name for volatile in self.volatile_classes)
+
+        attributes = []
+        for name, value in sorted(attrib.items()):
+            if name in self.masked_attributes_set or (volatile_class and name in VOLATILE_CLASS_ATTRIBUTES):
+                continue
+            if name in ("text", "content-desc"):
+                for pattern in self.volatile_text_patterns:
+                    value = pattern.sub("<volatile>", value)
+            attributes.append((name, value))
+        return element.tag, tuple(attributes)
+
+    def fingerprint(self, root) -> str:
+        """Hash of a whole hierarchy with the masked attributes and volatile text left out"""
+        return HashedTree(root, self).subtree_hashes[root].hex()
+
+    def diff(self, before_root, after_root) -> HierarchyDiff:
+        before = HashedTree(before_root, self)
+        after = HashedTree(after_root, self)
+        result = HierarchyDiff()
+        if before.subtree_hashes[before_root] == after.subtree_hashes[after_root]:
+            return result
+
+        regions = []
+        removed = []
+        added = []
+        stack = [(before_root, after_root, child_path("", before_root), child_path("", after_root))]
+        while stack:
+            before_node, after_node, before_path, after_path = stack.pop()
+
+            before_attributes = before.attributes[before_node]
+            after_attributes = after.attributes[after_node]
+            if before_attributes != after_attributes:
+                before_values = dict(before_attributes[1])
+                after_values = dict(after_attributes[1])
+                changes = {
+                    name: [before_values.get(name), after_values.get(name)]
+                    for name in sorted(set(before_values) | set(after_values))
+                    if before_values.get(name) != after_values.get(name)
+                }
+                result.changed.append({"path": after_path, "attributes": changes})
+                regions.extend((before_node, after_node))
+
+            before_children = list(before_node)
+            after_children = list(after_node)
+
+            # Identical subtrees first, then same (class, resource-id) in order
+            exact = {}
+            for position, child in enumerate(after_children):
+                exact.setdefault(after.subtree_hashes[child], deque()).append(position)
+            matched_after = [None] * len(before_children)
+            for position, child in enumerate(before_children):
+                candidates = exact.get(before.subtree_hashes[child])
+                if candidates:
+                    matched_after[position] = candidates.popleft()
+
+            used = set(position for position in matched_after if position is not None)
+            by_identity = {}
+            for position, child in enumerate(after_children):
+                if position not in used:
+                    by_identity.setdefault(identity_key(child), deque()).append(position)
+
+            pairs = []
+            for position, child in enumerate(before_children):
+                if matched_after[position] is not None:
+                    pairs.append((position, matched_after[position], True))
+                    continue
+                candidates = by_identity.get(identity_key(child))
+                if candidates:
+                    after_position = candidates.popleft()
+                    used.add(after_position)
+                    pairs.append((position, after_position, False))
+                else:
+                    removed.append((before_children[position], child_path(before_path, child)))
+
+            for position, child in enumerate(after_children):
+                if position not in used:
+                    added.append((child, child_path(after_path, child)))
+
+            moved_pairs = out_of_order([after_position for _, after_position, _ in pairs])
+            for pair_position, (before_position, after_position, identical) in enumerate(pairs):
+                before_child = before_children[before_position]
+                after_child = after_children[after_position]
+                if pair_position in moved_pairs:
+                    result.moved.append((child_path(before_path, before_child), child_path(after_path, after_child)))
+                    regions.extend((before_child, after_child))
+                if not identical:
+                    stack.append((before_child, after_child,
+                                  child_path(before_path, before_child), child_path(after_path, after_child)))
+
+        # A subtree removed in one place and added unchanged elsewhere moved
+        added_by_hash = {}
+        for element, path in added:
+            added_by_hash.setdefault(after.subtree_hashes[element], deque()).append((element, path))
+        for element, path in removed:
+            candidates = added_by_hash.get(before.subtree_hashes[element])
+            if candidates:
+                after_element, after_path = candidates.popleft()
+                result.moved.append((path, after_path))
+                regions.extend((element, after_element))
+            else:
+                result.removed.append(path)
+                regions.append(element)
+        for candidates in added_by_hash.values():
+            for element, path in candidates:
+                result.added.append(path)
+                regions.append(element)
+
+        result.added.sort()
+        result.bbox = union_bounds(regions)
+        return result
+
+def union_bounds(elements) -> tuple[int, int, int, int]:
+    bbox = None
+    for element in elements:
+        match = BOUNDS_PATTERN.search(element.attrib.get("bounds", ""))
+        if not match:
+            continue
+        x1, y1, x2, y2 = map(int, match.groups())
+        if bbox is None:
+            bbox = (x1, y1, x2, y2)
+        else:
+            bbox = (min(bbox[0], x1), min(bbox[1], y1), max(bbox[2], x2), max(bbox[3], y2))
+    return bbox
@@ -0,0 +1,27 @@
+import hashlib
+
+# Attributes that decide which elements are candidates and how they are addressed.
+# Text is left out on purpose so that clocks, counters and other live text do not
+# produce a new fingerprint for what is structurally the same screen. It keys the
+# candidate cache only; checked/selected state is ignored too, so it cannot tell
+# whether a restore really brought the screen back.
+STRUCTURAL_ATTRIBUTES = (
+    "class", "index", "resource-id", "content-desc", "bounds",
+    "clickable", "long-clickable", "scrollable", "horizontal", "displayed",
+)
+
+def hierarchy_fingerprint(root, attributes=STRUCTURAL_ATTRIBUTES) -> str:
+    """Hash the structure of a view hierarchy (node order, depth and structural attributes)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    stack = [(root, 0)]
+
+    while stack:
+        element, depth = stack.pop()
+        attrib = element.attrib
+        hasher.update(f"{depth}|{element.tag}|".encode("utf-8"))
+        hasher.update("|".join(attrib.get(name, "") for name in attributes).encode("utf-8"))
+        hasher.update(b"\n")
+
+        stack.extend((child, depth + 1) for child in reversed(element))
+
+    return hasher.hexdigest()
@@ -0,0 +1,148 @@
+import random
+import numpy as np
+from utils.node_table import VALID_BOUNDS
+
+# Rectangles are half-open pixel ranges [x1, x2) x [y1, y2), as Android reports bounds
+
+class ExclusiveRegion:
+    """Part of a target's bounds that none of the blocking rectangles cover.
+
+    Built by coordinate compression: the target is cut along every blocker edge
+    and each grid cell is either fully free or fully covered.
+    """
+    def __init__(self, bounds, blockers=()):
+        x1, y1, x2, y2 = bounds
+        if x2 <= x1 or y2 <= y1:
+            self.rects = np.zeros((0, 4), dtype=np.int64)
+            self.areas = np.zeros(0, dtype=np.int64)
+            return
+
+        blockers = np.asarray(blockers, dtype=np.int64).reshape(-1, 4)
+        if len(blockers):
+            blockers = np.column_stack((
+                np.clip(blockers[:, 0], x1, x2), np.clip(blockers[:, 1], y1, y2),
+                np.clip(blockers[:, 2], x1, x2), np.clip(blockers[:, 3], y1, y2),
+            ))
+            blockers = blockers[(blockers[:, 2] > blockers[:, 0]) & (blockers[:, 3] > blockers[:, 1])]
+
+        xs = np.unique(np.concatenate(([x1, x2], blockers[:, 0], blockers[:, 2])))
+        ys = np.unique(np.concatenate(([y1, y2], blockers[:, 1], blockers[:, 3])))
+
+        covered = np.zeros((len(ys) - 1, len(xs) - 1), dtype=bool)
+        column_starts = np.searchsorted(xs, blockers[:, 0])
+        column_ends = np.searchsorted(xs, blockers[:, 2])
+        row_starts = np.searchsorted(ys, blockers[:, 1])
+        row_ends = np.searchsorted(ys, blockers[:, 3])
+        for row_start, row_end, column_start, column_end in zip(row_starts, row_ends, column_starts, column_ends):
+            covered[row_start:row_end, column_start:column_end] = True
+
+        rows, columns = np.nonzero(~covered)
+        self.rects = np.column_stack((xs[columns], ys[rows], xs[columns + 1], ys[rows + 1]))
+        self.areas = (self.rects[:, 2] - self.rects[:, 0]) * (self.rects[:, 3] - self.rects[:, 1])
+
+    @property
+    def area(self) -> int:
+        return int(self.areas.sum())
+
+    def __bool__(self):
+        return len(self.rects) > 0
+
+    def contains(self, x, y) -> bool:
+        rects = self.rects
+        return bool(np.any((rects[:, 0] <= x) & (x < rects[:, 2]) & (rects[:, 1] <= y) & (y < rects[:, 3])))
+
+    def sample(self, count=1) -> np.ndarray:
+        """Draw count points uniformly from the free area, seeded from the random module"""
+        if not self:
+            return np.zeros((0, 2), dtype=np.int64)
+        rng = np.random.default_rng(random.getrandbits(64))
+        cells = rng.choice(len(self.rects), size=count, p=self.areas / self.areas.sum())
+        rects = self.rects[cells]
+        xs = rng.integers(rects[:, 0], rects[:, 2])
+        ys = rng.integers(rects[:, 1], rects[:, 3])
+        return np.column_stack((xs, ys))
+
+    def sample_point(self) -> tuple[int, int]:
+        if not self:
+            return None
+        x, y = self.sample(1)[0]
+        return int(x), int(y)
+
+class SpatialIndex:
+    """Uniform grid over the element bounds of a NodeTable.
+
+    Each cell lists the nodes overlapping it, so a point query only tests the
+    few nodes of one cell. Later nodes in document order are drawn on top.
+    """
+    def __init__(self, table, grid_size=32):
+        self.table = table
+        widths, heights = table.sizes()
+        valid = np.flatnonzero(table.has(VALID_BOUNDS) & (widths > 0) & (heights > 0))
+        bounds = table.bounds[valid].astype(np.int64)
+
+        if len(valid):
+            self.origin_x, self.origin_y = int(bounds[:, 0].min()), int(bounds[:, 1].min())
+            width = int(bounds[:, 2].max()) - self.origin_x
+            height = int(bounds[:, 3].max()) - self.origin_y
+        else:
+            self.origin_x = self.origin_y = 0
+            width = height = 1
+        self.cell_width = max(1, -(-width // grid_size))
+        self.cell_height = max(1, -(-height // grid_size))
+        self.columns = max(1, -(-width // self.cell_width))
+        self.rows = max(1, -(-height // self.cell_height))
+
+        column_starts, row_starts, column_ends, row_ends = self.cell_ranges(bounds)
+        cells = [[] for _ in range(self.rows * self.columns)]
+        for node_id, column_start, row_start, column_end, row_end in zip(
+                valid.tolist(), column_starts.tolist(), row_starts.tolist(), column_ends.tolist(), row_ends.tolist()):
+            for row in range(row_start, row_end + 1):
+                offset = row * self.columns
+                for column in range(column_start, column_end + 1):
+                    cells[offset + column].append(node_id)
+        self.cells = [np.array(node_ids, dtype=np.int32) for node_ids in cells]
+
+    def cell_ranges(self, bounds) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Inclusive cell column/row ranges touched by each half-open rectangle"""
+        bounds = np.asarray(bounds, dtype=np.int64).reshape(-1, 4)
+        column_starts = np.clip((bounds[:, 0] - self.origin_x) // self.cell_width, 0, self.columns - 1)
+        row_starts = np.clip((bounds[:, 1] - self.origin_y) // self.cell_height, 0, self.rows - 1)
+        column_ends = np.clip((bounds[:, 2] - 1 - self.origin_x) // self.cell_width, 0, self.columns - 1)
+        row_ends = np.clip((bounds[:, 3] - 1 - self.origin_y) // self.cell_height, 0, self.rows - 1)
+        return column_starts, row_starts, column_ends, row_ends
+
+    def nodes_at(self, x, y, mask=None) -> np.ndarray:
+        """Node ids whose bounds contain (x, y), in drawing order"""
+        column = (x - self.origin_x) // self.cell_width
+        row = (y - self.origin_y) // self.cell_height
+        if not (0 <= column < self.columns and 0 <= row < self.rows):
+            return np.zeros(0, dtype=np.int32)
+
+        node_ids = self.cells[row * self.columns + column]
+        bounds = self.table.bounds[node_ids]
+        hit = (bounds[:, 0] <= x) & (x < bounds[:, 2]) & (bounds[:, 1] <= y) & (y < bounds[:, 3])
+        if mask is not None:
+            hit &= mask[node_ids]
+        return node_ids[hit]
+
+    def element_at(self, x, y, mask=None) -> int:
+        """Topmost node at (x, y), optionally among the nodes selected by mask"""
+        node_ids = self.nodes_at(x, y, mask)
+        return int(node_ids[-1]) if len(node_ids) else None
+
+    def overlapping(self, bounds, mask=None) -> np.ndarray:
+        """Node ids whose bounds intersect the rectangle, in drawing order"""
+        x1, y1, x2, y2 = bounds
+        if x2 <= x1 or y2 <= y1:
+            return np.zeros(0, dtype=np.int32)
+        column_starts, row_starts, column_ends, row_ends = self.cell_ranges(bounds)
+        node_ids = np.unique(np.concatenate([
+            self.cells[row * self.columns + column]
+            for row in range(int(row_starts[0]), int(row_ends[0]) + 1)
+            for column in range(int(column_starts[0]), int(column_ends[0]) + 1)
+        ]))
+        candidates = self.table.bounds[node_ids]
+        hit = (candidates[:, 0] < x2) & (x1 < candidates[:, 2]) & (candidates[:, 1] < y2) & (y1 < candidates[:, 3])
+        if mask is not None:
+            hit &= mask[node_ids]
+        return node_ids[hit]
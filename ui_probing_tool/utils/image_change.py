@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from io import BytesIO
+import numpy as np
+from PIL import Image
+
+@dataclass
+class ImageChange:
+    changed: bool
+    score: float
+    hash_distance: int
+    mask: np.ndarray = None
+    bbox: tuple = None
+
+def open_frame(frame) -> Image.Image:
+    """PIL image of a StageCapture, PNG bytes, file path, numpy array or image"""
+    if hasattr(frame, "screenshot_png"):
+        frame = frame.screenshot_png
+    if isinstance(frame, (bytes, bytearray)):
+        return Image.open(BytesIO(frame))
+    if isinstance(frame, np.ndarray):
+        return Image.fromarray(frame)
+    if isinstance(frame, Image.Image):
+        return frame
+    return Image.open(frame)
+
+def difference_hash(gray, hash_size=8) -> int:
+    """dHash: sign of horizontal gradients on a (hash_size + 1) x hash_size thumbnail"""
+    thumbnail = np.asarray(gray.resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).flatten()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+class ImageChangeDetector:
+    """Screenshot comparison limited to the gesture target and done at reduced resolution.
+
+    The target bounds plus margin are cropped, box-downscaled by scale and
+    compared in grayscale with signed arithmetic. A large perceptual-hash
+    distance short-cuts the pixel diff.
+    """
+    def __init__(self, scale=4, margin=50, threshold=5.0, pixel_threshold=24, hash_size=8, hash_distance=12):
+        self.scale = scale
+        self.margin = margin
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.hash_size = hash_size
+        self.hash_distance = hash_distance
+
+    @classmethod
+    def from_config(cls, options=None) -> "ImageChangeDetector":
+        return cls(**dict(options or {}))
+
+    def region(self, size, bounds=None) -> tuple[int, int, int, int]:
+        width, height = size
+        if not bounds:
+            return 0, 0, width, height
+        x1, y1, x2, y2 = bounds
+        x1, y1 = max(0, x1 - self.margin), max(0, y1 - self.margin)
+        x2, y2 = min(width, x2 + self.margin), min(height, y2 + self.margin)
+        if x2 <= x1 or y2 <= y1:
+            return 0, 0, width, height
+        return x1, y1, x2, y2
+
+    def prepare(self, frame, region) -> Image.Image:
+        image = open_frame(frame).crop(region)
+        if self.scale > 1:
+            image = image.reduce(self.scale)
+        return image.convert("L")
+
+    def compare(self, before, after, bounds=None) -> ImageChange:
+        before_image = open_frame(before)
+        after_image = open_frame(after)
+        if before_image.size != after_image.size:
+            return ImageChange(True, float("inf"), self.hash_size * self.hash_size)
+
+        region = self.region(before_image.size, bounds)
+        before_gray = self.prepare(before_image, region)
+        after_gray = self.prepare(after_image, region)
+        return self.compare_prepared(before_gray, after_gray, region)
+
+    def compare_prepared(self, before_gray, after_gray, region) -> ImageChange:
+        distance = bin(difference_hash(before_gray, self.hash_size) ^ difference_hash(after_gray, self.hash_size)).count("1")
+
+        difference = np.abs(np.asarray(before_gray, dtype=np.int16) - np.asarray(after_gray, dtype=np.int16))
+        score = float(difference.mean()) if difference.size else 0.0
+        mask = difference > self.pixel_threshold
+
+        bbox = None
+        rows = np.flatnonzero(mask.any(axis=1))
+        columns = np.flatnonzero(mask.any(axis=0))
+        if len(rows):
+            scale = max(1, self.scale)
+            bbox = (region[0] + int(columns[0]) * scale, region[1] + int(rows[0]) * scale,
+                    min(region[2], region[0] + (int(columns[-1]) + 1) * scale),
+                    min(region[3], region[1] + (int(rows[-1]) + 1) * scale))
+
+        changed = distance >= self.hash_distance or score > self.threshold
+        return ImageChange(changed, score, distance, mask, bbox)
+
+    def compare_stages(self, before, after, during=None, bounds=None) -> ImageChange:
+        """Change after the gesture, or failing that during it; before is decoded only once"""
+        before_image = open_frame(before)
+        region = self.region(before_image.size, bounds)
+        before_gray = self.prepare(before_image, region)
+
+        change = None
+        for other in (after, during):
+            if other is None:
+                continue
+            other_image = open_frame(other)
+            if other_image.size != before_image.size:
+                return ImageChange(True, float("inf"), self.hash_size * self.hash_size)
+            change = self.compare_prepared(before_gray, self.prepare(other_image, region), region)
+            if change.changed:
+                return change
+        return change
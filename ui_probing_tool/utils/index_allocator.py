@@ -0,0 +1,84 @@
+import heapq
+import os
+import threading
+
+STAGING_SUFFIX = ".staging"
+
+def staging_name(index) -> str:
+    return f".{index}{STAGING_SUFFIX}"
+
+class IndexAllocator:
+    """Hand out sample indices per action directory without listing it each time.
+
+    The directory is scanned once to seed a counter. Each index is then reserved
+    with an exclusive mkdir, so writers in other processes never get the same
+    one, and released indices are handed out again lowest first.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.next_index = {}
+        self.released = {}
+
+    def scan(self, action_dir) -> int:
+        """Next free index on disk, counting samples still being committed (.N.staging)"""
+        next_index = 0
+        with os.scandir(action_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") and name.endswith(STAGING_SUFFIX):
+                    name = name[1:-len(STAGING_SUFFIX)]
+                if name.isdigit():
+                    next_index = max(next_index, int(name) + 1)
+        return next_index
+
+    def claim(self, action_dir, staged=False) -> tuple[int, str]:
+        """Reserve an index and return (index, path).
+
+        The exclusive mkdir of .N.staging is the reservation for every writer. A
+        staged sample is written there and renamed to N later; otherwise the empty
+        directory is renamed to N right away.
+        """
+        with self.lock:
+            if action_dir not in self.next_index:
+                os.makedirs(action_dir, exist_ok=True)
+                self.next_index[action_dir] = self.scan(action_dir)
+            released = self.released.setdefault(action_dir, [])
+
+            while True:
+                if released:
+                    index = heapq.heappop(released)
+                else:
+                    index = self.next_index[action_dir]
+                    self.next_index[action_dir] += 1
+
+                index_dir = os.path.join(action_dir, str(index))
+                if os.path.exists(index_dir):
+                    continue
+
+                staging_dir = os.path.join(action_dir, staging_name(index))
+                try:
+                    os.mkdir(staging_dir)
+                except FileExistsError:
+                    # Another writer holds this index
+                    continue
+                except FileNotFoundError:
+                    os.makedirs(action_dir, exist_ok=True)
+                    heapq.heappush(released, index)
+                    continue
+
+                # A staged sample may have been published as N just before our mkdir
+                if os.path.exists(index_dir):
+                    os.rmdir(staging_dir)
+                    continue
+
+                if staged:
+                    return index, staging_dir
+                os.rename(staging_dir, index_dir)
+                return index, index_dir
+
+    def release(self, action_dir, index) -> None:
+        """Make a deleted sample's index available again"""
+        with self.lock:
+            released = self.released.setdefault(action_dir, [])
+            if index not in released:
+                heapq.heappush(released, index)
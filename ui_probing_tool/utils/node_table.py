@@ -0,0 +1,177 @@
+import re
+import numpy as np
+
+BOUNDS_PATTERN = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+
+# Flag bits, one per boolean node attribute
+CLICKABLE = 1 << 0
+LONG_CLICKABLE = 1 << 1
+SCROLLABLE = 1 << 2
+CHECKABLE = 1 << 3
+CHECKED = 1 << 4
+FOCUSABLE = 1 << 5
+FOCUSED = 1 << 6
+SELECTED = 1 << 7
+ENABLED = 1 << 8
+EDITABLE = 1 << 9
+PASSWORD = 1 << 10
+DISPLAYED = 1 << 11
+HORIZONTAL = 1 << 12
+HAS_BOUNDS = 1 << 13
+VALID_BOUNDS = 1 << 14
+
+TRUE_FLAGS = (
+    ("clickable", CLICKABLE),
+    ("long-clickable", LONG_CLICKABLE),
+    ("scrollable", SCROLLABLE),
+    ("checkable", CHECKABLE),
+    ("checked", CHECKED),
+    ("focusable", FOCUSABLE),
+    ("focused", FOCUSED),
+    ("selected", SELECTED),
+    ("editable", EDITABLE),
+    ("password", PASSWORD),
+    ("horizontal", HORIZONTAL),
+)
+
+# Attributes that count as set unless they are explicitly "false"
+DEFAULT_TRUE_FLAGS = (
+    ("enabled", ENABLED),
+    ("displayed", DISPLAYED),
+)
+
+class NodeTable:
+    """Struct-of-arrays view of a parsed hierarchy, built once and shared by its consumers.
+
+    Nodes are numbered in document (pre-order) order, so the descendants of node i
+    are exactly the nodes i+1 .. subtree_end[i]-1.
+    """
+    __slots__ = (
+        "elements", "node_ids", "bounds", "flags", "parent", "depth", "subtree_end",
+        "child_offsets", "child_ids", "post_order", "class_ids", "resource_ids", "desc_ids", "strings",
+    )
+
+    def __init__(self, root):
+        elements = []
+        parents = []
+        depths = []
+        stack = [(root, -1, 0)]
+        while stack:
+            element, parent_id, depth = stack.pop()
+            elements.append(element)
+            parents.append(parent_id)
+            depths.append(depth)
+            node_id = len(elements) - 1
+            for child_position in range(len(element) - 1, -1, -1):
+                stack.append((element[child_position], node_id, depth + 1))
+
+        count = len(elements)
+        self.elements = elements
+        self.node_ids = {element: node_id for node_id, element in enumerate(elements)}
+        self.parent = np.array(parents, dtype=np.int32)
+        self.depth = np.array(depths, dtype=np.int32)
+        self.bounds = np.zeros((count, 4), dtype=np.int32)
+        self.flags = np.zeros(count, dtype=np.uint16)
+        self.class_ids = np.zeros(count, dtype=np.int32)
+        self.resource_ids = np.zeros(count, dtype=np.int32)
+        self.desc_ids = np.zeros(count, dtype=np.int32)
+
+        string_ids = {}
+        strings = []
+        def intern(value):
+            string_id = string_ids.get(value)
+            if string_id is None:
+                string_id = string_ids[value] = len(strings)
+                strings.append(value)
+            return string_id
+
+        for node_id, element in enumerate(elements):
+            attrib = element.attrib
+            flags = 0
+            for name, bit in TRUE_FLAGS:
+                if attrib.get(name) == "true":
+                    flags |= bit
+            for name, bit in DEFAULT_TRUE_FLAGS:
+                if attrib.get(name) != "false":
+                    flags |= bit
+
+            bounds_str = attrib.get("bounds")
+            if bounds_str is not None:
+                flags |= HAS_BOUNDS
+                match = BOUNDS_PATTERN.search(bounds_str)
+                if match:
+                    flags |= VALID_BOUNDS
+                    self.bounds[node_id] = tuple(map(int, match.groups()))
+
+            self.flags[node_id] = flags
+            self.class_ids[node_id] = intern(attrib.get("class", ""))
+            self.resource_ids[node_id] = intern(attrib.get("resource-id", ""))
+            self.desc_ids[node_id] = intern(attrib.get("content-desc", ""))
+
+        self.strings = strings
+
+        # Subtree ranges and CSR child lists follow from the pre-order numbering
+        subtree_end = np.arange(1, count + 1, dtype=np.int32)
+        child_counts = np.zeros(count, dtype=np.int32)
+        for node_id in range(count - 1, 0, -1):
+            parent_id = parents[node_id]
+            child_counts[parent_id] += 1
+            if subtree_end[node_id] > subtree_end[parent_id]:
+                subtree_end[parent_id] = subtree_end[node_id]
+        self.subtree_end = subtree_end
+
+        self.child_offsets = np.zeros(count + 1, dtype=np.int32)
+        np.cumsum(child_counts, out=self.child_offsets[1:])
+        fill = self.child_offsets[:-1].copy()
+        self.child_ids = np.zeros(max(count - 1, 0), dtype=np.int32)
+        for node_id in range(1, count):
+            parent_id = parents[node_id]
+            self.child_ids[fill[parent_id]] = node_id
+            fill[parent_id] += 1
+
+        post_order = []
+        stack = [(0, False)]
+        while count and stack:
+            node_id, children_done = stack.pop()
+            if children_done:
+                post_order.append(node_id)
+                continue
+            stack.append((node_id, True))
+            children = self.child_ids[self.child_offsets[node_id]:self.child_offsets[node_id + 1]]
+            stack.extend((int(child_id), False) for child_id in children[::-1])
+        self.post_order = np.array(post_order, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def node_id(self, element) -> int:
+        return self.node_ids[element]
+
+    def has(self, bit) -> np.ndarray:
+        return (self.flags & bit) != 0
+
+    def string_mask(self, string_ids, predicate) -> np.ndarray:
+        """Evaluate predicate once per distinct interned string and spread it over the nodes"""
+        lookup = np.fromiter((predicate(value) for value in self.strings), dtype=bool, count=len(self.strings))
+        return lookup[string_ids]
+
+    def keyword_mask(self, string_ids, keywords) -> np.ndarray:
+        """Nodes whose lower-cased string contains any of the keywords"""
+        return self.string_mask(string_ids, lambda value: any(keyword in value.lower() for keyword in keywords))
+
+    def ids_in_post_order(self, mask) -> np.ndarray:
+        return self.post_order[mask[self.post_order]]
+
+    def children(self, node_id) -> np.ndarray:
+        return self.child_ids[self.child_offsets[node_id]:self.child_offsets[node_id + 1]]
+
+    def descendants(self, node_id) -> range:
+        return range(node_id + 1, int(self.subtree_end[node_id]))
+
+    def bounds_of(self, node_id) -> tuple[int, int, int, int]:
+        if not self.flags[node_id] & VALID_BOUNDS:
+            return None
+        return tuple(int(value) for value in self.bounds[node_id])
+
+    def sizes(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.bounds[:, 2] - self.bounds[:, 0], self.bounds[:, 3] - self.bounds[:, 1]
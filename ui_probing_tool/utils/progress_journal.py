@@ -0,0 +1,87 @@
+import json
+import os
+import time
+
+class ProgressJournal:
+    """Append-only record of completed element tests for one app.
+
+    Every finished (screen, action/path) test is one JSON line. Lines are flushed
+    right away and fsynced in batches; the file is periodically compacted to keep
+    only the latest record per test. A line cut short by a crash is skipped on replay.
+    """
+    def __init__(self, progress_dir, fsync_every=20, compact_every=5000):
+        self.path = os.path.join(progress_dir, "progress_journal.jsonl")
+        self.fsync_every = fsync_every
+        self.compact_every = compact_every
+        self.file = None
+        self.unsynced = 0
+        self.appended = 0
+
+    def append(self, screen_name, action_path, outcome=None, sample_dir=None, duration=None) -> None:
+        record = {
+            "screen": screen_name,
+            "action_path": action_path,
+            "outcome": outcome,
+            "sample_dir": sample_dir,
+            "duration": round(duration, 3) if duration is not None else None,
+            "timestamp": time.time(),
+        }
+
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+        self.unsynced += 1
+        self.appended += 1
+        if self.unsynced >= self.fsync_every:
+            self.sync()
+        if self.appended >= self.compact_every:
+            self.compact()
+
+    def sync(self) -> None:
+        if self.file is not None and self.unsynced:
+            os.fsync(self.file.fileno())
+        self.unsynced = 0
+
+    def read_records(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"⚠️ Skipping damaged progress journal line in {self.path}")
+                    continue
+                yield record
+
+    def replay(self) -> dict:
+        visited_paths_by_screen = {}
+        for record in self.read_records():
+            visited_paths_by_screen.setdefault(record["screen"], set()).add(record["action_path"])
+        return visited_paths_by_screen
+
+    def compact(self) -> None:
+        latest = {}
+        for record in self.read_records():
+            latest[(record["screen"], record["action_path"])] = record
+
+        self.close()
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for record in latest.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+        self.appended = 0
+        print(f"🗜️ Progress journal compacted: {len(latest)} records")
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
@@ -0,0 +1,206 @@
+import os
+import json
+import hashlib
+from utils.artifact_pipeline import ArtifactPipeline
+from utils.blob_store import BlobStore
+from utils.bounding_box import get_center_point
+from utils.data_saver import DataSaver
+from utils.stage_capture import StageCapture
+
+ARTIFACT_KINDS = ("html", "vh", "annotated")
+STAGES = ("before", "during", "after")
+
+def sample_dirs(dataset_dir):
+    """dataset/<package>/<screen>/<gesture>/<index> directories, skipping staging and hidden ones"""
+    for root, dirs, files in os.walk(dataset_dir):
+        dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+        if os.path.basename(root).isdigit() and "before.xml" in files:
+            yield root
+
+def file_signature(path, previous=None) -> dict:
+    """Size, mtime and content hash of an input; the hash is reused while size and mtime are unchanged"""
+    info = os.stat(path)
+    if previous and previous.get("size") == info.st_size and previous.get("mtime_ns") == info.st_mtime_ns:
+        return previous
+
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": hasher.hexdigest()}
+
+def stage_names(sample_dir) -> list[str]:
+    return [stage for stage in STAGES if os.path.exists(os.path.join(sample_dir, f"{stage}.xml"))]
+
+class RecordingDataSaver(DataSaver):
+    """DataSaver that remembers which files it wrote, since writer errors are only printed"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.written = set()
+
+    def _write_bytes(self, path, data) -> None:
+        super()._write_bytes(path, data)
+        self.written.add(path)
+
+class SampleReprocessor:
+    """Rebuild derived artifacts of stored samples from their XML, screenshot and action.json.
+
+    Each artifact kind of a sample has a manifest entry with the generator version,
+    options and input signatures it was built from. A kind is skipped while all of
+    these still match and its outputs exist.
+    """
+    def __init__(self, dataset_dir="dataset", kinds=ARTIFACT_KINDS, vh_format="json", blob_dir=None, force=False):
+        self.dataset_dir = dataset_dir
+        self.kinds = tuple(kinds)
+        self.vh_format = vh_format
+        self.blob_dir = blob_dir
+        self.force = force
+        self._data_saver = None
+
+    @property
+    def data_saver(self) -> RecordingDataSaver:
+        # Built lazily so the reprocessor can be pickled into pool workers
+        if self._data_saver is None:
+            self._data_saver = RecordingDataSaver(base_dir=self.dataset_dir, pipeline=ArtifactPipeline(workers=0),
+                                                  vh_format=self.vh_format,
+                                                  blob_store=BlobStore(self.blob_dir) if self.blob_dir else None)
+        return self._data_saver
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state["_data_saver"] = None
+        return state
+
+    def inputs(self, kind, sample_dir) -> list[str]:
+        stages = stage_names(sample_dir)
+        if kind == "annotated":
+            names = ["before.png", "before.xml", "action.json", "path.txt"]
+        else:
+            names = [f"{stage}.xml" for stage in stages]
+        return [name for name in names if os.path.exists(os.path.join(sample_dir, name))]
+
+    def outputs(self, kind, sample_dir) -> list[str]:
+        if kind == "html":
+            return [f"{stage}.html" for stage in stage_names(sample_dir)]
+        if kind == "vh":
+            extension = "vhc" if self.vh_format == "compact" else "vh"
+            return [f"{stage}.{extension}" for stage in stage_names(sample_dir)]
+        return ["before_annotated.png", "before_annotated_with_children.png"]
+
+    def options(self, kind) -> dict:
+        return {"vh_format": self.vh_format} if kind == "vh" else {}
+
+    def process(self, sample_dir, previous=None) -> tuple[dict, dict]:
+        """Rebuild what is out of date; returns (manifest entries, {kind: "built"|"skipped"|error message})"""
+        previous = previous or {}
+        entries = {}
+        results = {}
+
+        for kind in self.kinds:
+            old_entry = previous.get(kind) or {}
+            old_inputs = old_entry.get("inputs", {})
+            try:
+                signatures = {name: file_signature(os.path.join(sample_dir, name), old_inputs.get(name))
+                              for name in self.inputs(kind, sample_dir)}
+                entry = {
+                    "version": DataSaver.ARTIFACT_VERSIONS[kind],
+                    "options": self.options(kind),
+                    "inputs": signatures,
+                    "outputs": self.outputs(kind, sample_dir),
+                }
+
+                up_to_date = (
+                    not self.force
+                    and old_entry.get("version") == entry["version"]
+                    and old_entry.get("options") == entry["options"]
+                    and {name: signature["sha256"] for name, signature in old_inputs.items()}
+                        == {name: signature["sha256"] for name, signature in signatures.items()}
+                    and all(os.path.exists(os.path.join(sample_dir, name)) for name in old_entry.get("outputs", []))
+                )
+                if up_to_date:
+                    # Keep the refreshed stat signatures so the next run does not hash again
+                    entry["outputs"] = old_entry["outputs"]
+                    entries[kind] = entry
+                    results[kind] = "skipped"
+                    continue
+
+                entry["outputs"] = self.rebuild(kind, sample_dir)
+                entries[kind] = entry
+                results[kind] = "built"
+            except Exception as e:
+                results[kind] = f"{type(e).__name__}: {e}"
+
+        return entries, results
+
+    def rebuild(self, kind, sample_dir) -> list[str]:
+        """Write the artifacts of one kind and return the output names that were written"""
+        data_saver = self.data_saver
+        data_saver.current_index_dir = sample_dir
+        data_saver.written = set()
+        expected = self.outputs(kind, sample_dir)
+
+        if kind == "annotated":
+            self.rebuild_annotations(sample_dir)
+            # The children overlay is optional, the plain annotation is not
+            expected = expected[:1]
+        else:
+            for stage in stage_names(sample_dir):
+                capture = self.load_capture(sample_dir, stage, screenshot=False)
+                if kind == "html":
+                    data_saver.save_html_hierarchy(capture)
+                else:
+                    data_saver.save_simplified_view_hierarchy(capture)
+                    # Drop the other format so a sample never carries two versions
+                    other = "vh" if self.vh_format == "compact" else "vhc"
+                    stale_path = os.path.join(sample_dir, f"{stage}.{other}")
+                    if os.path.exists(stale_path):
+                        os.remove(stale_path)
+
+        written = [name for name in self.outputs(kind, sample_dir) if os.path.join(sample_dir, name) in data_saver.written]
+        missing = [name for name in expected if name not in written]
+        if missing:
+            raise RuntimeError(f"not written: {', '.join(missing)}")
+        return written
+
+    def load_capture(self, sample_dir, stage, screenshot=True) -> StageCapture:
+        with open(os.path.join(sample_dir, f"{stage}.xml"), "r", encoding="utf-8") as f:
+            xml_source = f.read()
+        screenshot_png = None
+        if screenshot:
+            with open(os.path.join(sample_dir, f"{stage}.png"), "rb") as f:
+                screenshot_png = f.read()
+        return StageCapture(stage, xml_source, screenshot_png)
+
+    def rebuild_annotations(self, sample_dir) -> None:
+        with open(os.path.join(sample_dir, "action.json"), "r", encoding="utf-8") as f:
+            action_data = json.load(f)
+
+        target_element_path = None
+        path_file = os.path.join(sample_dir, "path.txt")
+        if os.path.exists(path_file):
+            with open(path_file, "r", encoding="utf-8") as f:
+                target_element_path = f.read()
+
+        # Same points the automator used: tap_point for taps, the target center for gestures
+        gesture = action_data["gesture"]
+        bounds = action_data.get("bounds")
+        point = action_data.get("tap_point") or action_data.get("start_point")
+        start_point = tuple(point) if point else get_center_point(bounds)
+        end_point = tuple(action_data["end_point"]) if action_data.get("end_point") else None
+
+        data_saver = self.data_saver
+        data_saver.action_data = action_data
+        capture = self.load_capture(sample_dir, "before")
+        data_saver.save_annotated_screenshots(gesture, capture, start_point, bounds, end_point, target_element_path)
+
+def load_manifest(path) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+from utils.element_template import TEMPLATE_FLAGS, element_templates
+
+# Candidate priorities, lowest first
+UNTESTED = 0    # the gesture was never tried on this element in any state
+PROMISING = 1   # it led to a state that is not fully explored yet
+KNOWN = 2       # it only led back to the same or to fully explored states
+
+def state_fingerprint(root) -> str:
+    """Canonical fingerprint of a screen state.
+
+    Only the class, resource-id and gesture flags of each node and the shape of
+    the tree count. Text, descriptions and bounds are ignored, and runs of
+    identical siblings are collapsed, so a list that shows more rows, a scrolled
+    offset or a clock tick do not make a new state.
+    """
+    shapes = {}
+    stack = [(root, False)]
+    while stack:
+        element, children_done = stack.pop()
+        if not children_done:
+            stack.append((element, True))
+            stack.extend((child, False) for child in element)
+            continue
+
+        attrib = element.attrib
+        flags = "".join("1" if attrib.get(flag) == "true" else "0" for flag in TEMPLATE_FLAGS)
+        hasher = hashlib.blake2b(f"{attrib.get('class', element.tag)}|{attrib.get('resource-id', '')}|{flags}".encode("utf-8"),
+                                 digest_size=16)
+        previous = None
+        for child in element:
+            if shapes[child] != previous:
+                hasher.update(shapes[child])
+                previous = shapes[child]
+        shapes[element] = hasher.digest()
+
+    return shapes[root].hex()
+
+def element_keys(root) -> dict:
+    """Identity of every element as a gesture target across states.
+
+    The key combines the element's structural template with the text and
+    descriptions of its subtree, so two rows built from the same layout only
+    share a key when they also show the same content.
+    """
+    templates = element_templates(root)
+    contents = {}
+    stack = [(root, False)]
+    while stack:
+        element, children_done = stack.pop()
+        if not children_done:
+            stack.append((element, True))
+            stack.extend((child, False) for child in element)
+            continue
+
+        attrib = element.attrib
+        hasher = hashlib.blake2b(f"{attrib.get('content-desc', '')}|{attrib.get('text', '')}".encode("utf-8"), digest_size=12)
+        for child in element:
+            hasher.update(contents[child])
+        contents[element] = hasher.digest()
+
+    return {element: hashlib.blake2b(template.encode("utf-8") + contents[element], digest_size=12).hexdigest()
+            for element, template in templates.items()}
+
+class ScreenGraph:
+    """Screen states of an app and the gesture transitions between them.
+
+    Nodes are canonical state fingerprints, with the configured screens they were
+    seen on and whether all their candidates have been tested. Edges are keyed by
+    (state, action, element key) and record the state the gesture led to, the
+    outcome and how often it was seen. The graph is saved as JSON so later runs
+    build on it.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.states = {}
+        self.edges = {}
+        self.by_gesture = {}
+        self.new_edges = 0
+        self.cached_root = None
+        self.cached_state = None
+        self.keys_root = None
+        self.keys = None
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.states = data.get("states", {})
+            for edge in data.get("edges", []):
+                self.add_edge(edge)
+
+    def add_edge(self, edge) -> None:
+        edge_key = f"{edge['from']}|{edge['action']}|{edge['element']}"
+        self.edges[edge_key] = edge
+        self.by_gesture.setdefault(f"{edge['action']}|{edge['element']}", set()).add(edge_key)
+
+    def state_of(self, root) -> str:
+        if self.cached_root is not root:
+            self.cached_state = state_fingerprint(root)
+            self.cached_root = root
+        return self.cached_state
+
+    def element_keys(self, root) -> dict:
+        """Element key of every element of a hierarchy"""
+        if self.keys_root is not root:
+            self.keys = element_keys(root)
+            self.keys_root = root
+        return self.keys
+
+    def observe(self, state, screen_name) -> None:
+        entry = self.states.setdefault(state, {"screens": [], "explored": False})
+        if screen_name not in entry["screens"]:
+            entry["screens"].append(screen_name)
+
+    def is_explored(self, state) -> bool:
+        return self.states.get(state, {}).get("explored", False)
+
+    def mark_explored(self, state) -> None:
+        self.states.setdefault(state, {"screens": [], "explored": False})["explored"] = True
+
+    def known(self, state, action, key) -> bool:
+        return f"{state}|{action}|{key}" in self.edges
+
+    def priority(self, action, key) -> int:
+        edges = [self.edges[edge_key] for edge_key in self.by_gesture.get(f"{action}|{key}", ())]
+        if not edges:
+            return UNTESTED
+        if any(edge["to"] != edge["from"] and not self.is_explored(edge["to"]) for edge in edges):
+            return PROMISING
+        return KNOWN
+
+    def record(self, from_state, action, key, to_state, outcome) -> None:
+        edge_key = f"{from_state}|{action}|{key}"
+        edge = self.edges.get(edge_key)
+        if edge is None:
+            self.add_edge({"from": from_state, "action": action, "element": key, "to": to_state, "outcome": outcome, "count": 1})
+            self.new_edges += 1
+        else:
+            edge.update(to=to_state, outcome=outcome, count=edge["count"] + 1)
+        self.states.setdefault(to_state, {"screens": [], "explored": False})
+
+    def summary(self) -> dict:
+        targets = {edge["to"] for edge in self.edges.values() if edge["to"] != edge["from"]}
+        return {
+            "states": len(self.states),
+            "explored_states": sum(1 for entry in self.states.values() if entry["explored"]),
+            "transitions": len(self.edges),
+            "state_changes": sum(1 for edge in self.edges.values() if edge["to"] != edge["from"]),
+            "reached_states": len(targets),
+            "new_transitions": self.new_edges,
+        }
+
+    def save(self) -> str:
+        if not self.path:
+            return None
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"states": self.states, "edges": list(self.edges.values())}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        return self.path
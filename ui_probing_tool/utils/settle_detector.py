@@ -0,0 +1,94 @@
+import hashlib
+import time
+from utils.timing_stats import TimingStats
+
+def page_source_probe(driver) -> bytes:
+    return driver.page_source.encode("utf-8")
+
+def screenshot_probe(driver) -> bytes:
+    return driver.get_screenshot_as_png()
+
+def focused_window_probe(driver) -> bytes:
+    output = driver.execute_script(
+        'mobile: shell', {
+            'command': 'dumpsys window | grep -E "mCurrentFocus|mFocusedApp"'
+        }
+    )
+    return str(output).encode("utf-8")
+
+PROBES = {
+    "page_source": page_source_probe,
+    "screenshot": screenshot_probe,
+    "focused_window": focused_window_probe,
+}
+
+class SettleDetector:
+    """Wait until the screen stops changing, comparing probe digests polled with backoff.
+
+    The screen is considered settled once the digest has stayed identical for at least
+    `quiescence` seconds and `min_stable_polls` consecutive polls.
+    """
+    def __init__(self, driver, probes=("page_source",), quiescence=1.0, min_stable_polls=2,
+                 initial_interval=0.1, max_interval=1.0, backoff=1.5, timeout=20):
+        unknown = [name for name in probes if name not in PROBES]
+        if unknown:
+            raise ValueError(f"❌ Unknown settle probes: {unknown}")
+
+        self.driver = driver
+        self.probes = [PROBES[name] for name in probes]
+        self.quiescence = quiescence
+        self.min_stable_polls = min_stable_polls
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = TimingStats()
+
+    @classmethod
+    def from_config(cls, driver, options=None) -> "SettleDetector":
+        options = dict(options or {})
+        if "probes" in options:
+            options["probes"] = tuple(options["probes"])
+        return cls(driver, **options)
+
+    def digest(self) -> bytes:
+        hasher = hashlib.blake2b(digest_size=16)
+        for probe in self.probes:
+            hasher.update(probe(self.driver))
+        return hasher.digest()
+
+    def wait(self, timeout=None, key=None) -> bool:
+        timeout = self.timeout if timeout is None else timeout
+        start_time = time.monotonic()
+        interval = self.initial_interval
+        previous_digest = None
+        stable_since = None
+        stable_polls = 0
+
+        while True:
+            current_digest = self.digest()
+            now = time.monotonic()
+
+            if current_digest == previous_digest:
+                stable_polls += 1
+                if stable_polls >= self.min_stable_polls and now - stable_since >= self.quiescence:
+                    elapsed = now - start_time
+                    self.stats.record(key or "unknown", elapsed)
+                    print(f"✅ Screen loaded successfully (Time taken: {elapsed:.2f} seconds)")
+                    return True
+            else:
+                previous_digest = current_digest
+                stable_since = now
+                stable_polls = 0
+                interval = self.initial_interval
+
+            remaining = timeout - (now - start_time)
+            if remaining <= 0:
+                break
+
+            time.sleep(min(interval, remaining))
+            interval = min(interval * self.backoff, self.max_interval)
+
+        self.stats.record(key or "unknown", time.monotonic() - start_time)
+        print(f"❌ Screen loading timeout ({timeout} seconds)")
+        return False
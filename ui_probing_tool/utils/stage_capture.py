@@ -0,0 +1,32 @@
+import threading
+from io import BytesIO
+from xml.etree import ElementTree
+from PIL import Image
+from utils.node_table import NodeTable
+
+class StageCapture:
+    """Screenshot and view hierarchy of a single stage, fetched and parsed once."""
+    def __init__(self, stage, xml_source, screenshot_png):
+        self.stage = stage
+        self.xml_source = xml_source
+        self.screenshot_png = screenshot_png
+        self.root = ElementTree.fromstring(xml_source)
+        self._table = None
+        self._table_lock = threading.Lock()
+
+    @classmethod
+    def take(cls, driver, stage) -> "StageCapture":
+        screenshot_png = driver.get_screenshot_as_png()
+        xml_source = driver.page_source
+        return cls(stage, xml_source, screenshot_png)
+
+    @property
+    def table(self) -> NodeTable:
+        """Node table of the hierarchy, built on first use and shared by the writers"""
+        with self._table_lock:
+            if self._table is None:
+                self._table = NodeTable(self.root)
+            return self._table
+
+    def open_image(self) -> Image.Image:
+        return Image.open(BytesIO(self.screenshot_png))
@@ -0,0 +1,232 @@
+import random
+from xml.etree import ElementTree
+
+XML_DECLARATION = "<?xml version='1.0' encoding='UTF-8' standalone='yes' ?>\n"
+
+# Attribute order of a UiAutomator2 page source
+BOOLEAN_ATTRIBUTES = ("checkable", "checked", "clickable", "enabled", "focusable", "focused", "long-clickable",
+                      "password", "scrollable", "selected")
+
+WRAPPER_CLASSES = ("android.widget.FrameLayout", "android.widget.LinearLayout",
+                   "androidx.coordinatorlayout.widget.CoordinatorLayout", "android.view.ViewGroup")
+TOOLBAR_HEIGHT = 144
+NAVIGATION_HEIGHT = 120
+RECYCLER_CLASS = "androidx.recyclerview.widget.RecyclerView"
+WEBVIEW_LEAVES = (
+    # class, leaf height, clickable, text
+    ("android.widget.TextView", 48, False, "Lorem ipsum dolor sit amet"),
+    ("android.widget.TextView", 48, False, "Updated 5 min ago"),
+    ("android.view.View", 48, True, "Read more"),
+    ("android.widget.Button", 96, True, "Subscribe"),
+    ("android.widget.Image", 240, False, ""),
+    ("android.widget.EditText", 96, True, ""),
+)
+
+class SyntheticHierarchy:
+    """UiAutomator2-style page source of a given size, for benchmarks.
+
+    The screen has the usual decor views, a toolbar and a bottom navigation bar
+    around a content area nested `depth` layouts deep. The content holds sections
+    of RecyclerViews with `recycler_fanout` rows (some rows are horizontal
+    carousels) and, for hybrid apps, a WebView whose DOM takes `webview_fraction`
+    of the nodes and reaches `webview_depth` levels. Bounds follow a simple flow
+    layout, so lists and the WebView document extend below the screen as on a
+    device. The same arguments always give the same XML.
+    """
+    def __init__(self, nodes=1000, depth=8, recycler_fanout=20, webview_fraction=0.0, webview_depth=30, seed=0,
+                 width=1080, height=2400, package="com.example.synthetic"):
+        self.target = nodes
+        self.depth = depth
+        self.recycler_fanout = max(1, recycler_fanout)
+        self.webview_fraction = webview_fraction
+        self.webview_depth = max(1, webview_depth)
+        self.random = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.package = package
+
+        # Nodes in creation order; a parent is always created before its children
+        self.parents = []
+        self.attributes = []
+        self.orientation = []
+        self.leaf_height = []
+        self.viewport = []
+        self.children = []
+
+    def remaining(self) -> int:
+        return self.target - len(self.parents)
+
+    def add(self, parent, class_name, orientation="v", height=0, viewport=False, resource_id="", text="", desc="", **flags) -> int:
+        """Append a node; leaves take `height`, and so do viewports, whose content may overflow it"""
+        attributes = {"class": class_name, "text": text, "resource-id": f"{self.package}:id/{resource_id}" if resource_id else "",
+                      "content-desc": desc}
+        for name in BOOLEAN_ATTRIBUTES:
+            attributes[name] = flags.get(name.replace("-", "_"), name == "enabled")
+
+        node_id = len(self.parents)
+        self.parents.append(parent)
+        self.attributes.append(attributes)
+        self.orientation.append(orientation)
+        self.leaf_height.append(height)
+        self.viewport.append(viewport)
+        self.children.append([])
+        if parent is not None:
+            self.children[parent].append(node_id)
+        return node_id
+
+    def generate(self) -> str:
+        decor = self.add(None, "android.widget.FrameLayout")
+        frame = self.add(decor, "android.widget.LinearLayout")
+        content = self.add(frame, "android.widget.FrameLayout", resource_id="content")
+        app_root = self.add(content, "android.widget.LinearLayout", resource_id="main_layout")
+
+        toolbar = self.add(app_root, "androidx.appcompat.widget.Toolbar", orientation="h", resource_id="toolbar")
+        self.add(toolbar, "android.widget.ImageButton", height=TOOLBAR_HEIGHT, desc="Navigate up", clickable=True, focusable=True)
+        self.add(toolbar, "android.widget.TextView", height=TOOLBAR_HEIGHT, text="Synthetic screen")
+        self.add(toolbar, "android.widget.ImageView", height=TOOLBAR_HEIGHT, desc="More options", clickable=True, focusable=True)
+
+        container = app_root
+        for level in range(self.depth):
+            container = self.add(container, WRAPPER_CLASSES[level % len(WRAPPER_CLASSES)],
+                                 resource_id="container" if level else "fragment_container")
+        viewport_height = self.height - TOOLBAR_HEIGHT - NAVIGATION_HEIGHT
+        scroll = self.add(container, "androidx.core.widget.NestedScrollView", height=viewport_height, viewport=True,
+                          resource_id="scroll_view", scrollable=True, focusable=True)
+        sections = self.add(scroll, "android.widget.LinearLayout")
+
+        bottom_nav = self.add(app_root, "com.google.android.material.bottomnavigation.BottomNavigationView", orientation="h",
+                              resource_id="bottom_navigation")
+        for label in ("Home", "Search", "Library", "Profile"):
+            item = self.add(bottom_nav, "android.widget.FrameLayout", desc=label, clickable=True, focusable=True)
+            self.add(item, "android.widget.ImageView", height=NAVIGATION_HEIGHT - 48, resource_id="icon")
+            self.add(item, "android.widget.TextView", height=48, resource_id="label", text=label)
+
+        webview_budget = int(self.remaining() * self.webview_fraction)
+        if webview_budget > 0:
+            self.add_webview(sections, webview_budget)
+        section = 0
+        while self.remaining() > 0:
+            self.add_section(sections, section)
+            section += 1
+
+        return self.to_xml()
+
+    def add_section(self, parent, section) -> None:
+        self.add(parent, "android.widget.TextView", height=96, resource_id="section_title", text=f"Section {section + 1}")
+        if self.remaining() <= 0:
+            return
+        recycler = self.add(parent, RECYCLER_CLASS, resource_id="recycler_list", scrollable=True, focusable=True)
+        for row in range(self.recycler_fanout):
+            if self.remaining() <= 0:
+                return
+            if row % 5 == 4:
+                self.add_carousel(recycler)
+            else:
+                self.add_row(recycler, row)
+
+    def add_row(self, recycler, row) -> None:
+        item = self.add(recycler, "android.widget.LinearLayout", orientation="h", resource_id="row_item",
+                        clickable=True, long_clickable=True, focusable=True)
+        if self.remaining() <= 0:
+            return
+        self.add(item, "android.widget.ImageView", height=160, resource_id="thumbnail")
+        if self.remaining() <= 0:
+            return
+        text_container = self.add(item, "android.widget.LinearLayout", resource_id="text_container")
+        for resource_id, text in (("title", f"Item {row + 1}"), ("subtitle", "Description\nsecond line")):
+            if self.remaining() <= 0:
+                return
+            self.add(text_container, "android.widget.TextView", height=56, resource_id=resource_id, text=text)
+        if self.remaining() > 0:
+            self.add(item, "android.widget.ImageButton", height=120, desc="More options", clickable=True, focusable=True)
+
+    def add_carousel(self, recycler) -> None:
+        holder = self.add(recycler, "android.widget.FrameLayout", resource_id="carousel_holder")
+        if self.remaining() <= 0:
+            return
+        carousel = self.add(holder, RECYCLER_CLASS, orientation="h", resource_id="horizontal_carousel", scrollable=True,
+                            focusable=True)
+        for card in range(min(self.recycler_fanout, 8)):
+            if self.remaining() <= 0:
+                return
+            item = self.add(carousel, "android.widget.FrameLayout", resource_id="card", clickable=True, focusable=True)
+            if self.remaining() > 0:
+                self.add(item, "android.widget.ImageView", height=320, resource_id="card_image")
+            if self.remaining() > 0:
+                self.add(item, "android.widget.TextView", height=48, resource_id="card_title", text=f"Card {card + 1}")
+
+    def add_webview(self, parent, budget) -> None:
+        """DOM of a hybrid page: a spine down to webview_depth, the rest attached to random containers"""
+        end = len(self.parents) + budget
+        webview = self.add(parent, "android.webkit.WebView", height=self.height - TOOLBAR_HEIGHT - NAVIGATION_HEIGHT, viewport=True,
+                           resource_id="web_content", scrollable=True, focusable=True)
+        document = self.add(webview, "android.webkit.WebView", text="Synthetic page")
+        containers = [(document, 1)]
+        node_id = document
+        for level in range(2, self.webview_depth):
+            if len(self.parents) >= end - 1:
+                break
+            node_id = self.add(node_id, "android.view.View")
+            containers.append((node_id, level))
+
+        while len(self.parents) < end:
+            parent_id, level = containers[self.random.randrange(len(containers))]
+            if level + 1 < self.webview_depth and self.random.random() < 0.3:
+                containers.append((self.add(parent_id, "android.view.View"), level + 1))
+                continue
+            class_name, height, clickable, text = WEBVIEW_LEAVES[self.random.randrange(len(WEBVIEW_LEAVES))]
+            self.add(parent_id, class_name, height=height, text=text, clickable=clickable, focusable=clickable)
+
+    def layout(self) -> list[tuple[int, int, int, int]]:
+        """Bounds from a flow layout: children of "v" nodes are stacked, children of "h" nodes share the width.
+        Content below the bottom of a viewport keeps going, as in a scrolled list."""
+        count = len(self.parents)
+        heights = [0] * count
+        for node_id in range(count - 1, -1, -1):
+            child_heights = [heights[child] for child in self.children[node_id]]
+            if self.viewport[node_id] or not child_heights:
+                heights[node_id] = self.leaf_height[node_id]
+            elif self.orientation[node_id] == "h":
+                heights[node_id] = max(child_heights)
+            else:
+                heights[node_id] = sum(child_heights)
+
+        bounds = [None] * count
+        for node_id in range(count):
+            if self.parents[node_id] is None:
+                bounds[node_id] = (0, 0, self.width, max(self.height, heights[node_id]))
+            x1, y1, x2, _ = bounds[node_id]
+            children = self.children[node_id]
+            if self.orientation[node_id] == "h" and children:
+                step = (x2 - x1) / len(children)
+                for position, child in enumerate(children):
+                    bounds[child] = (int(x1 + position * step), y1, int(x1 + (position + 1) * step), y1 + heights[child])
+            else:
+                y = y1
+                for child in children:
+                    bounds[child] = (x1, y, x2, y + heights[child])
+                    y += heights[child]
+        return bounds
+
+    def to_xml(self) -> str:
+        bounds = self.layout()
+        root = ElementTree.Element("hierarchy", {"index": "0", "class": "hierarchy", "rotation": "0",
+                                                 "width": str(self.width), "height": str(self.height)})
+        elements = []
+        for node_id, parent in enumerate(self.parents):
+            parent_element = root if parent is None else elements[parent]
+            attributes = self.attributes[node_id]
+            x1, y1, x2, y2 = bounds[node_id]
+            attrib = {"index": str(len(parent_element)), "package": self.package, "class": attributes["class"],
+                      "text": attributes["text"], "resource-id": attributes["resource-id"],
+                      "content-desc": attributes["content-desc"]}
+            for name in BOOLEAN_ATTRIBUTES:
+                attrib[name] = "true" if attributes[name] else "false"
+            attrib["bounds"] = f"[{x1},{y1}][{x2},{y2}]"
+            attrib["displayed"] = "true"
+            element = ElementTree.SubElement(parent_element, attributes["class"], attrib)
+            elements.append(element)
+        return XML_DECLARATION + ElementTree.tostring(root, encoding="unicode")
+
+def generate_hierarchy(nodes=1000, **options) -> str:
+    return SyntheticHierarchy(nodes, **options).generate()
@@ -0,0 +1,36 @@
+import json
+import math
+
+def percentile(sorted_values, fraction) -> float:
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[position]
+
+class TimingStats:
+    """Collect durations per key (e.g. app/gesture) and summarize them"""
+    def __init__(self):
+        self.samples = {}
+
+    def record(self, key, seconds) -> None:
+        self.samples.setdefault(key, []).append(seconds)
+
+    def summary(self) -> dict:
+        summary = {}
+        for key, values in self.samples.items():
+            ordered = sorted(values)
+            summary["/".join(map(str, key)) if isinstance(key, tuple) else str(key)] = {
+                "count": len(ordered),
+                "total": round(sum(ordered), 3),
+                "mean": round(sum(ordered) / len(ordered), 3),
+                "p50": round(percentile(ordered, 0.50), 3),
+                "p95": round(percentile(ordered, 0.95), 3),
+                "p99": round(percentile(ordered, 0.99), 3),
+                "max": round(ordered[-1], 3),
+            }
+        return summary
+
+    def save(self, path) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2, ensure_ascii=False)
+        return path
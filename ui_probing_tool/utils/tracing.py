@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from utils.timing_stats import TimingStats
+
+class NullSpan:
+    """Shared do-nothing span handed out while tracing is off"""
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.labels = None
+        self.start = None
+
+    def __enter__(self) -> "Span":
+        self.labels = self.tracer.labels
+        self.start = time.monotonic()
+        self.tracer.stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        end = time.monotonic()
+        stack = self.tracer.stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        if exc_type is not None:
+            self.args = dict(self.args, error=exc_type.__name__)
+        self.tracer.finish(self, end, depth=len(stack))
+
+class Tracer:
+    """Timing spans for the phases of a test, kept as histograms and trace events.
+
+    Spans are labelled with the current app, screen and gesture and aggregated into
+    per-app, per-screen and per-gesture TimingStats. Recent spans are also kept as
+    Chrome trace events (chrome://tracing, Perfetto). While disabled, span()
+    returns a shared no-op object.
+    """
+    def __init__(self, enabled=False, max_events=200000, summary_path=None, trace_path=None, summary_interval=30.0):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.summary_path = summary_path
+        self.trace_path = trace_path
+        self.summary_interval = summary_interval
+        self.labels = {}
+        self.by_app = TimingStats()
+        self.by_screen = TimingStats()
+        self.by_gesture = TimingStats()
+        self.origin = time.monotonic()
+        self.last_summary = self.origin
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, options=None, output_dir=None) -> "Tracer":
+        """file_tag (e.g. a worker id) is added to the default file names so concurrent writers do not share them"""
+        options = dict(options or {})
+        file_tag = options.pop("file_tag", None)
+        suffix = f".{file_tag}" if file_tag else ""
+        if output_dir:
+            options.setdefault("summary_path", os.path.join(output_dir, f"timing_summary{suffix}.json"))
+            options.setdefault("trace_path", os.path.join(output_dir, f"trace{suffix}.json"))
+        return cls(**options)
+
+    def stack(self) -> list:
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def label(self, **labels) -> None:
+        """Set the app/screen/gesture the following spans belong to; None removes a label"""
+        if not self.enabled:
+            return
+        merged = dict(self.labels)
+        for key, value in labels.items():
+            if value is None:
+                merged.pop(key, None)
+            else:
+                merged[key] = value
+        self.labels = merged
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+
+    def finish(self, span, end, depth) -> None:
+        seconds = end - span.start
+        labels = span.labels
+        app = labels.get("app", "unknown")
+        with self.lock:
+            self.by_app.record((app, span.name), seconds)
+            if "screen" in labels:
+                self.by_screen.record((app, labels["screen"], span.name), seconds)
+            if "gesture" in labels:
+                self.by_gesture.record((app, labels["gesture"], span.name), seconds)
+            self.events.append({
+                "name": span.name,
+                "cat": labels.get("gesture", "automator"),
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6),
+                "dur": round(seconds * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": dict(labels, **span.args),
+            })
+
+        # Roll the summary file over between top-level spans only
+        if depth == 0 and self.summary_path and end - self.last_summary >= self.summary_interval:
+            self.last_summary = end
+            self.save_summary()
+
+    def summary(self) -> dict:
+        with self.lock:
+            return {
+                "by_app": self.by_app.summary(),
+                "by_screen": self.by_screen.summary(),
+                "by_gesture": self.by_gesture.summary(),
+            }
+
+    def save_summary(self, path=None) -> str:
+        """Also called from span exits, so a failed write is reported instead of raised"""
+        path = path or self.summary_path
+        try:
+            write_json_atomic(path, self.summary(), indent=2)
+        except Exception as e:
+            print(f"⚠️ Error occurred while saving timing summary {path}: {e}")
+            return None
+        return path
+
+    def export_chrome_trace(self, path=None) -> str:
+        path = path or self.trace_path
+        with self.lock:
+            events = list(self.events)
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "ui_probing_tool"}}]
+        try:
+            write_json_atomic(path, {"traceEvents": metadata + events, "displayTimeUnit": "ms"})
+        except Exception as e:
+            print(f"⚠️ Error occurred while exporting trace {path}: {e}")
+            return None
+        return path
+
+    def close(self) -> None:
+        if not self.enabled:
+            return
+        if self.summary_path:
+            self.save_summary()
+        if self.trace_path:
+            self.export_chrome_trace()
+
+def write_json_atomic(path, data, **json_options) -> None:
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **json_options)
+    os.replace(tmp_path, path)
@@ -0,0 +1,310 @@
+import json
+import mmap
+import struct
+import numpy as np
+from utils.node_table import (
+    BOUNDS_PATTERN, CLICKABLE, LONG_CLICKABLE, SCROLLABLE, CHECKABLE, CHECKED, FOCUSABLE, FOCUSED,
+    SELECTED, ENABLED, EDITABLE, PASSWORD, DISPLAYED,
+)
+
+# Boolean fields of a simplified element, in the order they appear in the JSON form
+FLAG_FIELDS = (
+    ("clickable", CLICKABLE),
+    ("long_clickable", LONG_CLICKABLE),
+    ("scrollable", SCROLLABLE),
+    ("checkable", CHECKABLE),
+    ("checked", CHECKED),
+    ("focusable", FOCUSABLE),
+    ("focused", FOCUSED),
+    ("selected", SELECTED),
+    ("enabled", ENABLED),
+    ("editable", EDITABLE),
+    ("is_password", PASSWORD),
+    ("displayed", DISPLAYED),
+)
+STORED_FLAGS = 0
+for _, bit in FLAG_FIELDS:
+    STORED_FLAGS |= bit
+
+# String fields and the XML attribute each one comes from
+STRING_FIELDS = (
+    ("class", "class"),
+    ("resource_id", "resource-id"),
+    ("text", "text"),
+    ("content_description", "content-desc"),
+    ("package", "package"),
+)
+NO_STRING = -1
+
+COMPACT_MAGIC = b"GVH1"
+COMPACT_VERSION = 1
+# magic, version, reserved, node count, string count, string bytes
+COMPACT_HEADER = struct.Struct("<4sHHIII")
+ALIGNMENT = 8
+
+class VhColumns:
+    """Simplified hierarchy as columns: element ids are row numbers, strings are interned"""
+    def __init__(self, flags, bounds, parent, string_ids, strings):
+        self.flags = flags
+        self.bounds = bounds
+        self.parent = parent
+        self.string_ids = string_ids
+        self.strings = strings
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @classmethod
+    def from_table(cls, table) -> "VhColumns":
+        # Node 0 of the table is the <hierarchy> root, so element ids are node ids shifted by one
+        count = len(table) - 1
+        strings = []
+        interned = {}
+        string_ids = np.full((len(STRING_FIELDS), count), NO_STRING, dtype=np.int32)
+
+        for element_id in range(count):
+            attrib = table.elements[element_id + 1].attrib
+            for field_index, (field, attribute) in enumerate(STRING_FIELDS):
+                value = attrib.get(attribute, "")
+                # Class is kept even when empty, the other fields become None
+                if field != "class":
+                    value = value.strip()
+                    if not value:
+                        continue
+                string_id = interned.get(value)
+                if string_id is None:
+                    string_id = interned[value] = len(strings)
+                    strings.append(value)
+                string_ids[field_index, element_id] = string_id
+
+        return cls(
+            (table.flags[1:] & STORED_FLAGS).astype(np.uint16),
+            table.bounds[1:].astype(np.int32),
+            (table.parent[1:] - 1).astype(np.int32),
+            string_ids,
+            strings,
+        )
+
+    @classmethod
+    def from_elements(cls, elements) -> "VhColumns":
+        """Columns of the JSON form, e.g. a loaded .vh file"""
+        count = len(elements)
+        flags = np.zeros(count, dtype=np.uint16)
+        bounds = np.zeros((count, 4), dtype=np.int32)
+        parent = np.full(count, -1, dtype=np.int32)
+        string_ids = np.full((len(STRING_FIELDS), count), NO_STRING, dtype=np.int32)
+        strings = []
+        interned = {}
+
+        for element_id, element in enumerate(elements):
+            parent[element_id] = element["parent"]
+            match = BOUNDS_PATTERN.search(element["bounds"])
+            if match:
+                bounds[element_id] = tuple(map(int, match.groups()))
+
+            element_flags = 0
+            for field, bit in FLAG_FIELDS:
+                if element[field]:
+                    element_flags |= bit
+            flags[element_id] = element_flags
+
+            for field_index, (field, _) in enumerate(STRING_FIELDS):
+                value = element[field]
+                if value is None:
+                    continue
+                string_id = interned.get(value)
+                if string_id is None:
+                    string_id = interned[value] = len(strings)
+                    strings.append(value)
+                string_ids[field_index, element_id] = string_id
+
+        return cls(flags, bounds, parent, string_ids, strings)
+
+def simplified_element(element_id, parent, children, values, bounds, flags) -> dict:
+    """One element of the JSON .vh form; values maps each string field to its value or None"""
+    x1, y1, x2, y2 = bounds
+    element = {
+        "id": element_id,
+        "parent": parent,
+        "children": children,
+        "child_count": len(children),
+    }
+    for field, _ in STRING_FIELDS:
+        element[field] = values[field]
+    element["bounds"] = f"[{x1},{y1}][{x2},{y2}]"
+    element["size"] = f"{x2 - x1}*{y2 - y1}"
+    for field, bit in FLAG_FIELDS:
+        element[field] = bool(flags & bit)
+    return element
+
+def child_lists(parent) -> list[list[int]]:
+    """Children of each element in id order; ids are pre-order, so this is document order"""
+    children = [[] for _ in range(len(parent))]
+    for element_id, parent_id in enumerate(parent):
+        if parent_id >= 0:
+            children[parent_id].append(element_id)
+    return children
+
+def simplified_elements(columns) -> list[dict]:
+    flags = columns.flags.tolist()
+    bounds = columns.bounds.tolist()
+    parent = columns.parent.tolist()
+    string_ids = columns.string_ids.tolist()
+    strings = columns.strings
+    children = child_lists(parent)
+
+    elements = []
+    for element_id in range(len(parent)):
+        values = {}
+        for field_index, (field, _) in enumerate(STRING_FIELDS):
+            string_id = string_ids[field_index][element_id]
+            values[field] = strings[string_id] if string_id != NO_STRING else None
+        elements.append(simplified_element(element_id, parent[element_id], children[element_id],
+                                           values, bounds[element_id], flags[element_id]))
+    return elements
+
+def padding(size) -> bytes:
+    return b"\0" * (-size % ALIGNMENT)
+
+def encode_compact(columns) -> bytes:
+    """Compact .vhc bytes: header, then flags, bounds, parent, string ids and the string table"""
+    encoded = [string.encode("utf-8") for string in columns.strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    if encoded:
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    string_data = b"".join(encoded)
+
+    parts = [COMPACT_HEADER.pack(COMPACT_MAGIC, COMPACT_VERSION, 0, len(columns), len(encoded), len(string_data))]
+    parts.append(padding(COMPACT_HEADER.size))
+    for array in (
+        np.ascontiguousarray(columns.flags, dtype="<u2"),
+        np.ascontiguousarray(columns.bounds, dtype="<i4"),
+        np.ascontiguousarray(columns.parent, dtype="<i4"),
+        np.ascontiguousarray(columns.string_ids, dtype="<i4"),
+        offsets.astype("<u4"),
+    ):
+        data = array.tobytes()
+        parts.append(data)
+        parts.append(padding(len(data)))
+    parts.append(string_data)
+    return b"".join(parts)
+
+def is_compact(data) -> bool:
+    return bytes(data[:len(COMPACT_MAGIC)]) == COMPACT_MAGIC
+
+class CompactHierarchy:
+    """Reader of a compact .vhc file.
+
+    The file is memory-mapped and each column is a numpy view into it, created on
+    first access. Strings are decoded one at a time, so scanning flags or bounds
+    over many samples never touches the text.
+    """
+    def __init__(self, source):
+        self.mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.buffer = source
+        else:
+            with open(source, "rb") as f:
+                self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffer = self.mmap
+
+        magic, version, _, self.count, self.string_count, self.string_bytes = COMPACT_HEADER.unpack_from(self.buffer, 0)
+        if magic != COMPACT_MAGIC or version != COMPACT_VERSION:
+            raise ValueError(f"❌ Not a compact view hierarchy (magic {magic!r}, version {version})")
+
+        self.sections = {}
+        offset = COMPACT_HEADER.size + len(padding(COMPACT_HEADER.size))
+        for name, dtype, shape in (
+            ("flags", "<u2", (self.count,)),
+            ("bounds", "<i4", (self.count, 4)),
+            ("parent", "<i4", (self.count,)),
+            ("string_ids", "<i4", (len(STRING_FIELDS), self.count)),
+            ("string_offsets", "<u4", (self.string_count + 1,)),
+        ):
+            self.sections[name] = (offset, dtype, shape)
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            offset += size + len(padding(size))
+        self.string_data_offset = offset
+        self.columns = {}
+        self._children = None
+
+    def __enter__(self) -> "CompactHierarchy":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        self.columns = {}
+        self._children = None
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:
+                # Arrays handed out are still alive; the map is released with them
+                pass
+            self.mmap = None
+
+    def column(self, name) -> np.ndarray:
+        array = self.columns.get(name)
+        if array is None:
+            offset, dtype, shape = self.sections[name]
+            array = np.frombuffer(self.buffer, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+            self.columns[name] = array
+        return array
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self.column("flags")
+
+    @property
+    def bounds(self) -> np.ndarray:
+        return self.column("bounds")
+
+    @property
+    def parent(self) -> np.ndarray:
+        return self.column("parent")
+
+    def string(self, string_id):
+        if string_id == NO_STRING:
+            return None
+        offsets = self.column("string_offsets")
+        start = self.string_data_offset + int(offsets[string_id])
+        end = self.string_data_offset + int(offsets[string_id + 1])
+        return bytes(self.buffer[start:end]).decode("utf-8")
+
+    def field(self, element_id, field) -> str:
+        field_index = [name for name, _ in STRING_FIELDS].index(field)
+        return self.string(int(self.column("string_ids")[field_index, element_id]))
+
+    def children(self, element_id) -> list[int]:
+        if self._children is None:
+            self._children = child_lists(self.parent.tolist())
+        return self._children[element_id]
+
+    def element(self, element_id) -> dict:
+        string_ids = self.column("string_ids")[:, element_id].tolist()
+        values = {field: self.string(string_id) for (field, _), string_id in zip(STRING_FIELDS, string_ids)}
+        return simplified_element(element_id, int(self.parent[element_id]), self.children(element_id), values,
+                                  self.bounds[element_id].tolist(), int(self.flags[element_id]))
+
+    def to_columns(self) -> VhColumns:
+        offsets = self.column("string_offsets").tolist()
+        data = bytes(self.buffer[self.string_data_offset:self.string_data_offset + self.string_bytes])
+        strings = [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        return VhColumns(self.flags.copy(), self.bounds.copy(), self.parent.copy(), self.column("string_ids").copy(), strings)
+
+    def elements(self) -> list[dict]:
+        """The same list of dicts as the JSON form"""
+        return simplified_elements(self.to_columns())
+
+def load_vh(path) -> list[dict]:
+    """Elements of a .vh (JSON) or .vhc (compact) file"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if is_compact(data):
+        return CompactHierarchy(data).elements()
+    return json.loads(data)
@@ -1,52 +1,45 @@
-from PIL import Image
-import numpy as np
-import cv2
-import numpy as np
-from PIL import Image
+from xml.etree import ElementTree
+from utils.hierarchy_diff import HierarchyDiff, HierarchyDiffer
+from utils.image_change import ImageChangeDetector
 
-def is_same_screen(before_view_hierarchy_path, after_view_hierarchy_path, during_view_hierarchy_path=None):
+def load_hierarchy(view_hierarchy):
+    """Parsed root of a StageCapture, an Element or an XML file path"""
+    if hasattr(view_hierarchy, "root"):
+        return view_hierarchy.root
+    if isinstance(view_hierarchy, ElementTree.Element):
+        return view_hierarchy
+    return ElementTree.parse(view_hierarchy).getroot()
+
+def hierarchy_changes(before_view_hierarchy, after_view_hierarchy, during_view_hierarchy=None, differ=None) -> HierarchyDiff:
+    """Structural changes after (or, failing that, during) the gesture"""
+    differ = differ or HierarchyDiffer()
+    before_root = load_hierarchy(before_view_hierarchy)
+
+    for other in (after_view_hierarchy, during_view_hierarchy):
+        if other is None:
+            continue
+        # Captures with byte-identical sources cannot differ
+        if getattr(other, "xml_source", None) is not None and other.xml_source == getattr(before_view_hierarchy, "xml_source", None):
+            continue
+        changes = differ.diff(before_root, load_hierarchy(other))
+        if not changes.is_empty:
+            return changes
+    return HierarchyDiff()
+
+def is_same_screen(before_view_hierarchy, after_view_hierarchy, during_view_hierarchy=None, differ=None):
     try:
-        with open(before_view_hierarchy_path, "r", encoding="utf-8") as f:
-                before_view_hierarchy = f.read()
-                
-        with open(after_view_hierarchy_path, "r", encoding="utf-8") as f:
-                after_view_hierarchy = f.read()
-        
-        if during_view_hierarchy_path is not None:
-                with open(during_view_hierarchy_path, "r", encoding="utf-8") as f:
-                        during_view_hierarchy = f.read()
-                        
-                return before_view_hierarchy == after_view_hierarchy and before_view_hierarchy == during_view_hierarchy
-        
-        return before_view_hierarchy == after_view_hierarchy
+        return hierarchy_changes(before_view_hierarchy, after_view_hierarchy, during_view_hierarchy, differ).is_empty
     
     except Exception as e:
                 print(f"⚠️ Error occurred while comparing view hierarchies: {e}")
                 return True
 
-def is_same_screen_img(before_img_path, after_img_path, during_img_path, threshold=5):
+def is_same_screen_img(before_img, after_img, during_img, threshold=5, bounds=None, detector=None):
+    """Screenshots (paths, PNG bytes or StageCaptures) show no change after or during the gesture"""
     try:
-        before_screenshot = cv2.imread(before_img_path)
-        during_screenshot = cv2.imread(during_img_path)
-        after_screenshot = cv2.imread(after_img_path)
-        
-        if before_screenshot is None or during_screenshot is None or after_screenshot is None:
-            return True 
-        
-        before_array = np.array(Image.fromarray(cv2.cvtColor(before_screenshot, cv2.COLOR_BGR2RGB)))
-        during_array = np.array(Image.fromarray(cv2.cvtColor(during_screenshot, cv2.COLOR_BGR2RGB)))
-        after_array = np.array(Image.fromarray(cv2.cvtColor(after_screenshot, cv2.COLOR_BGR2RGB)))
-        
-        if before_array.shape != after_array.shape or before_array.shape != during_array.shape:
-            return False
-        
-        before_during_diff = np.sum(np.abs(before_array - during_array))
-        before_during_norm = before_during_diff / (before_array.shape[0] * before_array.shape[1] * before_array.shape[2])
-        
-        before_after_diff = np.sum(np.abs(before_array - after_array))
-        before_after_norm = before_after_diff / (before_array.shape[0] * before_array.shape[1] * before_array.shape[2])
-        
-        return not (before_during_norm > threshold or before_after_norm > threshold)
+        detector = detector or ImageChangeDetector(threshold=threshold)
+        change = detector.compare_stages(before_img, after_img, during_img, bounds=bounds)
+        return change is None or not change.changed
             
     except Exception as e:
         print(f"⚠️ Error occurred while comparing images: {e}")
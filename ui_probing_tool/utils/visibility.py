@@ -0,0 +1,93 @@
+import numpy as np
+from utils.hit_testing import ExclusiveRegion
+from utils.node_table import CLICKABLE, LONG_CLICKABLE, SCROLLABLE, DISPLAYED, VALID_BOUNDS
+
+HIDDEN = "hidden"
+ZERO_AREA = "zero_area"
+OFF_SCREEN = "off_screen"
+OCCLUDED = "occluded"
+
+def hidden_mask(table) -> np.ndarray:
+    """Nodes with displayed="false" on themselves or any ancestor"""
+    hidden = ~table.has(DISPLAYED)
+    parents = table.parent.tolist()
+    for node_id in range(1, len(table)):
+        if hidden[parents[node_id]]:
+            hidden[node_id] = True
+    return hidden
+
+def occluder_mask(table) -> np.ndarray:
+    """Nodes that draw over and take touches from whatever lies beneath them.
+
+    Touch-consuming elements and whole top-level windows (dialogs, bottom sheets
+    and keyboards are dumped as later windows) count; plain layout containers do not.
+    """
+    width, height = table.sizes()
+    touch_consuming = (table.flags & (CLICKABLE | LONG_CLICKABLE | SCROLLABLE)) != 0
+    return (table.has(VALID_BOUNDS) & (width > 0) & (height > 0) & ~hidden_mask(table) &
+            (touch_consuming | (table.depth == 1)))
+
+def screen_bounds(table) -> tuple[int, int, int, int]:
+    """Extent of the top-level windows, used as the visible screen area"""
+    windows = np.flatnonzero((table.depth == 1) & table.has(VALID_BOUNDS))
+    if not len(windows):
+        return table.bounds_of(0)
+    bounds = table.bounds[windows]
+    return int(bounds[:, 0].min()), int(bounds[:, 1].min()), int(bounds[:, 2].max()), int(bounds[:, 3].max())
+
+def clip(bounds, screen) -> tuple[int, int, int, int]:
+    return max(bounds[0], screen[0]), max(bounds[1], screen[1]), min(bounds[2], screen[2]), min(bounds[3], screen[3])
+
+def area(bounds) -> int:
+    return max(0, bounds[2] - bounds[0]) * max(0, bounds[3] - bounds[1])
+
+class VisibilityFilter:
+    """Visible on-screen fraction of candidate elements after clipping and occlusion.
+
+    Elements drawn later (higher document order, outside the candidate's own
+    subtree) cover it; the uncovered area comes from the same coordinate
+    compression used for tap point selection.
+    """
+    def __init__(self, table, spatial_index, min_visible_fraction=0.25, screen=None):
+        self.table = table
+        self.spatial_index = spatial_index
+        self.min_visible_fraction = min_visible_fraction
+        self.screen = screen or screen_bounds(table)
+        self.hidden = hidden_mask(table)
+        self.occluders = occluder_mask(table)
+        self.reasons = {}
+
+    def visible_fraction(self, node_id) -> float:
+        bounds = self.table.bounds_of(node_id)
+        full_area = area(bounds) if bounds else 0
+        if self.hidden[node_id] or not full_area or not self.screen:
+            return 0.0
+
+        clipped = clip(bounds, self.screen)
+        if not area(clipped):
+            return 0.0
+
+        occluders = self.spatial_index.overlapping(clipped, mask=self.occluders)
+        occluders = occluders[occluders >= self.table.subtree_end[node_id]]
+        visible_area = ExclusiveRegion(clipped, self.table.bounds[occluders]).area
+        return visible_area / full_area
+
+    def rejection_reason(self, node_id) -> str:
+        """None for visible elements, otherwise why the element is dropped"""
+        if node_id in self.reasons:
+            return self.reasons[node_id]
+
+        bounds = self.table.bounds_of(node_id)
+        if self.hidden[node_id]:
+            reason = HIDDEN
+        elif not bounds or not area(bounds):
+            reason = ZERO_AREA
+        elif not self.screen or area(clip(bounds, self.screen)) / area(bounds) < self.min_visible_fraction:
+            reason = OFF_SCREEN
+        elif self.visible_fraction(node_id) < self.min_visible_fraction:
+            reason = OCCLUDED
+        else:
+            reason = None
+
+        self.reasons[node_id] = reason
+        return reason
@@ -0,0 +1,133 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.managers import BaseManager
+
+DISCOVER = "discover"
+ELEMENT = "element"
+
+@dataclass(frozen=True)
+class WorkItem:
+    app: str
+    screen: str
+    kind: str = ELEMENT
+    action: str = None
+    path: str = None
+
+    @property
+    def action_path(self) -> str:
+        return f"{self.action}/{self.path}"
+
+    @property
+    def key(self) -> tuple:
+        if self.kind == DISCOVER:
+            return (self.app, self.screen, DISCOVER)
+        return (self.app, self.screen, self.action_path)
+
+class WorkQueue:
+    """Shared queue of exploration work items with per-worker in-flight tracking.
+
+    Items claimed by a worker stay in flight until they are completed or failed.
+    When a worker dies, requeue_worker() puts its in-flight items back.
+    """
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.queued_keys = set()
+        self.in_flight = {}
+        self.attempts = {}
+        self.visited = {}
+        self.outcomes = {}
+        self.completed_records = []
+
+    def seed_visited(self, app, screen, visited_paths) -> None:
+        with self.lock:
+            self.visited.setdefault((app, screen), set()).update(visited_paths)
+
+    def push(self, items) -> int:
+        added = 0
+        with self.lock:
+            for item in items:
+                if item.key in self.queued_keys:
+                    continue
+                if item.kind == ELEMENT and item.action_path in self.visited.get((item.app, item.screen), ()):
+                    continue
+                self.pending.append(item)
+                self.queued_keys.add(item.key)
+                added += 1
+        return added
+
+    def claim(self, worker_id, prefer_app=None):
+        with self.lock:
+            if not self.pending:
+                return None
+
+            item = None
+            if prefer_app is not None:
+                for candidate in self.pending:
+                    if candidate.app == prefer_app:
+                        item = candidate
+                        break
+            if item is None:
+                item = self.pending[0]
+            self.pending.remove(item)
+
+            self.in_flight.setdefault(worker_id, {})[item.key] = item
+            self.attempts[item.key] = self.attempts.get(item.key, 0) + 1
+            return item
+
+    def complete(self, worker_id, item, outcome=None, sample_dir=None, duration=None) -> None:
+        with self.lock:
+            self.in_flight.get(worker_id, {}).pop(item.key, None)
+            if item.kind == ELEMENT:
+                self.visited.setdefault((item.app, item.screen), set()).add(item.action_path)
+                self.completed_records.append({
+                    "app": item.app,
+                    "screen": item.screen,
+                    "action_path": item.action_path,
+                    "outcome": outcome,
+                    "sample_dir": sample_dir,
+                    "duration": duration,
+                })
+            self.outcomes[item.key] = outcome
+
+    def drain_completed(self) -> list[dict]:
+        with self.lock:
+            records, self.completed_records = self.completed_records, []
+            return records
+
+    def fail(self, worker_id, item) -> bool:
+        with self.lock:
+            self.in_flight.get(worker_id, {}).pop(item.key, None)
+            return self._requeue(item)
+
+    def requeue_worker(self, worker_id) -> int:
+        with self.lock:
+            items = list(self.in_flight.pop(worker_id, {}).values())
+            return sum(1 for item in items if self._requeue(item))
+
+    def _requeue(self, item) -> bool:
+        if self.attempts.get(item.key, 0) >= self.max_attempts:
+            print(f"⚠️ Dropping work item after {self.max_attempts} attempts: {item}")
+            self.outcomes[item.key] = "dropped"
+            return False
+        self.pending.appendleft(item)
+        return True
+
+    def is_finished(self) -> bool:
+        with self.lock:
+            return not self.pending and not any(self.in_flight.values())
+
+    def counts(self) -> dict:
+        with self.lock:
+            return {
+                "pending": len(self.pending),
+                "in_flight": sum(len(items) for items in self.in_flight.values()),
+                "completed": len(self.outcomes),
+            }
+
+class WorkQueueManager(BaseManager):
+    """Serve a single WorkQueue to worker processes"""
+
+WorkQueueManager.register("WorkQueue", WorkQueue)
@@ -1,125 +1,161 @@
+import itertools
 import xml.etree.ElementTree as ET
-from anytree import AnyNode
-import textwrap
-
-def any_tree_to_html(node):
-    """Generate HTML from AnyTree node with clean indent and minimal hierarchy."""
-    results = ''
-
-    if 'RECYCLERVIEW' in node.type:
-        node_type = 'Recycler'
-    elif 'IMAGEVIEW' in node.type:
-        node_type = 'img'
-    elif 'BUTTON' in node.type:
-        node_type = 'button'
-    elif 'EDITTEXT' in node.type:
-        node_type = 'input'
-    elif 'TEXTVIEW' in node.type:
-        node_type = 'p'
-    else:
-        node_type = 'div'
+
+INDENT = '  '
+
+def html_tag(node_type) -> str:
+    if 'RECYCLERVIEW' in node_type:
+        return 'Recycler'
+    elif 'IMAGEVIEW' in node_type:
+        return 'img'
+    elif 'BUTTON' in node_type:
+        return 'button'
+    elif 'EDITTEXT' in node_type:
+        return 'input'
+    elif 'TEXTVIEW' in node_type:
+        return 'p'
+    return 'div'
+
+def node_key(element) -> tuple:
+    """The attributes the HTML of a node depends on"""
+    attrib = element.attrib
+    return (
+        attrib.get('class', 'android.view.View').split('.')[-1].upper(),  # e.g., "android.widget.Button" → "BUTTON"
+        attrib.get('text', ''),
+        attrib.get('content-desc', ''),
+        attrib.get('displayed', 'true') == 'true',
+        attrib.get('clickable', 'false') == 'true',
+        attrib.get('long-clickable', 'false') == 'true',
+        attrib.get('scrollable', 'false') == 'true',
+        attrib.get('bounds', ''),
+    )
+
+def render_node(key, rendered_children):
+    """HTML fragment of one node given its rendered children, or None if it renders nothing.
+
+    A fragment is a (possibly multi-line) string for nodes shown as a single tag,
+    or (open_tag, children, close_tag) where the tags are None for nodes that only
+    pass their children through.
+    """
+    node_type, text, content_desc, visible, clickable, long_clickable, scrollable, bounds = key
+    tag = html_tag(node_type)
 
     attrs = []
-    if getattr(node, 'clickable', False):
+    if clickable:
         attrs.append('clickable')
-    if getattr(node, 'long_clickable', False):
+    if long_clickable:
         attrs.append('long-clickable')
-    if getattr(node, 'scrollable', False):
+    if scrollable:
         attrs.append('scrollable')
 
-    rendered_children = []
-    for child in node.children:
-        child_html = any_tree_to_html(child)
-        if child_html.strip():
-            rendered_children.append(child_html)
-
-  
-    base_render = node.clickable or node.long_clickable or node.scrollable
-    child_count_based_render = len(rendered_children) >= 2 or 'RECYCLERVIEW' in node.type
+    base_render = clickable or long_clickable or scrollable
+    child_count_based_render = len(rendered_children) >= 2 or 'RECYCLERVIEW' in node_type
 
-    if base_render and node.bounds:
-        attrs.append(f'bounds="{node.bounds}"')
+    if base_render and bounds:
+        attrs.append(f'bounds="{bounds}"')
     should_render = base_render or child_count_based_render
 
     attr_str = ' '.join(attrs)
-    indent = '  '
+    open_tag = f'<{tag}{(" " + attr_str) if attr_str else ""}>'
 
-    if (node.is_leaf and node.visible) or (not rendered_children and node.children and node.visible):
-        if should_render or node.text or node.content_desc: 
-            if not node.text and node.content_desc:
-                node.text = node.content_desc
-            return f'<{node_type}{" " + attr_str if attr_str else ""}>{node.text or ""}</{node_type}>\n'
-        else:
-            return ''
+    # Visible leaves, and visible nodes none of whose children render, become a single tag
+    if visible and not rendered_children:
+        if should_render or text or content_desc:
+            return f'{open_tag}{text or content_desc}</{tag}>\n'
+        return None
 
     if should_render:
-        results += f'<{node_type}{(" " + attr_str) if attr_str else ""}>\n'
-        for child_html in rendered_children:
-            results += textwrap.indent(child_html, indent)
-        results += f'</{node_type}>\n'
-    else:
-        for child_html in rendered_children:
-            results += child_html
-
-    return results
-
-
-def parse_xml_to_anytree(xml_path):
-    """Parses a UI hierarchy XML file into an AnyTree structure."""
-    tree = ET.parse(xml_path)
-    root_element = tree.getroot()
-
-    node_id_counter = [0]
-
-    def create_node(element, parent=None):
-        node_id = node_id_counter[0]
-        node_id_counter[0] += 1
-
-        resource_id = element.attrib.get('resource-id', '')
-        content_desc = element.attrib.get('content-desc', '')
-        text = element.attrib.get('text', '')
-        visible = element.attrib.get('displayed', 'true') == 'true'
-        clickable = element.attrib.get('clickable', 'false') == 'true'
-        long_clickable = element.attrib.get('long-clickable', 'false') == 'true'
-        scrollable = element.attrib.get('scrollable', 'false') == 'true'
-        focusable = element.attrib.get('focusable', 'false') == 'true'
-        bounds = element.attrib.get('bounds', '')
-        class_name = element.attrib.get('class', 'android.view.View')
-        enabled = element.attrib.get('enabled', 'true') == 'true'
-
-        is_leaf = len(element) == 0 and visible
-
-        node = AnyNode(
-            id=node_id,
-            parent=parent,
-            type=class_name.split('.')[-1].upper(),  # e.g., "android.widget.Button" → "BUTTON"
-            text=text,
-            content_desc=content_desc,
-            resource_id=resource_id.split('/')[-1].split('_') if '/' in resource_id else [resource_id],
-            visible=visible,
-            clickable=clickable,
-            long_clickable=long_clickable,
-            scrollable=scrollable,
-            focusable=focusable,
-            bounds=bounds,
-            enabled=enabled,
-            is_leaf=is_leaf,
-            leaf_id=-1,
-        )
-
-        for child in element:
-            create_node(child, node)
-
-        return node
-
-    root_node = create_node(root_element[0])
-    return root_node
-
-
+        return (open_tag + '\n', tuple(rendered_children), f'</{tag}>\n')
+    if rendered_children:
+        return (None, tuple(rendered_children), None)
+    return None
+
+def iter_fragment_lines(fragment, depth=0):
+    """Lines of a fragment, indented two spaces per enclosing rendered tag"""
+    stack = [(fragment, depth)]
+    while stack:
+        fragment, depth = stack.pop()
+        if isinstance(fragment, str):
+            if depth == 0:
+                yield fragment
+                continue
+            # Same rule as textwrap.indent: whitespace-only lines are not indented
+            prefix = INDENT * depth
+            for line in fragment.splitlines(True):
+                yield prefix + line if line.strip() else line
+            continue
+
+        open_tag, children, close_tag = fragment
+        child_depth = depth
+        if open_tag is not None:
+            stack.append((close_tag, depth))
+            child_depth = depth + 1
+        stack.extend((child, child_depth) for child in reversed(children))
+        if open_tag is not None:
+            stack.append((open_tag, depth))
+
+class HtmlRenderer:
+    """Renders UI hierarchies to the simplified HTML straight from ElementTree.
+
+    Subtrees are hash-consed on their rendering attributes and their children's
+    ids, so a subtree already seen (e.g. in the before stage of the same screen)
+    reuses its fragment. Indentation is applied once, when lines are emitted.
+    """
+    def __init__(self, max_entries=200000):
+        self.max_entries = max_entries
+        self.fragments = {}
+        # Ids are never reused, so keys stay unambiguous across clears and threads
+        self.ids = itertools.count()
+
+    def fragment(self, root_element):
+        if len(self.fragments) > self.max_entries:
+            self.fragments = {}
+        fragments = self.fragments
+
+        subtree_ids = {}
+        results = {}
+        stack = [(root_element, False)]
+        while stack:
+            element, children_done = stack.pop()
+            if not children_done:
+                stack.append((element, True))
+                stack.extend((child, False) for child in reversed(element))
+                continue
+
+            key = (node_key(element), tuple(subtree_ids[child] for child in element))
+            entry = fragments.get(key)
+            if entry is None:
+                rendered_children = [results[child] for child in element if results[child] is not None]
+                entry = fragments.setdefault(key, (next(self.ids), render_node(key[0], rendered_children)))
+            subtree_ids[element], results[element] = entry
+
+        return results[root_element]
+
+    def iter_lines(self, root_element):
+        """Lines of the HTML for a <hierarchy> root, which itself is not rendered"""
+        if len(root_element) == 0:
+            return iter(())
+        fragment = self.fragment(root_element[0])
+        if fragment is None:
+            return iter(())
+        return iter_fragment_lines(fragment)
+
+    def render(self, root_element) -> str:
+        return ''.join(self.iter_lines(root_element))
+
+    def write(self, root_element, output) -> None:
+        output.writelines(self.iter_lines(root_element))
+
+HTML_RENDERER = HtmlRenderer()
+
+def render_html(root_element) -> str:
+    return HTML_RENDERER.render(root_element)
 
 def xml_to_html(xml_path, output_path=None):
-    root = parse_xml_to_anytree(xml_path)
-    html_output = any_tree_to_html(root)
+    return xml_root_to_html(ET.parse(xml_path).getroot(), output_path)
+
+def xml_root_to_html(root_element, output_path=None):
+    html_output = render_html(root_element)
 
     if output_path:
         with open(output_path, 'w', encoding='utf-8') as f:
@@ -127,6 +163,8 @@ def xml_to_html(xml_path, output_path=None):
     else:
         print(html_output)
 
+    return html_output
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
@@ -134,4 +172,4 @@ if __name__ == '__main__':
     parser.add_argument('--out', help='Output HTML file (optional)')
     args = parser.parse_args()
 
-    xml_to_html(args.xml, args.out)
\ No newline at end of file
+    xml_to_html(args.xml, args.out)